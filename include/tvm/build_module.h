@@ -210,6 +210,24 @@ class BuildConfigNode : public Node {
   /*! \brief Whether to dump the IR of each pass (only when building from python) */
   bool dump_pass_ir = false;
 
+  /*!
+   * \brief Directory of the persistent compile cache (only when building from python).
+   * If this is empty, the compile cache is disabled.
+   */
+  std::string build_cache_dir = "";
+
+  /*! \brief Maximum total size in MB of the compile cache before LRU eviction kicks in */
+  int build_cache_max_mb = 1024;
+
+  /*!
+   * \brief Number of worker processes used to generate host code when building
+   * multiple functions (only when building from python).
+   */
+  int build_jobs = 1;
+
+  /*! \brief Whether to profile time and IR size of each pass (only when building from python) */
+  bool profile_pass = false;
+
   void VisitAttrs(AttrVisitor* v) final {
     v->Visit("data_alignment", &data_alignment);
     v->Visit("offset_factor", &offset_factor);
@@ -222,6 +240,10 @@ class BuildConfigNode : public Node {
     v->Visit("detect_global_barrier", &detect_global_barrier);
     v->Visit("partition_const_loop", &partition_const_loop);
     v->Visit("dump_pass_ir", &dump_pass_ir);
+    v->Visit("build_cache_dir", &build_cache_dir);
+    v->Visit("build_cache_max_mb", &build_cache_max_mb);
+    v->Visit("build_jobs", &build_jobs);
+    v->Visit("profile_pass", &profile_pass);
   }
 
   static constexpr const char* _type_key = "BuildConfig";
@@ -9,6 +9,8 @@ from .base import _LIB, check_call, c_array, string_types, _FFI_MODE
 from .runtime_ctypes import TVMType, TVMContext, TVMArray, TVMArrayHandle
 from .runtime_ctypes import TypeCode, tvm_shape_index_t
 
+# Alignment of data pointers assumed by generated functions, see kAllocAlignment.
+_ALLOC_ALIGNMENT = 64
 
 IMPORT_EXCEPT = RuntimeError if _FFI_MODE == "cython" else ImportError
 
@@ -79,6 +81,37 @@ def numpyasarray(np_data):
     return arr, shape
 
 
+def from_numpy(np_data):
+    """Create an array that shares the memory of a numpy array without copying.
+
+    The returned array keeps a reference to np_data, so the numpy buffer
+    stays alive as long as the array is used.
+
+    Parameters
+    ----------
+    np_data : numpy.ndarray
+        The source array, must be C contiguous and aligned
+        to 64 bytes, which is the alignment assumed by TVM functions.
+
+    Returns
+    -------
+    arr : tvm.nd.NDArray
+        The array that views np_data on CPU.
+    """
+    if not isinstance(np_data, np.ndarray):
+        raise TypeError("from_numpy requires numpy.ndarray, get %s" % str(type(np_data)))
+    if not np_data.flags['C_CONTIGUOUS']:
+        raise ValueError("from_numpy requires C contiguous array")
+    if np_data.ctypes.data % _ALLOC_ALIGNMENT != 0:
+        raise ValueError("from_numpy requires data aligned to %d bytes, "
+                         "use tvm.nd.array to create a copy instead" % _ALLOC_ALIGNMENT)
+    arr, shape = numpyasarray(np_data)
+    ret = _make_array(ctypes.pointer(arr), True)
+    # tie the lifetime of the header and the buffer to the array
+    ret._owner = (arr, shape, np_data)
+    return ret
+
+
 def empty(shape, dtype="float32", ctx=context(1, 0)):
     """Create an empty array given shape and device
 
@@ -171,12 +204,7 @@ class NDArrayBase(_NDArrayBase):
             except:
                 raise TypeError('array must be an array_like data,' +
                                 'type %s is not supported' % str(type(source_array)))
-        t = TVMType(self.dtype)
-        shape, dtype = self.shape, self.dtype
-        if t.lanes > 1:
-            shape = shape + (t.lanes,)
-            t.lanes = 1
-            dtype = str(t)
+        shape, dtype = self._numpy_shape_dtype()
 
         if source_array.shape != shape:
             raise ValueError("array shape do not match the shape of NDArray {0} vs {1}".format(
@@ -196,20 +224,52 @@ class NDArrayBase(_NDArrayBase):
     def __str__(self):
         return str(self.asnumpy())
 
-    def asnumpy(self):
+    def _numpy_shape_dtype(self):
+        """shape and dtype of the numpy array that holds the content"""
+        t = TVMType(self.dtype)
+        shape, dtype = self.shape, self.dtype
+        if t.lanes > 1:
+            shape = shape + (t.lanes,)
+            t.lanes = 1
+            dtype = str(t)
+        return shape, dtype
+
+    @property
+    def __array_interface__(self):
+        """Numpy array interface, only available for CPU arrays.
+
+        It allows np.asarray to create a view that shares the memory
+        of this array, the view keeps this array alive.
+        """
+        arr = self.handle.contents
+        if arr.ctx.device_type != TVMContext.STR2MASK["cpu"]:
+            raise AttributeError("__array_interface__ is only available for cpu arrays")
+        if arr.strides:
+            raise AttributeError("__array_interface__ requires compact array")
+        shape, dtype = self._numpy_shape_dtype()
+        return {"shape": shape,
+                "typestr": np.dtype(dtype).str,
+                "data": ((arr.data or 0) + arr.byte_offset, False),
+                "strides": None,
+                "version": 3}
+
+    def asnumpy(self, copy=True):
         """Convert this array to numpy array
 
+        Parameters
+        ----------
+        copy : bool, optional
+            If False and the array is on CPU, return a view that shares
+            the memory of this array instead of a copy.
+
         Returns
         -------
         np_arr : numpy.ndarray
             The corresponding numpy array.
         """
-        t = TVMType(self.dtype)
-        shape, dtype = self.shape, self.dtype
-        if t.lanes > 1:
-            shape = shape + (t.lanes,)
-            t.lanes = 1
-            dtype = str(t)
+        if not copy and self.ctx.device_type == TVMContext.STR2MASK["cpu"]:
+            return np.asarray(self)
+        shape, dtype = self._numpy_shape_dtype()
         np_arr = np.empty(shape, dtype=dtype)
         assert np_arr.flags['C_CONTIGUOUS']
         data = np_arr.ctypes.data_as(ctypes.c_void_p)
@@ -234,6 +294,105 @@ class NDArrayBase(_NDArrayBase):
             raise ValueError("Unsupported target type %s" % str(type(target)))
         return target
 
+    def copyto_async(self, target, stream):
+        """Enqueue a copy of array to target on stream.
+
+        Parameters
+        ----------
+        target : NDArray or TVMContext
+            The target array to be copied, must have same shape as this array.
+
+        stream : ctypes.c_void_p
+            The stream of the non-cpu context the copy is enqueued on.
+
+        Returns
+        -------
+        future : StreamFuture
+            The future whose wait returns target once the copy completes.
+        """
+        if isinstance(target, TVMContext):
+            target = empty(self.shape, self.dtype, target)
+        if not isinstance(target, NDArrayBase):
+            raise ValueError("Unsupported target type %s" % str(type(target)))
+        check_call(_LIB.TVMArrayCopyFromTo(
+            self.handle, target.handle, stream))
+        return StreamFuture(_copy_context(self.ctx, target.ctx), stream, target, self)
+
+    def copyfrom_async(self, source_array, stream):
+        """Enqueue a copy from a numpy array on stream.
+
+        The source array must not be modified until the copy completes,
+        the returned future keeps it alive.
+
+        Parameters
+        ----------
+        source_array : numpy.ndarray
+            The data source we should like to copy from.
+
+        stream : ctypes.c_void_p
+            The stream of the context of this array.
+
+        Returns
+        -------
+        future : StreamFuture
+            The future whose wait returns self once the copy completes.
+        """
+        if isinstance(source_array, NDArrayBase):
+            return source_array.copyto_async(self, stream)
+        shape, dtype = self._numpy_shape_dtype()
+        source_array = np.ascontiguousarray(source_array, dtype=dtype)
+        if source_array.shape != shape:
+            raise ValueError("array shape do not match the shape of NDArray {0} vs {1}".format(
+                source_array.shape, shape))
+        arr, cshape = numpyasarray(source_array)
+        check_call(_LIB.TVMArrayCopyFromTo(
+            ctypes.byref(arr), self.handle, stream))
+        return StreamFuture(self.ctx, stream, self, (arr, cshape, source_array))
+
+
+def _copy_context(ctx_from, ctx_to):
+    """The context whose device api performs a copy, as in TVMArrayCopyFromTo"""
+    return ctx_from if ctx_from.device_type != TVMContext.STR2MASK["cpu"] else ctx_to
+
+
+class StreamFuture(object):
+    """Future of an asynchronous operation enqueued on a stream.
+
+    Parameters
+    ----------
+    ctx : TVMContext
+        The context of the stream.
+
+    stream : ctypes.c_void_p
+        The stream the operation is enqueued on.
+
+    result : object
+        The value returned by wait.
+
+    keep_alive : object, optional
+        Object that must stay alive until the operation completes.
+    """
+    def __init__(self, ctx, stream, result, keep_alive=None):
+        self.ctx = ctx
+        self.stream = stream
+        self.result = result
+        self._keep_alive = keep_alive
+        self._done = False
+
+    def wait(self):
+        """Block until the stream finishes and return the result.
+
+        Returns
+        -------
+        result : object
+            The result of the operation.
+        """
+        if not self._done:
+            self.ctx.sync(self.stream)
+            self._done = True
+            self._keep_alive = None
+        return self.result
+
 def free_extension_handle(handle, type_code):
     """Free c++ extension type handle
 
@@ -154,9 +154,62 @@ class TVMContext(ctypes.Structure):
         return _api_internal._GetDeviceAttr(
             self.device_type, self.device_id, 3)
 
-    def sync(self):
-        """Synchronize until jobs finished at the context."""
-        check_call(_LIB.TVMSynchronize(self.device_type, self.device_id, None))
+    def sync(self, stream=None):
+        """Synchronize until jobs finished at the context.
+
+        Parameters
+        ----------
+        stream : ctypes.c_void_p, optional
+            The stream to be synchronized, default stream if not given.
+        """
+        check_call(_LIB.TVMSynchronize(self.device_type, self.device_id, stream))
+
+    def create_stream(self):
+        """Create a new runtime stream at the context.
+
+        Returns
+        -------
+        stream : ctypes.c_void_p
+            The created stream handle.
+        """
+        stream = ctypes.c_void_p()
+        check_call(_LIB.TVMStreamCreate(
+            self.device_type, self.device_id, ctypes.byref(stream)))
+        return stream
+
+    def free_stream(self, stream):
+        """Free a stream created by create_stream.
+
+        Parameters
+        ----------
+        stream : ctypes.c_void_p
+            The stream to be freed.
+        """
+        check_call(_LIB.TVMStreamFree(self.device_type, self.device_id, stream))
+
+    def set_stream(self, stream):
+        """Set the stream used by subsequent launches of the current thread.
+
+        Parameters
+        ----------
+        stream : ctypes.c_void_p
+            The stream to be used, None for the default stream.
+        """
+        check_call(_LIB.TVMSetStream(self.device_type, self.device_id, stream))
+
+    def sync_stream(self, src, dst):
+        """Make dst wait for the work currently queued in src.
+
+        Parameters
+        ----------
+        src : ctypes.c_void_p
+            The source stream.
+
+        dst : ctypes.c_void_p
+            The destination stream.
+        """
+        check_call(_LIB.TVMStreamStreamSynchronize(
+            self.device_type, self.device_id, src, dst))
 
     def __eq__(self, other):
         return (isinstance(other, TVMContext) and
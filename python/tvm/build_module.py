@@ -4,8 +4,17 @@ This module provides the functions to transform schedule to
 LoweredFunc and compiled Module.
 """
 from __future__ import absolute_import as _abs
+import sys
 import warnings
 import types
+import time
+import shutil
+import multiprocessing
+from collections import namedtuple
+try:
+    import resource
+except ImportError:
+    resource = None
 
 from ._ffi.node import NodeBase, register_node
 from . import api
@@ -21,6 +30,8 @@ from . import codegen
 from . import ndarray
 from . import target as _target
 from . import make
+from ._ffi.base import __version__
+from .contrib import build_cache as _build_cache, cc as _cc, util as _util
 
 class DumpIR(object):
     """
@@ -98,6 +109,147 @@ class DumpIR(object):
         schedule.ScheduleOps = self._old_sgpass
         DumpIR.scope_level -= 1
 
+PassProfileEntry = namedtuple(
+    "PassProfileEntry", ["name", "time", "nodes_before", "nodes_after", "peak_mem_delta_kb"])
+
+
+class PassProfile(object):
+    """Report of the passes recorded under build_config(profile_pass=True).
+
+    Parameters
+    ----------
+    entries : list of PassProfileEntry
+        The pass invocations in the order they run.
+        time is the wall time in seconds, nodes_before and nodes_after are the
+        number of IR nodes of the input and output, peak_mem_delta_kb is how
+        much the pass raised the peak resident memory of the process, or -1 if
+        unknown. It is 0 when the pass stays below the peak of earlier work.
+    """
+    def __init__(self, entries):
+        self.entries = entries
+
+    def aggregate(self):
+        """Aggregate the entries by pass name.
+
+        Returns
+        -------
+        result : list of tuple (name, count, total_time, max_nodes_after)
+            The aggregated passes, sorted by decreasing total time.
+        """
+        stats = {}
+        for e in self.entries:
+            count, total, nodes = stats.get(e.name, (0, 0.0, 0))
+            stats[e.name] = (count + 1, total + e.time, max(nodes, e.nodes_after))
+        result = [(k,) + v for k, v in stats.items()]
+        result.sort(key=lambda x: -x[2])
+        return result
+
+    def __str__(self):
+        lines = ["%-32s %8s %12s %12s %17s" % (
+            "pass", "time(ms)", "nodes_before", "nodes_after", "peak_mem_delta_kb")]
+        for e in self.entries:
+            lines.append("%-32s %8.3f %12d %12d %17d" % (
+                e.name, e.time * 1000, e.nodes_before, e.nodes_after, e.peak_mem_delta_kb))
+        return "\n".join(lines)
+
+
+class PassProfiler(object):
+    """
+    Record wall time, IR size and peak memory growth of each pass.
+
+    How to use:
+    -----------
+    .. code-block:: python
+
+        with tvm.build_config(profile_pass=True) as cfg:
+            tvm.lower(s, args)
+        print(cfg.pass_profile)
+    """
+    scope_level = 0
+    _post_order_visit = staticmethod(ir_pass.PostOrderVisit)
+
+    def __init__(self):
+        self.entries = []
+        self._old_vars = {}
+
+    @staticmethod
+    def _count_nodes(node):
+        """count number of IR nodes in the body of node"""
+        if isinstance(node, container.LoweredFunc):
+            node = node.body
+        if isinstance(node, container.Array):
+            return sum(PassProfiler._count_nodes(x) for x in node)
+        if not isinstance(node, _stmt.Stmt):
+            return 0
+        counter = [0]
+        def _visit(_):
+            counter[0] += 1
+        PassProfiler._post_order_visit(node, _visit)
+        return counter[0]
+
+    @staticmethod
+    def _peak_mem_kb():
+        """peak resident memory of the process in KB, -1 if unknown"""
+        if resource is None:
+            return -1
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in KB elsewhere
+        return peak // 1024 if sys.platform == "darwin" else peak
+
+    def decorate(self, func, name=None):
+        """decorate the pass function"""
+        fname = name if name else getattr(func, "func_name", None) or func.__name__
+        ir_types = (_stmt.Stmt, container.LoweredFunc, container.Array)
+        def profile(*args, **kwargs):
+            """profile function"""
+            nodes_before = 0
+            if args and isinstance(args[0], ir_types):
+                nodes_before = self._count_nodes(args[0])
+            peak_before = self._peak_mem_kb()
+            tstart = time.time()
+            retv = func(*args, **kwargs)
+            cost = time.time() - tstart
+            if not isinstance(retv, ir_types):
+                return retv
+            # the peak is over the process lifetime, only its growth belongs to the pass
+            peak_delta = -1 if peak_before < 0 else self._peak_mem_kb() - peak_before
+            self.entries.append(PassProfileEntry(
+                fname, cost, nodes_before, self._count_nodes(retv), peak_delta))
+            return retv
+        return profile
+
+    def decorate_custompass(self, custom_pass):
+        """decorate given list of custom passes, and return decorated passes"""
+        custom_pass = custom_pass if custom_pass else []
+        return [(x[0], self.decorate(x[1], "custom{}_phase{}".format(idx, x[0])))
+                for idx, x in enumerate(custom_pass)]
+
+    def enter(self):
+        """only decorate outermost nest"""
+        PassProfiler.scope_level += 1
+        if PassProfiler.scope_level > 1:
+            return
+        self.entries = []
+        self._old_vars = {"ScheduleOps": schedule.ScheduleOps}
+        schedule.ScheduleOps = self.decorate(schedule.ScheduleOps)
+        vset = vars(ir_pass)
+        for k, v in list(vset.items()):
+            if isinstance(v, types.FunctionType) and v is not PassProfiler._post_order_visit:
+                self._old_vars[k] = v
+                vset[k] = self.decorate(v)
+
+    def exit(self):
+        """recover outermost nest and return the report"""
+        PassProfiler.scope_level -= 1
+        report = PassProfile(list(self.entries))
+        if PassProfiler.scope_level > 0:
+            return report
+        schedule.ScheduleOps = self._old_vars.pop("ScheduleOps")
+        vars(ir_pass).update(self._old_vars)
+        self._old_vars = {}
+        return report
+
+
 @register_node
 class BuildConfig(NodeBase):
     """Configuration scope to set a build config option.
@@ -124,9 +276,14 @@ class BuildConfig(NodeBase):
         "data_alignment": -1,
         "restricted_func": True,
         "double_buffer_split_loop": 1,
-        "dump_pass_ir": False
+        "dump_pass_ir": False,
+        "build_cache_dir": "",
+        "build_cache_max_mb": 1024,
+        "build_jobs": 1,
+        "profile_pass": False
     }
     _dump_ir = DumpIR()
+    _pass_profiler = PassProfiler()
 
     # pylint: disable=no-member
     def __init__(self, handle):
@@ -155,9 +312,13 @@ class BuildConfig(NodeBase):
         _api_internal._EnterBuildConfigScope(self)
         if self.dump_pass_ir:
             BuildConfig._dump_ir.enter()
+        if self.profile_pass:
+            BuildConfig._pass_profiler.enter()
         return self
 
     def __exit__(self, ptype, value, trace):
+        if self.profile_pass:
+            self.pass_profile = BuildConfig._pass_profiler.exit()
         if self.dump_pass_ir:
             BuildConfig._dump_ir.exit()
         _api_internal._ExitBuildConfigScope()
@@ -220,6 +381,35 @@ def build_config(**kwargs):
 
     dump_pass_ir: dump ir of each pass into file idx_passname_ir.cc, default=False
 
+    build_cache_dir: str, default=""
+        Directory of the persistent compile cache used by build.
+        The native llvm builds whose schedule, arguments, config and
+        target are identical are loaded from the cache, which skips the
+        lowering and the code generation. The entries are object files
+        linked by the host compiler, and the loaded modules can be exported.
+        The builds with custom lower passes, device or cross targets
+        are not cached. The host code of a cached build is generated serially.
+        If it is empty, the compile cache is disabled.
+
+    build_cache_max_mb: int, default=1024
+        Maximum total size of the compile cache in MB.
+        The least recently used entries are evicted beyond it.
+
+    build_jobs: int, default=1
+        Number of worker processes used to generate host code when
+        building multiple functions with a native llvm host target.
+        The functions are sharded across the workers, one object file
+        is generated per shard and the objects are linked into a
+        shared library, so the result is a loaded dso module.
+        It can still be exported with export_library, which links
+        the objects of the shards.
+
+    profile_pass: bool, default=False
+        Record wall time, IR node count before and after, and peak memory growth
+        of each pass, including the ones in add_lower_pass.
+        The report is available as the pass_profile attribute of the
+        config after the scope exits, see :any:`PassProfile`.
+
     Returns
     -------
     config: BuildConfig
@@ -320,6 +510,8 @@ def lower(sch,
     add_lower_pass = cfg.add_lower_pass if cfg.add_lower_pass else []
     if cfg.dump_pass_ir:
         add_lower_pass = BuildConfig._dump_ir.decorate_custompass(add_lower_pass)
+    if cfg.profile_pass:
+        add_lower_pass = BuildConfig._pass_profiler.decorate_custompass(add_lower_pass)
     lower_phase0 = [x[1] for x in add_lower_pass if x[0] == 0]
     lower_phase1 = [x[1] for x in add_lower_pass if x[0] == 1]
     lower_phase2 = [x[1] for x in add_lower_pass if x[0] == 2]
@@ -363,6 +555,136 @@ def lower(sch,
         return stmt
     return ir_pass.MakeAPI(stmt, name, arg_list, 0, cfg.restricted_func)
 
+def _build_cache_key(inputs, name, target, target_host):
+    """Internal function to compute the compile cache key of build inputs.
+
+    The key is computed before lowering from a serialization of the
+    schedule, the arguments and the binds that does not depend on the
+    addresses of the nodes, so that it is stable across processes.
+    """
+    cfg = current_build_config()
+    parts = [__version__, name, str(target), str(target_host)]
+    if module.enabled("llvm"):
+        # the code generated without -mcpu depends on the host
+        parts += [codegen.llvm_version(), codegen.llvm_host_cpu()]
+    parts += ["%s=%s" % (k, getattr(cfg, k)) for k in sorted(BuildConfig._node_defaults)
+              if not k.startswith("build_") and k not in ("dump_pass_ir", "profile_pass")]
+    parts += _build_cache.node_parts(api.convert(inputs))
+    return _build_cache.hash_key(*parts)
+
+
+def _load_host_object(temp, path_obj):
+    """Internal function to link a host object file and load it as a module.
+
+    The object is kept with the module so that export_library can link it again.
+    """
+    path_lib = temp.relpath("lib.so")
+    _cc.create_shared(path_lib, [path_obj])
+    mhost = module.load(path_lib)
+    mhost.host_objects = [path_obj]
+    # the object is removed with the temp directory
+    mhost.host_objects_dir = temp
+    return mhost
+
+
+def _build_cached(sch, args, target, target_host, name, binds):
+    """Internal function to build with the compile cache of the current config.
+
+    Returns None when the build cannot be cached, e.g. for device or cross targets.
+    """
+    cfg = current_build_config()
+    # the custom passes are python functions that cannot be part of the key
+    if cfg.add_lower_pass or cfg.dump_pass_ir or cfg.profile_pass:
+        return None
+    target = _target.current_target() if target is None else target
+    target = _target.create(target) if target else _target.create("llvm")
+    host = _target.create(target_host) if target_host else target
+    # the entries are native objects linked by the host compiler
+    if (target.target_name != "llvm" or host.target_name != "llvm" or
+            any(opt == "-system-lib" or opt.startswith("-target") for opt in host.options)):
+        return None
+    if isinstance(sch, schedule.Schedule):
+        if args is None:
+            raise ValueError("args must be given for build from schedule")
+        inputs = [sch, list(args), binds or {}]
+    else:
+        inputs = [sch]
+    try:
+        key = _build_cache_key(inputs, name, target, target_host)
+    except ValueError:
+        return None
+    cache = _build_cache.get_cache(cfg.build_cache_dir, cfg.build_cache_max_mb)
+
+    def _load(path):
+        temp = _util.tempdir()
+        path_obj = temp.relpath("lib.o")
+        shutil.copyfile(path, path_obj)
+        return _load_host_object(temp, path_obj)
+
+    mod = cache.lookup(key, _load)
+    if mod is not None:
+        return mod
+    # build the host code serially so that the result is an llvm module
+    with build_config(**{k: getattr(cfg, k) for k in BuildConfig._node_defaults
+                         if k not in ("build_cache_dir", "build_jobs")}):
+        mod = build(sch, args, target, target_host, name, binds)
+    temp = _util.tempdir()
+    path_obj = temp.relpath("lib.o")
+    mod.save(path_obj)
+    cache.save(key, path_obj)
+    # load the object like on a hit, so that both return the same kind of module
+    return _load_host_object(temp, path_obj)
+
+
+def _lower_host(fhost, device_type, target_host):
+    """Internal function to lower host functions before codegen."""
+    fhost = [ir_pass.BindDeviceType(x, device_type) for x in fhost]
+    fhost = [ir_pass.LowerTVMBuiltin(x) for x in fhost]
+    fhost = [ir_pass.LowerIntrin(x, target_host.target_name) for x in fhost]
+    fhost = [ir_pass.CombineContextCall(x) for x in fhost]
+    return fhost
+
+
+def _build_host_shard(shard):
+    """Internal function to build one shard of host functions in a worker."""
+    fjson, device_type, target_host, path_obj = shard
+    target_host = _target.create(target_host)
+    fhost = _lower_host(api.load_json(fjson), device_type, target_host)
+    codegen.build_module(fhost, str(target_host)).save(path_obj)
+    return path_obj
+
+
+def _build_host_parallel(fhost, device_type, target_host, num_jobs):
+    """Internal function to build host functions in a process pool.
+
+    The functions are split into contiguous shards, each shard is
+    compiled into an object file by a worker and the objects are
+    linked into one shared library. The objects are kept with the
+    loaded module so that export_library can link them again.
+    """
+    temp = _util.tempdir()
+    num_shards = min(num_jobs, len(fhost))
+    step = (len(fhost) + num_shards - 1) // num_shards
+    shards = []
+    for i in range(0, len(fhost), step):
+        fjson = api.save_json(api.convert(list(fhost[i:i + step])))
+        path_obj = temp.relpath("lib%d.o" % len(shards))
+        shards.append((fjson, device_type, str(target_host), path_obj))
+    pool = multiprocessing.Pool(len(shards))
+    try:
+        # keep the order of objects so the first function stays the entry
+        objects = pool.map(_build_host_shard, shards)
+    finally:
+        pool.terminate()
+    path_lib = temp.relpath("lib.so")
+    _cc.create_shared(path_lib, objects)
+    mhost = module.load(path_lib)
+    mhost.host_objects = objects
+    # the objects are removed with the temp directory
+    mhost.host_objects_dir = temp
+    return mhost
+
+
 def build(sch,
           args=None,
           target=None,
@@ -406,7 +728,13 @@ def build(sch,
     Note
     ----
     See the note on :any:`tvm.target` on target string format.
+    See build_cache_dir in :any:`build_config` for the compile cache.
     """
+    if current_build_config().build_cache_dir:
+        mod = _build_cached(sch, args, target, target_host, name, binds)
+        if mod is not None:
+            return mod
+
     if isinstance(sch, schedule.Schedule):
         if args is None:
             raise ValueError("args must be given for build from schedule")
@@ -467,9 +795,6 @@ def build(sch,
         warnings.warn(
             "Specified target %s, but cannot find device code, did you do bind?" % target)
 
-    fhost = [ir_pass.BindDeviceType(x, device_type) for x in fhost]
-    fhost = [ir_pass.LowerTVMBuiltin(x) for x in fhost]
-
     if not target_host:
         if device_type == ndarray.cpu(0).device_type:
             target_host = target
@@ -479,9 +804,15 @@ def build(sch,
     target_host = _target.create(target_host)
     target_device = target
     fdevice = [ir_pass.LowerIntrin(x, target_device.target_name) for x in fdevice]
-    fhost = [ir_pass.LowerIntrin(x, target_host.target_name) for x in fhost]
-    fhost = [ir_pass.CombineContextCall(x) for x in fhost]
-    mhost = codegen.build_module(fhost, str(target_host))
+    build_jobs = current_build_config().build_jobs
+    # the objects are linked by the host compiler, so only native code is built in parallel
+    if (build_jobs > 1 and len(fhost) > 1 and target_host.target_name == "llvm"
+            and "-system-lib" not in target_host.options
+            and not any(opt.startswith("-target") for opt in target_host.options)):
+        mhost = _build_host_parallel(fhost, device_type, target_host, build_jobs)
+    else:
+        fhost = _lower_host(fhost, device_type, target_host)
+        mhost = codegen.build_module(fhost, str(target_host))
 
     if fdevice:
         mdev = codegen.build_module(fdevice, str(target_device))
@@ -0,0 +1,286 @@
+"""Persistent content-addressed compile cache for tvm.build.
+
+The cache stores each compiled host module as an object file named after
+the hash of its build inputs, so that a hit only links the object instead
+of running the lowering passes and the code generation again. Entries
+are evicted in least recently used order once the total size exceeds
+the configured limit. All accesses are guarded by a file lock so that
+several processes can share one directory.
+"""
+from __future__ import absolute_import as _abs
+import os
+import shutil
+import hashlib
+
+from . import util as _util
+from .. import _api_internal
+from .. import container as _container
+from .._ffi.node import NodeBase
+
+_CACHE_SUFFIX = ".o"
+_LOCK_NAME = ".lock"
+
+
+def hash_key(*parts):
+    """Compute the cache key of a list of string parts.
+
+    Parameters
+    ----------
+    parts : list of str
+        The serialized build inputs.
+
+    Returns
+    -------
+    key : str
+        The hex digest used as entry name.
+    """
+    sha = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = str(part).encode("utf-8")
+        # length prefix so that the concatenation is unambiguous
+        sha.update(str(len(part)).encode("utf-8") + b":")
+        sha.update(part)
+    return sha.hexdigest()
+
+
+def _encode(value):
+    return "%s:%r" % (type(value).__name__, value)
+
+
+def _node_fields(node):
+    """The type key and the (label, value) fields of a node, maps are unordered."""
+    if isinstance(node, _container.Array):
+        return "Array", [("", x) for x in node]
+    if isinstance(node, _container.Map):
+        return "Map", node.items()
+    # the attributes of the node, not the python methods of the same name
+    return (NodeBase.__getattr__(node, "type_key"),
+            [(name, NodeBase.__getattr__(node, name)) for name in sorted(dir(node))])
+
+
+def node_parts(root):
+    """Serialize a node graph into string parts that do not depend on addresses.
+
+    The maps are iterated in the order of the addresses of their keys,
+    so their entries are ordered by a content hash instead. A node that
+    is reached again is referred to by its visit index, so that e.g. two
+    distinct variables of the same name are told apart.
+
+    Parameters
+    ----------
+    root : NodeBase
+        The root of the graph, e.g. a schedule and its arguments.
+
+    Returns
+    -------
+    parts : list of str
+        The serialized graph, to be given to hash_key.
+    """
+    fields = {}
+    digest = {}
+
+    def _digest(value):
+        if isinstance(value, NodeBase):
+            return digest[_api_internal._raw_ptr(value)]
+        return _encode(value)
+
+    # content hash of each node in post order
+    pending = set()
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        ident = _api_internal._raw_ptr(node)
+        if ident in digest:
+            continue
+        if ident not in fields:
+            # the node is kept alive so that its address is not reused
+            fields[ident] = (node,) + _node_fields(node)
+        _, type_key, items = fields[ident]
+        if type_key == "Map":
+            values = [x for kv in items for x in kv]
+        else:
+            values = [v for _, v in items]
+        if not expanded:
+            if ident in pending:
+                raise ValueError("Cannot serialize a cyclic node graph")
+            pending.add(ident)
+            stack.append((node, True))
+            stack += [(v, False) for v in values
+                      if isinstance(v, NodeBase) and _api_internal._raw_ptr(v) not in digest]
+            continue
+        pending.discard(ident)
+        if type_key == "Map":
+            digest[ident] = hash_key(type_key, *sorted(
+                hash_key(_digest(k), _digest(v)) for k, v in items))
+        else:
+            digest[ident] = hash_key(type_key, *[
+                x for label, v in items for x in (label, _digest(v))])
+
+    # canonical pre order with back references to the visited nodes
+    parts = []
+    index = {}
+    stack = [root]
+    while stack:
+        item = stack.pop()
+        if not isinstance(item, NodeBase):
+            parts.append(item)
+            continue
+        ident = _api_internal._raw_ptr(item)
+        if ident in index:
+            parts.append("#%d" % index[ident])
+            continue
+        index[ident] = len(index)
+        _, type_key, items = fields[ident]
+        if type_key == "Map":
+            items = sorted(items, key=lambda kv: (_digest(kv[0]), _digest(kv[1])))
+            items = [("", x) for kv in items for x in kv]
+        parts.append("%s/%d" % (type_key, len(items)))
+        for label, value in reversed(items):
+            stack.append(value if isinstance(value, NodeBase) else _encode(value))
+            stack.append("=" + label)
+    return parts
+
+
+class BuildCache(object):
+    """On-disk cache of built modules.
+
+    Parameters
+    ----------
+    cache_dir : str
+        The directory holding the cache entries.
+
+    max_mb : int
+        Maximum total size of the entries in MB.
+        Zero or negative value means unbounded.
+    """
+    def __init__(self, cache_dir, max_mb=1024):
+        self.cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+        self.max_bytes = max_mb * 1024 * 1024
+        if not os.path.isdir(self.cache_dir):
+            try:
+                os.makedirs(self.cache_dir)
+            except OSError:
+                if not os.path.isdir(self.cache_dir):
+                    raise
+
+    def _lock(self):
+        return _util.filelock(os.path.join(self.cache_dir, _LOCK_NAME))
+
+    def path(self, key):
+        """Get the path of the entry of key.
+
+        Parameters
+        ----------
+        key : str
+            The cache key.
+
+        Returns
+        -------
+        path : str
+            The path to the object file of the entry.
+        """
+        return os.path.join(self.cache_dir, key + _CACHE_SUFFIX)
+
+    def lookup(self, key, fload):
+        """Load the entry of key.
+
+        Parameters
+        ----------
+        key : str
+            The cache key.
+
+        fload : function(path) -> Module
+            Function used to load the entry.
+
+        Returns
+        -------
+        mod : Module or None
+            The loaded module, None when the entry does not exist.
+        """
+        path = self.path(key)
+        lock = self._lock()
+        try:
+            if not os.path.exists(path):
+                return None
+            # refresh the access time that drives the LRU order
+            os.utime(path, None)
+            return fload(path)
+        finally:
+            lock.release()
+
+    def save(self, key, path_obj):
+        """Save an object file as the entry of key and evict stale entries.
+
+        Parameters
+        ----------
+        key : str
+            The cache key.
+
+        path_obj : str
+            The object file of the host module.
+        """
+        path = self.path(key)
+        tmp_path = "%s.%d.tmp%s" % (path[:-len(_CACHE_SUFFIX)], os.getpid(), _CACHE_SUFFIX)
+        # copy outside the lock
+        shutil.copyfile(path_obj, tmp_path)
+        lock = self._lock()
+        try:
+            os.rename(tmp_path, path)
+            self._evict()
+        finally:
+            lock.release()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def entries(self):
+        """List the cache entries from least to most recently used.
+
+        Returns
+        -------
+        entries : list of tuple (key, size)
+            The entries in the cache.
+        """
+        items = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(_CACHE_SUFFIX) or ".tmp" in name:
+                continue
+            stat = os.stat(os.path.join(self.cache_dir, name))
+            items.append((stat.st_mtime, name[:-len(_CACHE_SUFFIX)], stat.st_size))
+        items.sort()
+        return [(key, size) for _, key, size in items]
+
+    def _evict(self):
+        if self.max_bytes <= 0:
+            return
+        items = self.entries()
+        total = sum(size for _, size in items)
+        for key, size in items:
+            if total <= self.max_bytes:
+                break
+            os.remove(self.path(key))
+            total -= size
+
+
+_CACHES = {}
+
+def get_cache(cache_dir, max_mb=1024):
+    """Get the cache object of a directory.
+
+    Parameters
+    ----------
+    cache_dir : str
+        The directory holding the cache entries.
+
+    max_mb : int
+        Maximum total size of the entries in MB.
+
+    Returns
+    -------
+    cache : BuildCache
+        The cache object.
+    """
+    key = (cache_dir, max_mb)
+    if key not in _CACHES:
+        _CACHES[key] = BuildCache(cache_dir, max_mb)
+    return _CACHES[key]
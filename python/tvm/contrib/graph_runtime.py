@@ -1,11 +1,17 @@
 """Minimum graph runtime that executes graph containing TVM PackedFunc."""
+import json
+from collections import namedtuple
 from .._ffi.base import string_types
 from .._ffi.function import get_global_func
 from .rpc import base as rpc_base
 from .. import ndarray as nd
 
+NodeProfileResult = namedtuple(
+    "NodeProfileResult",
+    ["name", "func_name", "shapes", "mean", "median", "std", "bytes"])
 
-def create(graph_json_str, libmod, ctx):
+
+def create(graph_json_str, libmod, ctx, plan_memory=False, inter_op_threads=0):
     """Create a runtime executor module given a graph and module.
 
     Parameters
@@ -21,10 +27,29 @@ def create(graph_json_str, libmod, ctx):
     ctx : TVMContext
         The context to deploy the module, can be local or remote.
 
+    plan_memory : bool, optional
+        Whether to ignore the storage plan in the graph and pack all the
+        entries into one arena, assigning offsets by the lifetime of each
+        entry in node order. Only supported on contexts with addressable
+        memory (cpu, gpu and rocm). See :any:`GraphModule.get_storage_bytes`.
+
+    inter_op_threads : int, optional
+        Number of threads of the pool running independent nodes concurrently.
+        The nodes are grouped into levels of independent nodes, each level
+        is statically distributed over the threads and run on a single
+        thread each, while a level of a single node can use all the threads.
+        0 runs the nodes sequentially, negative uses all the threads of the
+        pool. Only supported on cpu, implies plan_memory.
+
     Returns
     -------
     graph_module : GraphModule
         Runtime graph module that can be used to execute the graph.
+
+    Note
+    ----
+    To serve the graph from multiple threads, load the parameters once
+    and call :any:`GraphModule.create_instance` for each thread.
     """
     if not isinstance(graph_json_str, string_types):
         try:
@@ -39,9 +64,41 @@ def create(graph_json_str, libmod, ctx):
         hmod = rpc_base._ModuleHandle(libmod)
         fcreate = ctx._rpc_sess.get_function("tvm.graph_runtime.remote_create")
         device_type = device_type % rpc_base.RPC_SESS_MASK
-        return GraphModule(fcreate(graph_json_str, hmod, device_type, device_id), ctx)
+        return GraphModule(fcreate(graph_json_str, hmod, device_type, device_id,
+                                   plan_memory, inter_op_threads), ctx)
     fcreate = get_global_func("tvm.graph_runtime.create")
-    return GraphModule(fcreate(graph_json_str, libmod, device_type, device_id), ctx)
+    return GraphModule(fcreate(graph_json_str, libmod, device_type, device_id,
+                               plan_memory, inter_op_threads), ctx)
+
+
+def create_pipelined(graph_json_str, libmod, ctx):
+    """Create a runtime executor module that pipelines consecutive requests.
+
+    Parameters
+    ----------
+    graph_json_str : str or graph class
+        The graph to be deployed in json format output by nnvm graph.
+
+    libmod : tvm.Module
+        The module of the corresponding function
+
+    ctx : TVMContext
+        The local context to deploy the module.
+
+    Returns
+    -------
+    graph_module : PipelinedGraphModule
+        Runtime graph module that can be used to execute the graph.
+    """
+    if not isinstance(graph_json_str, string_types):
+        try:
+            graph_json_str = graph_json_str._tvm_graph_json()
+        except AttributeError:
+            raise ValueError("Type %s is not supported" % type(graph_json_str))
+    if ctx.device_type >= rpc_base.RPC_SESS_MASK:
+        raise ValueError("Pipelined graph runtime only supports local context")
+    gmod = create(graph_json_str, libmod, ctx)
+    return PipelinedGraphModule(gmod.module, ctx, graph_json_str)
 
 
 class GraphModule(object):
@@ -112,6 +169,35 @@ class GraphModule(object):
             self.set_input(**input_dict)
         self._run()
 
+    def run_profile(self, number=10, **input_dict):
+        """Run the graph number times and time each operator node.
+
+        On non-CPU context, the device is synchronized after each operator.
+
+        Parameters
+        ----------
+        number : int, optional
+            The number of runs the statistics are aggregated over.
+
+        input_dict: dict of str to NDArray
+            List of input values to be feed to
+
+        Returns
+        -------
+        results : list of NodeProfileResult
+            The result of each operator node in execution order.
+            The times are in seconds, bytes is the total size of the
+            inputs and outputs of the node.
+        """
+        if input_dict:
+            self.set_input(**input_dict)
+        results = json.loads(self.module["run_profile"](number))
+        return [NodeProfileResult(
+            name=r["name"], func_name=r["func_name"],
+            shapes=[tuple(x) for x in r["shapes"]],
+            mean=r["mean"], median=r["median"], std=r["std"],
+            bytes=r["bytes"]) for r in results]
+
     def get_input(self, index, out):
         """Get index-th input to out
 
@@ -167,6 +253,49 @@ class GraphModule(object):
         """
         self._load_params(bytearray(params_bytes))
 
+    def load_params_from_file(self, path):
+        """Load parameters from a file of serialized parameter dict.
+
+        The file is memory mapped instead of being read into Python.
+        On CPU context, parameters whose data is 64 bytes aligned in the
+        file are used in place from the mapped pages without any copy.
+
+        Parameters
+        ----------
+        path : str
+            The path to the parameter file, on the remote side
+            if the module is a remote module.
+        """
+        self.module["load_params_from_file"](path)
+
+    def get_storage_bytes(self):
+        """Get the number of bytes allocated for the storage of the graph.
+
+        Returns
+        -------
+        nbytes : int
+            Total size of the storage pool, excluding the memory that
+            is shared with other instances or mapped from files.
+        """
+        return self.module["get_storage_bytes"]()
+
+    def create_instance(self):
+        """Create an execution instance that shares parameters with this module.
+
+        The instance shares the compiled functions and the parameters
+        loaded by load_params, and has its own storage for inputs and
+        intermediate results. Instances can run concurrently, one per thread,
+        and the parameters cannot be reloaded through an instance. Parameters
+        loaded later into this module are seen by the instances, loading must
+        not run concurrently with them.
+
+        Returns
+        -------
+        graph_module : GraphModule
+            The created instance.
+        """
+        return GraphModule(self.module["create_instance"](), self.ctx)
+
     def __getitem__(self, key):
         """Get internal module function
 
@@ -176,3 +305,117 @@ class GraphModule(object):
             The key to the module.
         """
         return self.module[key]
+
+
+def _output_info(graph_json_str):
+    """Get list of (shape, dtype) of the graph outputs."""
+    graph = json.loads(graph_json_str)
+    row_ptr = graph["node_row_ptr"]
+    shapes = graph["attrs"]["shape"][1]
+    dltypes = graph["attrs"]["dltype"][1]
+    eids = [row_ptr[head[0]] + head[1] for head in graph["heads"]]
+    return [(tuple(shapes[eid]), dltypes[eid]) for eid in eids]
+
+
+class PipelinedGraphModule(GraphModule):
+    """Graph module that overlaps transfers and compute of consecutive requests.
+
+    Inputs and outputs are double buffered on the device. The upload of
+    request N+1 and the download of request N-1 run on their own streams
+    while request N is computed, so the transfers are hidden behind compute.
+    On CPU context the requests are simply run one after another.
+
+    Parameters
+    ----------
+    module : Module
+        The interal tvm module that holds the actual graph functions.
+
+    ctx : TVMContext
+        The context this module is under
+
+    graph_json_str : str
+        The graph in json format, used to get the output shapes.
+    """
+    def __init__(self, module, ctx, graph_json_str):
+        super(PipelinedGraphModule, self).__init__(module, ctx)
+        self._outputs = _output_info(graph_json_str)
+        self._streams = None
+        if ctx.device_type != nd.cpu(0).device_type:
+            self._streams = [ctx.create_stream() for _ in range(3)]
+
+    def __del__(self):
+        if self._streams:
+            for stream in self._streams:
+                self.ctx.free_stream(stream)
+            self._streams = None
+
+    def _fetch_outputs(self, futures):
+        return [f.wait().asnumpy(copy=False) for f in futures]
+
+    def run_pipelined(self, requests):
+        """Run a sequence of requests with overlapped transfers.
+
+        Parameters
+        ----------
+        requests : iterable of dict of str to numpy.ndarray
+            The inputs of each request.
+
+        Returns
+        -------
+        outputs : iterator of list of numpy.ndarray
+            The outputs of each request, in the order of requests.
+        """
+        if self._streams is None:
+            for inputs in requests:
+                self.run(**inputs)
+                yield [self.get_output(i, nd.empty(shape, dtype)).asnumpy(copy=False)
+                       for i, (shape, dtype) in enumerate(self._outputs)]
+            return
+
+        ctx = self.ctx
+        upload, compute, download = self._streams
+        in_stage = [{}, {}]
+        out_stage = [[nd.empty(shape, dtype, ctx) for shape, dtype in self._outputs]
+                     for _ in range(2)]
+
+        def _upload(slot, inputs):
+            # the futures keep the source arrays alive until the copies complete
+            futures = []
+            for key, value in inputs.items():
+                buf = in_stage[slot].get(key)
+                if buf is None or buf.shape != value.shape or buf.dtype != str(value.dtype):
+                    buf = nd.empty(value.shape, str(value.dtype), ctx)
+                    in_stage[slot][key] = buf
+                futures.append(buf.copyfrom_async(value, upload))
+            return futures
+
+        requests = iter(requests)
+        inputs = next(requests, None)
+        uploads = _upload(0, inputs) if inputs is not None else None
+        pending = None
+        slot = 0
+        while inputs is not None:
+            # move the uploaded inputs into the graph
+            ctx.sync_stream(upload, compute)
+            for key in inputs:
+                self._set_input(key, in_stage[slot][key], compute)
+            # the staging slot can be reused once the copies above finish
+            ctx.sync_stream(compute, upload)
+            inputs = next(requests, None)
+            next_uploads = _upload(1 - slot, inputs) if inputs is not None else None
+            self._run(compute)
+            # the output slot must be downloaded before it is overwritten
+            ctx.sync_stream(download, compute)
+            for i, out in enumerate(out_stage[slot]):
+                self._get_output(i, out, compute)
+            ctx.sync_stream(compute, download)
+            futures = [out.copyto_async(nd.cpu(0), download) for out in out_stage[slot]]
+            if pending is not None:
+                yield self._fetch_outputs(pending[0])
+            # the download of a request waits for its uploads through the streams,
+            # so the upload futures are released once the download is fetched
+            pending = (futures, uploads)
+            uploads = next_uploads
+            slot = 1 - slot
+        if pending is not None:
+            yield self._fetch_outputs(pending[0])
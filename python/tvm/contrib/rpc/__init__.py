@@ -10,4 +10,5 @@ upload and run remote RPC server, get the result back to verify correctness.
 """
 
 from .server import Server
-from .client import RPCSession, connect, connect_tracker
+from .client import RPCSession, BatchMeasureResult, connect, connect_tracker
+from .measure import MeasureResult, measure_pipelined
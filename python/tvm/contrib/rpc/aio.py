@@ -0,0 +1,334 @@
+"""Asyncio client of the RPC tracker and sessions.
+
+The requests to the tracker and the handshake with the servers are
+coroutines, so that a single thread can wait for hundreds of devices.
+The calls of a connected session are blocking and run in an executor,
+one call at a time per session.
+
+e.g.
+
+.. code-block:: python
+
+    tracker = aio.connect_tracker("localhost", 9190)
+
+    async def run(i):
+        remote = await tracker.request("rasp")
+        await remote.upload("lib%d.tar" % i)
+        return await remote.run(lambda sess: sess.load_module("lib%d.tar" % i))
+
+    async def main():
+        # gather binds to the running loop when called in a coroutine
+        return await asyncio.gather(*[run(i) for i in range(50)])
+
+    results = asyncio.new_event_loop().run_until_complete(main())
+
+This module requires python 3.5 or later.
+"""
+import asyncio
+import functools
+import json
+import os
+import struct
+import time
+
+from . import base
+from .client import RPCSession
+from ..._ffi.base import TVMError
+
+
+async def _send_json(writer, data):
+    data = json.dumps(data).encode("utf-8")
+    writer.write(struct.pack("@i", len(data)) + data)
+    await writer.drain()
+
+
+async def _recv_json(reader):
+    size = struct.unpack("@i", await reader.readexactly(4))[0]
+    return json.loads((await reader.readexactly(size)).decode("utf-8"))
+
+
+class AsyncRPCSession(object):
+    """Coroutine interface of a RPCSession.
+
+    Do not directly create the object, call connect or
+    AsyncTrackerSession.request.
+
+    Parameters
+    ----------
+    sess : RPCSession
+        The blocking session, can be used for calls that do not
+        communicate with the remote, e.g. context.
+
+    executor : concurrent.futures.Executor, optional
+        The executor running the calls, the default executor
+        of the event loop if None.
+    """
+    def __init__(self, sess, executor=None):
+        self.sess = sess
+        self._executor = executor
+        # a session serves one call at a time, keep the executor threads free
+        self._lock = asyncio.Lock()
+
+    async def _call(self, func, *args, **kwargs):
+        async with self._lock:
+            return await asyncio.get_event_loop().run_in_executor(
+                self._executor, functools.partial(func, *args, **kwargs))
+
+    async def upload(self, data, target=None, **kwargs):
+        """Upload file to remote runtime temp folder.
+
+        See Also
+        --------
+        RPCSession.upload
+        """
+        return await self._call(self.sess.upload, data, target, **kwargs)
+
+    async def download(self, path, **kwargs):
+        """Download file from remote temp folder.
+
+        See Also
+        --------
+        RPCSession.download
+        """
+        return await self._call(self.sess.download, path, **kwargs)
+
+    async def load_module(self, path):
+        """Load a remote module, the file need to be uploaded first.
+
+        See Also
+        --------
+        RPCSession.load_module
+        """
+        return await self._call(self.sess.load_module, path)
+
+    async def run(self, func):
+        """Run func on the blocking session.
+
+        Parameters
+        ----------
+        func : function of RPCSession -> value
+            The function, e.g. loads a module and measures it.
+
+        Returns
+        -------
+        value : object
+            The return value of func.
+        """
+        return await self._call(func, self.sess)
+
+
+async def connect(url, port, key="", session_timeout=0, executor=None):
+    """Connect to RPC Server.
+
+    Parameters
+    ----------
+    url : str
+        The url of the host
+
+    port : int
+        The port to connect to
+
+    key : str, optional
+        Additional key to match server
+
+    session_timeout : float, optional
+        The duration of the session, allows server to kill
+        the connection when duration is longer than this value.
+        When duration is zero, it means the request must always be kept alive.
+
+    executor : concurrent.futures.Executor, optional
+        The executor running the calls of the session.
+
+    Returns
+    -------
+    sess : AsyncRPCSession
+        The connected session.
+    """
+    if session_timeout:
+        key += " -timeout=%s" % str(session_timeout)
+    key = "client:" + key
+    reader, writer = await asyncio.open_connection(url, port)
+    try:
+        bkey = key.encode("utf-8")
+        writer.write(struct.pack("@ii", base.RPC_MAGIC, len(bkey)) + bkey)
+        await writer.drain()
+        code = struct.unpack("@i", await reader.readexactly(4))[0]
+        if code == base.RPC_CODE_MISMATCH:
+            raise RuntimeError("URL %s:%d cannot find server that matches key=%s" % (
+                url, port, key))
+        elif code == base.RPC_CODE_DUPLICATE:
+            raise RuntimeError("URL %s:%d server already have key=%s" % (url, port, key))
+        elif code != base.RPC_CODE_SUCCESS:
+            raise RuntimeError("URL %s:%d is not TVM RPC server" % (url, port))
+        keylen = struct.unpack("@i", await reader.readexactly(4))[0]
+        remote_key = (await reader.readexactly(keylen)).decode("utf-8")
+        # hand the connected socket over to the session
+        fd = os.dup(writer.get_extra_info("socket").fileno())
+    finally:
+        writer.close()
+    os.set_blocking(fd, True)
+    try:
+        sess = base._ConnectSocket(fd, key, remote_key)
+    except NameError:
+        os.close(fd)
+        raise RuntimeError("Please compile with USE_RPC=1")
+    return AsyncRPCSession(RPCSession(sess), executor)
+
+
+class AsyncTrackerSession(object):
+    """Asyncio tracker client.
+
+    Each request uses its own tracker connection, so that the replies
+    of concurrent requests cannot be mixed up. The tracker gives the
+    device to the next request when a pending request is cancelled.
+
+    Parameters
+    ----------
+    addr : tuple
+        The address tuple
+
+    executor : concurrent.futures.Executor, optional
+        The executor running the calls of the requested sessions.
+    """
+    def __init__(self, addr, executor=None):
+        self._addr = addr
+        self._executor = executor
+
+    async def _open(self):
+        reader, writer = await asyncio.open_connection(*self._addr)
+        writer.write(struct.pack("@i", base.RPC_TRACKER_MAGIC))
+        await writer.drain()
+        magic = struct.unpack("@i", await reader.readexactly(4))[0]
+        if magic != base.RPC_TRACKER_MAGIC:
+            writer.close()
+            raise RuntimeError("%s is not RPC Tracker" % str(self._addr))
+        return reader, writer
+
+    async def _query(self, data):
+        reader, writer = await self._open()
+        try:
+            await _send_json(writer, data)
+            value = await _recv_json(reader)
+        finally:
+            writer.close()
+        if value[0] != base.TrackerCode.SUCCESS:
+            raise RuntimeError("Invalid return value %s" % str(value))
+        return value[1]
+
+    async def summary(self):
+        """Get the summary dict of the tracker."""
+        return await self._query([base.TrackerCode.SUMMARY])
+
+    async def request(self, key, priority=1, session_timeout=0, max_retry=5, user=""):
+        """Request a new connection from the tracker.
+
+        Parameters
+        ----------
+        key : str
+            The type key of the device.
+
+        priority : int, optional
+            The priority of the request.
+
+        session_timeout : float, optional
+            The duration of the session, allows server to kill
+            the connection when duration is longer than this value.
+            When duration is zero, it means the request must always be kept alive.
+
+        max_retry : int, optional
+            Maximum number of times to retry before give up.
+
+        user : str, optional
+            The user of the request.
+
+        Returns
+        -------
+        sess : AsyncRPCSession
+            The connected session.
+        """
+        last_err = None
+        for _ in range(max_retry):
+            try:
+                url, port, matchkey = await self._query(
+                    [base.TrackerCode.REQUEST, key, user, priority])
+                return await connect(url, port, key + matchkey,
+                                     session_timeout, self._executor)
+            except (OSError, asyncio.IncompleteReadError, RuntimeError, TVMError) as err:
+                last_err = err
+        raise RuntimeError(
+            "Cannot request %s after %d retry, last_error:%s" % (
+                key, max_retry, str(last_err)))
+
+    async def request_and_run(self,
+                              key,
+                              func,
+                              priority=1,
+                              session_timeout=0,
+                              max_retry=2,
+                              user=""):
+        """Request a resource from tracker and run the func.
+
+        A new resource is requested and func is ran again
+        when the server drops during execution.
+
+        Parameters
+        ----------
+        key : str
+            The type key of the device.
+
+        func : coroutine function of AsyncRPCSession -> value
+            A stateless function
+
+        priority : int, optional
+            The priority of the request.
+
+        session_timeout : float, optional
+            The duration of the session.
+
+        max_retry : int, optional
+            Maximum number of times to retry the function before give up.
+
+        user : str, optional
+            The user of the request.
+        """
+        last_err = None
+        for _ in range(max_retry):
+            sess = await self.request(key,
+                                      priority=priority,
+                                      session_timeout=session_timeout,
+                                      user=user)
+            tstart = time.time()
+            try:
+                return await func(sess)
+            except TVMError as err:
+                duration = time.time() - tstart
+                # roughly estimate if the error is due to timeout termination
+                if session_timeout and duration >= session_timeout * 0.95:
+                    raise RuntimeError(
+                        "Session timeout when running %s" % func.__name__)
+                last_err = err
+        raise RuntimeError(
+            "Failed to run on %s after %d retry, last_error:%s" % (
+                key, max_retry, str(last_err)))
+
+
+def connect_tracker(url, port, executor=None):
+    """Create an asyncio client of a RPC tracker.
+
+    Parameters
+    ----------
+    url : str
+        The url of the host
+
+    port : int
+        The port to connect to
+
+    executor : concurrent.futures.Executor, optional
+        The executor running the calls of the requested sessions.
+
+    Returns
+    -------
+    sess : AsyncTrackerSession
+        The tracker client.
+    """
+    return AsyncTrackerSession((url, port), executor)
@@ -48,16 +48,22 @@ def recvall(sock, nbytes):
 
     nbytes : int
        Number of bytes to be received.
+
+    Returns
+    -------
+    data : bytearray
+        The received bytes.
     """
-    res = []
+    data = bytearray(nbytes)
+    view = memoryview(data)
     nread = 0
     while nread < nbytes:
-        chunk = sock.recv(min(nbytes - nread, 1024))
+        # receive in place, as much as the socket has
+        chunk = sock.recv_into(view[nread:], nbytes - nread)
         if not chunk:
             raise IOError("connection reset")
-        nread += len(chunk)
-        res.append(chunk)
-    return b"".join(res)
+        nread += chunk
+    return data
 
 
 def sendjson(sock, data):
@@ -71,9 +77,9 @@ def sendjson(sock, data):
     data : object
         Python value to be sent.
     """
-    data = json.dumps(data)
-    sock.sendall(struct.pack("@i", len(data)))
-    sock.sendall(data.encode("utf-8"))
+    data = json.dumps(data).encode("utf-8")
+    # header and payload in one send
+    sock.sendall(struct.pack("@i", len(data)) + data)
 
 
 def recvjson(sock):
@@ -2,14 +2,24 @@
 from __future__ import absolute_import
 
 import os
+import json
+import shutil
 import socket
 import struct
 import time
+import zlib
+from collections import namedtuple
 
 from . import base
+from .. import util, tar as _tar
 from ..._ffi.base import TVMError
 from ..._ffi.ndarray import context as _context
 
+BatchMeasureResult = namedtuple("BatchMeasureResult", ["path", "mean", "results", "error"])
+
+# chunk size of the chunked upload and download
+_DEFAULT_CHUNK_SIZE = 1 << 22
+
 
 class RPCSession(object):
     """RPC Client session module
@@ -21,6 +31,7 @@ class RPCSession(object):
         self._sess = sess
         self._tbl_index = base._SessTableIndex(sess)
         self._remote_funcs = {}
+        self._num_batches = 0
 
     def get_function(self, name):
         """Get function from the session.
@@ -81,7 +92,7 @@ class RPCSession(object):
         """Construct remote extension device."""
         return self.context(12, dev_id)
 
-    def upload(self, data, target=None):
+    def upload(self, data, target=None, chunk_size=None, compress=False, resume=False):
         """Upload file to remote runtime temp folder
 
         Parameters
@@ -91,22 +102,73 @@ class RPCSession(object):
 
         target : str, optional
             The path in remote
+
+        chunk_size : int, optional
+            Send the data in chunks of chunk_size bytes, so a large file
+            is read from disk as it is sent. The data is sent in one call
+            if None and neither compress nor resume is set.
+
+        compress : bool, optional
+            Whether to compress each chunk with zlib,
+            requires the python server.
+
+        resume : bool, optional
+            Whether to continue a partial upload from the size of the
+            remote file, instead of sending the file from the start.
+            The upload starts again if the remote file is not a prefix
+            of data, or if the server cannot compare them.
         """
         if isinstance(data, bytearray):
             if not target:
                 raise ValueError("target must present when file is a bytearray")
-            blob = data
+        elif not target:
+            target = os.path.basename(data)
+
+        if chunk_size is None and not compress and not resume:
+            if not isinstance(data, bytearray):
+                data = bytearray(open(data, "rb").read())
+            self._get_remote_func("upload")(target, data)
+            return
+
+        chunk_size = chunk_size or _DEFAULT_CHUNK_SIZE
+        fupload = self._get_remote_func(
+            "upload_chunk_zlib" if compress else "upload_chunk")
+        if isinstance(data, bytearray):
+            total = len(data)
+            view = memoryview(data)
+            fin = None
+            def read_chunk(offset):
+                return bytearray(view[offset:offset + chunk_size])
         else:
-            blob = bytearray(open(data, "rb").read())
-            if not target:
-                target = os.path.basename(data)
-
-        if "upload" not in self._remote_funcs:
-            self._remote_funcs["upload"] = self.get_function(
-                "tvm.contrib.rpc.server.upload")
-        self._remote_funcs["upload"](target, blob)
-
-    def download(self, path):
+            total = os.path.getsize(data)
+            fin = open(data, "rb")
+            def read_chunk(offset):
+                fin.seek(offset)
+                return bytearray(fin.read(chunk_size))
+        try:
+            offset = 0
+            if resume:
+                offset = self._get_remote_func("file_size")(target)
+                # start again if the remote file is not a prefix
+                if offset < 0 or offset > total or not self._same_prefix(target, data, offset):
+                    offset = 0
+            while True:
+                chunk = read_chunk(offset)
+                if compress:
+                    blob = bytearray(zlib.compress(bytes(chunk)))
+                else:
+                    blob = chunk
+                # the first chunk is sent even if empty, to create the file
+                if chunk or offset == 0:
+                    fupload(target, offset, blob)
+                offset += len(chunk)
+                if offset >= total:
+                    break
+        finally:
+            if fin:
+                fin.close()
+
+    def download(self, path, chunk_size=None, compress=False, out_file=None, resume=False):
         """Download file from remote temp folder.
 
         Parameters
@@ -114,15 +176,63 @@ class RPCSession(object):
         path : str
             The relative location to remote temp folder.
 
+        chunk_size : int, optional
+            Receive the file in chunks of chunk_size bytes. The file is
+            received in one call if None and no other option is set.
+
+        compress : bool, optional
+            Whether to compress each chunk with zlib,
+            requires the python server.
+
+        out_file : str, optional
+            The local file the chunks are written to as they arrive,
+            instead of returning the content.
+
+        resume : bool, optional
+            Whether to continue a partial download into out_file
+            from its size, instead of receiving the file from the start.
+            The download starts again if out_file is not a prefix
+            of the remote file, or if the server cannot compare them.
+
         Returns
         -------
         blob : bytearray
-            The result blob from the file.
+            The result blob from the file, None if out_file is given.
         """
-        if "download" not in self._remote_funcs:
-            self._remote_funcs["download"] = self.get_function(
-                "tvm.contrib.rpc.server.download")
-        return self._remote_funcs["download"](path)
+        if chunk_size is None and not compress and out_file is None:
+            return self._get_remote_func("download")(path)
+
+        chunk_size = chunk_size or _DEFAULT_CHUNK_SIZE
+        total = self._get_remote_func("file_size")(path)
+        if total < 0:
+            raise ValueError("Cannot find remote file %s" % path)
+        fdownload = self._get_remote_func(
+            "download_chunk_zlib" if compress else "download_chunk")
+        offset = 0
+        if out_file is None:
+            blob = bytearray()
+            write_chunk = blob.extend
+        else:
+            if resume and os.path.exists(out_file):
+                offset = os.path.getsize(out_file)
+                # start again if the local file is not a prefix
+                if offset > total or not self._same_prefix(path, out_file, offset):
+                    offset = 0
+            fout = open(out_file, "ab" if offset else "wb")
+            write_chunk = fout.write
+        try:
+            while offset < total:
+                chunk = fdownload(path, offset, min(chunk_size, total - offset))
+                if compress:
+                    chunk = zlib.decompress(bytes(chunk))
+                if not chunk:
+                    raise IOError("Remote file %s is truncated" % path)
+                write_chunk(chunk)
+                offset += len(chunk)
+        finally:
+            if out_file is not None:
+                fout.close()
+        return blob if out_file is None else None
 
     def load_module(self, path):
         """Load a remote module, the file need to be uploaded first.
@@ -139,6 +249,141 @@ class RPCSession(object):
         """
         return base._LoadRemoteModule(self._sess, path)
 
+    def measure_batch(self, files, ctx, args, func_name=None, number=10, repeat=1):
+        """Measure the time cost of a batch of modules on the remote.
+
+        The modules are uploaded as one tarball, then each module is loaded
+        and measured on the remote with one call per module.
+
+        Parameters
+        ----------
+        files : list of str
+            The exported libraries of the modules, in the format
+            accepted by load_module.
+
+        ctx : TVMContext
+            The remote context to run the functions on.
+
+        args : list of tuple (shape, dtype)
+            The arguments of the function, allocated on the remote.
+
+        func_name : str, optional
+            The function to measure, the entry function of the module if None.
+
+        number : int, optional
+            The number of steps used in measuring each time interval.
+
+        repeat : int, optional
+            Number of times to run the timer measurement.
+
+        Returns
+        -------
+        results : iterator of BatchMeasureResult
+            The result of each module in the order of files. error is the
+            error message when the module fails to load or run, None otherwise.
+        """
+        temp = util.tempdir()
+        names = []
+        for i, path in enumerate(files):
+            # prefix with the index to keep the order and unique names
+            name = temp.relpath("%05d_%s" % (i, os.path.basename(path)))
+            shutil.copy(path, name)
+            names.append(name)
+        tar_path = temp.relpath("batch.tar")
+        _tar.tar(tar_path, names)
+        target = "batch%d.tar" % self._num_batches
+        self._num_batches += 1
+        self.upload(tar_path, target)
+        remote_files = json.loads(self._get_remote_func("untar_batch")(target))
+        config = _measure_config(ctx, args, func_name, number, repeat)
+
+        def _iter_results():
+            for path, remote_file in zip(files, remote_files):
+                yield self._measure_remote(path, remote_file, config)
+        return _iter_results()
+
+    def measure(self, path, ctx, args, func_name=None, number=10, repeat=1):
+        """Upload a module and measure its time cost on the remote.
+
+        Parameters
+        ----------
+        path : str
+            The exported library of the module.
+
+        ctx : TVMContext
+            The remote context to run the function on.
+
+        args : list of tuple (shape, dtype)
+            The arguments of the function, allocated on the remote.
+
+        func_name : str, optional
+            The function to measure, the entry function of the module if None.
+
+        number : int, optional
+            The number of steps used in measuring each time interval.
+
+        repeat : int, optional
+            Number of times to run the timer measurement.
+
+        Returns
+        -------
+        result : BatchMeasureResult
+            The result of the module.
+        """
+        self.upload(path)
+        return self._measure_remote(path, os.path.basename(path),
+                                    _measure_config(ctx, args, func_name, number, repeat))
+
+    def _measure_remote(self, path, remote_file, config):
+        ret = json.loads(self._get_remote_func("measure_module")(remote_file, config))
+        return BatchMeasureResult(path=path,
+                                  mean=ret.get("mean"),
+                                  results=tuple(ret.get("results", ())),
+                                  error=ret.get("error"))
+
+    def _same_prefix(self, remote_file, local, nbytes):
+        """Whether the remote file starts with the first nbytes of local."""
+        if nbytes == 0:
+            return True
+        try:
+            fhash = self._get_remote_func("file_hash")
+        except AttributeError:
+            # a server without file_hash cannot check the prefix
+            return False
+        return fhash(remote_file, nbytes) == _crc32_prefix(local, nbytes)
+
+    def _get_remote_func(self, name):
+        if name not in self._remote_funcs:
+            self._remote_funcs[name] = self.get_function(
+                "tvm.contrib.rpc.server." + name)
+        return self._remote_funcs[name]
+
+
+def _crc32_prefix(data, nbytes):
+    """CRC-32 of the first nbytes of a bytearray or a file, as the server file_hash."""
+    if isinstance(data, bytearray):
+        return zlib.crc32(bytes(data[:nbytes])) & 0xffffffff
+    crc = 0
+    with open(data, "rb") as fin:
+        while nbytes > 0:
+            chunk = fin.read(min(nbytes, _DEFAULT_CHUNK_SIZE))
+            if not chunk:
+                return None
+            crc = zlib.crc32(chunk, crc)
+            nbytes -= len(chunk)
+    return crc & 0xffffffff
+
+
+def _measure_config(ctx, args, func_name, number, repeat):
+    """Encode the measurement options for the remote measure_module."""
+    return json.dumps({
+        "device_type": ctx.device_type % base.RPC_SESS_MASK,
+        "device_id": ctx.device_id,
+        "func_name": func_name,
+        "args": [[list(shape), dtype] for shape, dtype in args],
+        "number": number,
+        "repeat": repeat})
+
 
 class TrackerSession(object):
     """Tracker client session.
@@ -193,14 +438,29 @@ class TrackerSession(object):
         res += "\n"
         res += "Queue Status\n"
         res += "----------------------------\n"
-        res += "key\tfree\tpending\n"
+        res += "key\tfree\tpending\twait-mean\twait-max\n"
         res += "----------------------------\n"
         for k, v in data["queue_info"].items():
-            res += "%s\t%d\t%g\n" % (k, v["free"], v["pending"])
+            res += "%s\t%d\t%g\t%.3fs\t%.3fs\n" % (
+                k, v["free"], v["pending"], v.get("wait_mean", 0), v.get("wait_max", 0))
         res += "----------------------------\n"
+        if data.get("server_latency"):
+            res += "\n"
+            res += "Server Latency\n"
+            res += "----------------------------\n"
+            res += "server-address\tkey\tlatency\tfailures\n"
+            res += "----------------------------\n"
+            for item in data["server_latency"]:
+                addr = item["addr"]
+                latency = item["latency"]
+                res += "%s:%d\t%s\t%s\t%d/%d\n" % (
+                    addr[0], addr[1], item["key"],
+                    "%.3fms" % (latency * 1000) if latency is not None else "-",
+                    item["failures"], item["probes"])
+            res += "----------------------------\n"
         return res
 
-    def request(self, key, priority=1, session_timeout=0, max_retry=5):
+    def request(self, key, priority=1, session_timeout=0, max_retry=5, user=""):
         """Request a new connection from the tracker.
 
         Parameters
@@ -218,6 +478,10 @@ class TrackerSession(object):
 
         max_retry : int, optional
             Maximum number of times to retry before give up.
+
+        user : str, optional
+            The user of the request, used by the fair share and
+            affinity schedulers of the tracker.
         """
         last_err = None
         for _ in range(max_retry):
@@ -225,7 +489,7 @@ class TrackerSession(object):
                 if self._sock is None:
                     self._connect()
                 base.sendjson(self._sock,
-                              [base.TrackerCode.REQUEST, key, "", priority])
+                              [base.TrackerCode.REQUEST, key, user, priority])
                 value = base.recvjson(self._sock)
                 if value[0] != base.TrackerCode.SUCCESS:
                     raise RuntimeError("Invalid return value %s" % str(value))
@@ -240,12 +504,72 @@ class TrackerSession(object):
             "Cannot request %s after %d retry, last_error:%s" % (
                 key, max_retry, str(last_err)))
 
+    def measure_batch(self,
+                      key,
+                      files,
+                      args,
+                      dev_type="cpu",
+                      dev_id=0,
+                      func_name=None,
+                      number=10,
+                      repeat=1,
+                      priority=1,
+                      session_timeout=0):
+        """Request a device from the tracker and measure a batch of modules on it.
+
+        Parameters
+        ----------
+        key : str
+            The type key of the device.
+
+        files : list of str
+            The exported libraries of the modules.
+
+        args : list of tuple (shape, dtype)
+            The arguments of the function, allocated on the remote.
+
+        dev_type : int or str, optional
+            The device type of the remote context.
+
+        dev_id : int, optional
+            The device id of the remote context.
+
+        func_name : str, optional
+            The function to measure, the entry function of the module if None.
+
+        number : int, optional
+            The number of steps used in measuring each time interval.
+
+        repeat : int, optional
+            Number of times to run the timer measurement.
+
+        priority : int, optional
+            The priority of the request.
+
+        session_timeout : float, optional
+            The duration of the session, allows server to kill
+            the connection when duration is longer than this value.
+
+        Returns
+        -------
+        results : iterator of BatchMeasureResult
+            The result of each module in the order of files.
+
+        See Also
+        --------
+        RPCSession.measure_batch
+        """
+        sess = self.request(key, priority=priority, session_timeout=session_timeout)
+        return sess.measure_batch(files, sess.context(dev_type, dev_id), args,
+                                  func_name=func_name, number=number, repeat=repeat)
+
     def request_and_run(self,
                         key,
                         func,
                         priority=1,
                         session_timeout=0,
-                        max_retry=2):
+                        max_retry=2,
+                        user=""):
         """Request a resource from tracker and run the func.
 
         This function safe-guard rare server node dropout during execution.
@@ -269,13 +593,17 @@ class TrackerSession(object):
 
         max_retry : int, optional
             Maximum number of times to retry the function before give up.
+
+        user : str, optional
+            The user of the request.
         """
         last_err = None
         for _ in range(max_retry):
             try:
                 sess = self.request(key,
                                     priority=priority,
-                                    session_timeout=session_timeout)
+                                    session_timeout=session_timeout,
+                                    user=user)
                 tstart = time.time()
                 return func(sess)
             except TVMError as err:
@@ -0,0 +1,191 @@
+"""Pipelined local build and remote measurement.
+
+The builds run in a local process pool while the finished libraries are
+measured on the devices of a tracker, so that both the build cores and
+the remote devices stay busy.
+"""
+from __future__ import absolute_import
+
+import logging
+import multiprocessing
+import sys
+import threading
+from collections import namedtuple
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from .. import util
+from . import client
+
+MeasureResult = namedtuple("MeasureResult", ["index", "mean", "results", "error"])
+
+
+def _build_library(fbuild, args, path):
+    """Build a module in the pool worker and export it to path."""
+    try:
+        fbuild(*args).export_library(path)
+        return None
+    except Exception as err:  # pylint: disable=broad-except
+        return "Build error: %s" % str(err)
+
+
+def measure_pipelined(builds,
+                      tracker_addr,
+                      key,
+                      args,
+                      num_devices=1,
+                      build_jobs=None,
+                      queue_size=None,
+                      dev_type="cpu",
+                      dev_id=0,
+                      func_name=None,
+                      number=10,
+                      repeat=1,
+                      priority=1,
+                      session_timeout=0,
+                      export_format=".tar"):
+    """Build modules locally and measure them on remote devices in a pipeline.
+
+    Parameters
+    ----------
+    builds : list of tuple (fbuild, build_args)
+        The builds to measure, fbuild(*build_args) returns the module.
+        fbuild must be picklable, i.e. a function defined at module level.
+
+    tracker_addr : tuple
+        The address of the tracker.
+
+    key : str
+        The type key of the devices.
+
+    args : list of tuple (shape, dtype)
+        The arguments of the function, allocated on the remote.
+
+    num_devices : int, optional
+        The number of devices requested from the tracker.
+
+    build_jobs : int, optional
+        The number of build processes, the number of cpus if None.
+
+    queue_size : int, optional
+        Maximum number of built libraries waiting for a device,
+        twice the number of devices if None. The builds are throttled
+        when the queue is full.
+
+    dev_type : int or str, optional
+        The device type of the remote context.
+
+    dev_id : int, optional
+        The device id of the remote context.
+
+    func_name : str, optional
+        The function to measure, the entry function of the module if None.
+
+    number : int, optional
+        The number of steps used in measuring each time interval.
+
+    repeat : int, optional
+        Number of times to run the timer measurement.
+
+    priority : int, optional
+        The priority of the tracker requests.
+
+    session_timeout : float, optional
+        The duration of each device session.
+
+    export_format : str, optional
+        The extension of the exported libraries. The objects of a ".tar"
+        are linked on the device, so that cross compiled modules can be
+        measured. A ".so" is linked by the host compiler.
+
+    Returns
+    -------
+    results : iterator of MeasureResult
+        The results in the order they finish, index is the position of the
+        build in builds. error is the message of the failed build or
+        measurement, None otherwise.
+    """
+    builds = list(builds)
+    build_jobs = build_jobs or multiprocessing.cpu_count()
+    queue_size = queue_size or 2 * num_devices
+    temp = util.tempdir()
+    artifacts = queue.Queue()
+    results = queue.Queue()
+    # builds running or waiting for a device
+    slots = threading.Semaphore(build_jobs + queue_size)
+
+    def _run_builds():
+        pool = multiprocessing.Pool(build_jobs)
+        try:
+            for idx, (fbuild, build_args) in enumerate(builds):
+                slots.acquire()
+                path = temp.relpath("lib%d%s" % (idx, export_format))
+                kwargs = {}
+                if sys.version_info[0] >= 3:
+                    # e.g. fbuild cannot be pickled
+                    kwargs["error_callback"] = lambda err, idx=idx: artifacts.put(
+                        (idx, None, "Build error: %s" % str(err)))
+                pool.apply_async(
+                    _build_library, (fbuild, build_args, path),
+                    callback=lambda err, idx=idx, path=path: artifacts.put((idx, path, err)),
+                    **kwargs)
+            pool.close()
+            # the callbacks are done after join
+            pool.join()
+        finally:
+            pool.terminate()
+            for _ in range(num_devices):
+                artifacts.put(None)
+
+    def _run_device():
+        tracker = None
+        sess = None
+        try:
+            while True:
+                item = artifacts.get()
+                if item is None:
+                    break
+                slots.release()
+                idx, path, err = item
+                if err is not None:
+                    results.put(MeasureResult(idx, None, (), err))
+                    continue
+                try:
+                    if tracker is None:
+                        tracker = client.TrackerSession(tracker_addr)
+                    if sess is None:
+                        sess = tracker.request(key, priority=priority,
+                                               session_timeout=session_timeout)
+                    ret = sess.measure(path, sess.context(dev_type, dev_id), args,
+                                       func_name=func_name, number=number, repeat=repeat)
+                    results.put(MeasureResult(idx, ret.mean, ret.results, ret.error))
+                except Exception as err:  # pylint: disable=broad-except
+                    logging.info("Measurement of build %d failed: %s", idx, str(err))
+                    # the device may be gone, request a new one for the next build
+                    sess = None
+                    results.put(MeasureResult(idx, None, (), str(err)))
+        finally:
+            if tracker is not None:
+                tracker.close()
+            results.put(None)
+
+    threads = [threading.Thread(target=_run_builds)]
+    threads += [threading.Thread(target=_run_device) for _ in range(num_devices)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    def _iter_results():
+        finished = 0
+        while finished < num_devices:
+            item = results.get()
+            if item is None:
+                finished += 1
+                continue
+            yield item
+        # keep the build directory alive until all results are out
+        temp.remove()
+    return _iter_results()
@@ -14,6 +14,7 @@ import socket
 import multiprocessing
 import errno
 import struct
+import time
 
 try:
     import tornado
@@ -29,6 +30,26 @@ from .base import TrackerCode
 from .server import _server_env
 from ..._ffi.base import py_str
 
+# pause the sender when its peer has more pending bytes than this
+_HIGH_WATER_BYTES = 1 << 24
+# resume the sender once the pending bytes fall below this
+_LOW_WATER_BYTES = 1 << 22
+
+# Header of the frames on a multiplexed device connection:
+# channel id, frame kind, payload size.
+_MUX_HEADER = struct.Struct("@iii")
+_MUX_OPEN = 0
+_MUX_DATA = 1
+_MUX_CLOSE = 2
+
+
+def _parse_mux_opt(rpc_key):
+    """Get the number of sessions a server key asks to multiplex, 0 if none."""
+    for kv in rpc_key.split()[1:]:
+        if kv.startswith("-mux="):
+            return int(kv[5:])
+    return 0
+
 
 class ForwardHandler(object):
     """Forward handler to forward the message."""
@@ -45,6 +66,11 @@ class ForwardHandler(object):
         self.rpc_key = None
         self.match_key = None
         self.forward_proxy = None
+        # set when the handler is a device carrying multiplexed sessions
+        self.mux = None
+        self._pair = None
+        # handlers paused because this handler has too many pending bytes
+        self._blocked = []
 
     def __del__(self):
         logging.info("Delete %s...", self.name())
@@ -78,11 +104,51 @@ class ForwardHandler(object):
         """Event when the initialization is completed"""
         self._proxy.handler_ready(self)
 
+    def send_pair_header(self, remote_key):
+        """Tell the connection that it is paired with remote_key."""
+        self.send_data(struct.pack('@i', base.RPC_CODE_SUCCESS))
+        self.send_data(struct.pack('@i', len(remote_key)))
+        self.send_data(remote_key.encode("utf-8"))
+
+    def transport(self):
+        """The handler owning the underlying connection."""
+        return self
+
+    def pending_bytes(self):
+        """Number of bytes waiting to be sent to the connection."""
+        return 0
+
+    def pause_reading(self):
+        """Stop receiving data from the connection, no-op if unsupported."""
+        pass
+
+    def resume_reading(self):
+        """Resume receiving data from the connection."""
+        pass
+
+    def _release_blocked(self, force=False):
+        """Resume the senders paused on this handler once it drained."""
+        if self._blocked and (force or self.pending_bytes() <= _LOW_WATER_BYTES):
+            blocked, self._blocked = self._blocked, []
+            for handler in blocked:
+                handler.resume_reading()
+
+    def _forward(self, message):
+        peer = self.forward_proxy
+        self._proxy.bytes_forwarded += len(message)
+        peer.send_data(message)
+        sink = peer.transport()
+        if sink.pending_bytes() > _HIGH_WATER_BYTES and self not in sink._blocked:
+            sink._blocked.append(self)
+            self.pause_reading()
+
     def on_data(self, message):
         """on data"""
         assert isinstance(message, bytes)
-        if self.forward_proxy:
-            self.forward_proxy.send_data(message)
+        if self.mux is not None:
+            self.mux.on_data(message)
+        elif self.forward_proxy:
+            self._forward(message)
         else:
             while message and self._init_req_nbytes > len(self._init_message):
                 nbytes = self._init_req_nbytes - len(self._init_message)
@@ -117,6 +183,10 @@ class ForwardHandler(object):
                 self._proxy._client_pool.pop(key)
             if self._proxy._server_pool.get(key, None) == self:
                 self._proxy._server_pool.pop(key)
+        if self.mux is not None:
+            self.mux.close_all()
+        self._proxy._pairs.discard(self._pair)
+        self._release_blocked(force=True)
         self._done = True
         self.forward_proxy = None
 
@@ -137,6 +207,9 @@ class TCPHandler(tornado_util.TCPHandler, ForwardHandler):
     def on_message(self, message):
         self.on_data(message)
 
+    def on_write_drained(self):
+        self._release_blocked()
+
     def on_close(self):
         if self.forward_proxy:
             self.forward_proxy.signal_close()
@@ -146,10 +219,17 @@ class TCPHandler(tornado_util.TCPHandler, ForwardHandler):
 
 
 class WebSocketHandler(websocket.WebSocketHandler, ForwardHandler):
-    """Handler for websockets."""
+    """Handler for websockets.
+
+    The messages sent in one iteration of the event loop are coalesced
+    into a single websocket frame. Tornado cannot pause the reading of a
+    websocket, so the backpressure only applies to the sending side.
+    """
     def __init__(self, *args, **kwargs):
         super(WebSocketHandler, self).__init__(*args, **kwargs)
         self._init_handler()
+        self._outbox = []
+        self._pending_bytes = 0
 
     def name(self):
         return "WebSocketProxy:%s" % (self.rpc_key)
@@ -161,10 +241,33 @@ class WebSocketHandler(websocket.WebSocketHandler, ForwardHandler):
         raise NotImplementedError()
 
     def send_data(self, message):
+        self._outbox.append(message)
+        self._pending_bytes += len(message)
+        if len(self._outbox) == 1:
+            self._proxy.loop.add_callback(self._flush)
+
+    def pending_bytes(self):
+        return self._pending_bytes
+
+    def _flush(self):
+        if not self._outbox:
+            return
+        msgs, self._outbox = self._outbox, []
+        data = msgs[0] if len(msgs) == 1 else b"".join(msgs)
         try:
-            self.write_message(message, True)
+            future = self.write_message(data, True)
         except websocket.WebSocketClosedError as err:
+            self._pending_bytes = 0
             self.on_error(err)
+            return
+        if future is None:
+            self._on_written(len(data))
+        else:
+            future.add_done_callback(lambda _: self._on_written(len(data)))
+
+    def _on_written(self, nbytes):
+        self._pending_bytes -= nbytes
+        self._release_blocked()
 
     def on_close(self):
         if self.forward_proxy:
@@ -173,9 +276,131 @@ class WebSocketHandler(websocket.WebSocketHandler, ForwardHandler):
         self.on_close_event()
 
     def signal_close(self):
+        self._flush()
         self.close()
 
 
+class _MuxChannel(ForwardHandler):
+    """A logical session carried by a multiplexed device connection."""
+    def __init__(self, conn, channel):
+        self._init_handler()
+        self._conn = conn
+        self.channel = channel
+        self.rpc_key = conn.handler.rpc_key
+
+    def name(self):
+        return "%s#%d" % (self._conn.handler.name(), self.channel)
+
+    def send_pair_header(self, remote_key):
+        key = remote_key.encode("utf-8")
+        self._conn.send_frame(self.channel, _MUX_OPEN, struct.pack('@i', len(key)) + key)
+
+    def send_data(self, message):
+        self._conn.send_frame(self.channel, _MUX_DATA, message)
+
+    def transport(self):
+        return self._conn.handler
+
+    def pending_bytes(self):
+        return self._conn.handler.pending_bytes()
+
+    def pause_reading(self):
+        # pauses all the sessions of the device
+        self._conn.handler.pause_reading()
+
+    def resume_reading(self):
+        self._conn.handler.resume_reading()
+
+    def signal_close(self):
+        self.close()
+
+    def close(self, notify=True):
+        """Close the channel, notify the device unless it closed the channel."""
+        if not self._done:
+            self._conn.close_channel(self.channel, notify)
+            if self.forward_proxy:
+                self.forward_proxy.signal_close()
+                self.forward_proxy = None
+            self.on_close_event()
+
+
+class _MuxConnection(object):
+    """Proxy side of a device connection that multiplexes sessions.
+
+    Every message on the connection is a frame of _MUX_HEADER followed
+    by the payload. An open frame carries the init header of the session,
+    i.e. the length and the key of the client.
+
+    Parameters
+    ----------
+    handler : ForwardHandler
+        The handler of the device connection.
+
+    max_channels : int
+        Maximum number of concurrent sessions.
+    """
+    def __init__(self, handler, max_channels):
+        self.handler = handler
+        self.max_channels = max_channels
+        self.channels = {}
+        self.closed = False
+        self._next_channel = 0
+        self._buffer = bytearray()
+
+    def full(self):
+        """Whether the device runs the maximum number of sessions."""
+        return len(self.channels) >= self.max_channels
+
+    def open_channel(self):
+        """Create a new channel, None if the device is full."""
+        if self.closed or self.full():
+            return None
+        chan = _MuxChannel(self, self._next_channel)
+        self.channels[chan.channel] = chan
+        self._next_channel += 1
+        return chan
+
+    def send_frame(self, channel, kind, payload=b""):
+        self.handler.send_data(_MUX_HEADER.pack(channel, kind, len(payload)) + payload)
+
+    def close_channel(self, channel, notify):
+        if self.channels.pop(channel, None) is None:
+            return
+        if notify and not self.closed:
+            self.send_frame(channel, _MUX_CLOSE)
+        self.handler._proxy.on_mux_channel_closed(self)
+
+    def close_all(self):
+        self.closed = True
+        for chan in list(self.channels.values()):
+            chan.close(notify=False)
+
+    def on_data(self, message):
+        """Split the received data into frames and dispatch them."""
+        self._buffer += message
+        offset = 0
+        while len(self._buffer) - offset >= _MUX_HEADER.size:
+            channel, kind, nbytes = _MUX_HEADER.unpack_from(self._buffer, offset)
+            end = offset + _MUX_HEADER.size + nbytes
+            if len(self._buffer) < end:
+                break
+            payload = bytes(self._buffer[offset + _MUX_HEADER.size:end])
+            offset = end
+            chan = self.channels.get(channel, None)
+            if chan is None:
+                continue
+            if kind == _MUX_DATA:
+                if chan.forward_proxy:
+                    chan.on_data(payload)
+            elif kind == _MUX_CLOSE:
+                chan.close(notify=False)
+            else:
+                logging.info("Invalid mux frame kind %d from %s", kind, self.handler.name())
+                self.handler.close()
+                return
+        del self._buffer[:offset]
+
+
 class RequestHandler(tornado.web.RequestHandler):
     """Handles html request."""
     def __init__(self, *args, **kwargs):
@@ -198,6 +423,15 @@ class RequestHandler(tornado.web.RequestHandler):
         self.write(self.page)
 
 
+class MetricsHandler(tornado.web.RequestHandler):
+    """Serve the metrics of the proxy as json."""
+    def data_received(self, _):
+        pass
+
+    def get(self, *args, **kwargs):
+        self.write(ProxyServerHandler.current.metrics())
+
+
 class ProxyServerHandler(object):
     """Internal proxy server handler class."""
     current = None
@@ -215,6 +449,7 @@ class ProxyServerHandler(object):
         if web_port:
             handlers = [
                 (r"/ws", WebSocketHandler),
+                (r"/metrics", MetricsHandler),
             ]
             if index_page:
                 handlers.append(
@@ -237,6 +472,13 @@ class ProxyServerHandler(object):
             self.sock.fileno(), event_handler, self.loop.READ)
         self._client_pool = {}
         self._server_pool = {}
+        # statistics
+        self._pairs = set()
+        self.bytes_forwarded = 0
+        self.bytes_per_sec = 0.0
+        self._rate_stamp = (time.time(), 0)
+        self._rate_timer = ioloop.PeriodicCallback(self._update_rate, 1000)
+        self._rate_timer.start()
         self.timeout_client = timeout_client
         self.timeout_server = timeout_server
         # tracker information
@@ -258,19 +500,92 @@ class ProxyServerHandler(object):
                 if err.args[0] in (errno.EAGAIN, errno.EWOULDBLOCK):
                     break
 
+    def _update_rate(self):
+        now = time.time()
+        last_time, last_bytes = self._rate_stamp
+        if now > last_time:
+            self.bytes_per_sec = (self.bytes_forwarded - last_bytes) / (now - last_time)
+        self._rate_stamp = (now, self.bytes_forwarded)
+
+    def metrics(self):
+        """Get the metrics of the proxy.
+
+        Returns
+        -------
+        metrics : dict
+            bytes_forwarded and bytes_per_sec give the forwarded traffic,
+            active_pairs the number of running sessions, queue_bytes the
+            bytes waiting to be sent and waiting_clients/waiting_servers
+            the connections waiting for a match.
+        """
+        muxes = [h.mux for h in self._server_pool.values() if h.mux is not None]
+        transports = set(h.mux.handler for h in muxes)
+        for pair in self._pairs:
+            transports.update(h.transport() for h in pair)
+        return {
+            "bytes_forwarded": self.bytes_forwarded,
+            "bytes_per_sec": self.bytes_per_sec,
+            "active_pairs": len(self._pairs),
+            "queue_bytes": sum(h.pending_bytes() for h in transports),
+            "mux_devices": len(muxes),
+            "mux_channels": sum(len(mux.channels) for mux in muxes),
+            "waiting_clients": len(self._client_pool),
+            "waiting_servers": len(self._server_pool) - len(muxes),
+        }
+
     def _pair_up(self, lhs, rhs):
         lhs.forward_proxy = rhs
         rhs.forward_proxy = lhs
+        lhs._pair = rhs._pair = (lhs, rhs)
+        self._pairs.add(lhs._pair)
 
-        lhs.send_data(struct.pack('@i', base.RPC_CODE_SUCCESS))
-        lhs.send_data(struct.pack('@i', len(rhs.rpc_key)))
-        lhs.send_data(rhs.rpc_key.encode("utf-8"))
-
-        rhs.send_data(struct.pack('@i', base.RPC_CODE_SUCCESS))
-        rhs.send_data(struct.pack('@i', len(lhs.rpc_key)))
-        rhs.send_data(lhs.rpc_key.encode("utf-8"))
+        lhs.send_pair_header(rhs.rpc_key)
+        rhs.send_pair_header(lhs.rpc_key)
         logging.info("Pairup connect %s  and %s", lhs.name(), rhs.name())
 
+    def _pair_with_server(self, server, client):
+        """Pair a client with a server in the server pool.
+
+        A multiplexing server stays in the pool and serves the client
+        on a new channel.
+
+        Returns
+        -------
+        success : bool
+            False when the server cannot take more sessions.
+        """
+        if server.mux is None:
+            self._server_pool.pop(server.match_key)
+            self._pair_up(server, client)
+            return True
+        chan = server.mux.open_channel()
+        if chan is None:
+            return False
+        self._pair_up(chan, client)
+        if self._tracker_addr and not server.mux.full():
+            # the tracker dropped the key when it was requested
+            self._tracker_pending_puts.append(server.match_key)
+            self._update_tracker()
+        return True
+
+    def on_mux_channel_closed(self, mux):
+        """Event when a channel of a multiplexed server is closed."""
+        if (self._tracker_addr and not mux.closed and
+                len(mux.channels) == mux.max_channels - 1):
+            self._tracker_pending_puts.append(mux.handler.match_key)
+            self._update_tracker()
+
+    def _register_mux(self, handler):
+        """Accept a server multiplexing its sessions, return False if not."""
+        max_channels = _parse_mux_opt(handler.rpc_key)
+        if max_channels <= 0:
+            return False
+        handler.mux = _MuxConnection(handler, max_channels)
+        # the server is ready for frames right away
+        handler.send_data(struct.pack('@i', base.RPC_CODE_SUCCESS))
+        logging.info("%s multiplexes up to %d sessions", handler.name(), max_channels)
+        return True
+
     def _update_tracker(self):
         """Update information on tracker."""
         try:
@@ -317,6 +632,7 @@ class ProxyServerHandler(object):
             for key, handle in self._server_pool.items():
                 rpc_key, _ = key.split(":")
                 key = base.random_key(rpc_key + ":", keyset)
+                handle.match_key = key
                 new_pool[key] = handle
                 keyset.add(key)
             self._server_pool = new_pool
@@ -327,15 +643,15 @@ class ProxyServerHandler(object):
     def _handler_ready_tracker_mode(self, handler):
         """tracker mode to handle handler ready."""
         if handler.rpc_key.startswith("server:"):
+            self._register_mux(handler)
             key = base.random_key(handler.match_key + ":", self._server_pool)
             handler.match_key = key
             self._server_pool[key] = handler
             self._tracker_pending_puts.append(key)
             self._update_tracker()
         else:
-            if handler.match_key in self._server_pool:
-                self._pair_up(self._server_pool.pop(handler.match_key), handler)
-            else:
+            server = self._server_pool.get(handler.match_key, None)
+            if server is None or not self._pair_with_server(server, handler):
                 handler.send_data(struct.pack('@i', base.RPC_CODE_MISMATCH))
                 handler.signal_close()
 
@@ -349,8 +665,19 @@ class ProxyServerHandler(object):
             timeout = self.timeout_client
 
         key = handler.match_key
+        if pool_dst is self._server_pool and key not in pool_dst and self._register_mux(handler):
+            # a multiplexing server stays in the pool, without timeout
+            pool_dst[key] = handler
+            if key in pool_src:
+                self._pair_with_server(handler, pool_src.pop(key))
+            return
         if key in pool_src:
-            self._pair_up(pool_src.pop(key), handler)
+            if pool_src is self._client_pool:
+                self._pair_up(pool_src.pop(key), handler)
+            elif not self._pair_with_server(pool_src[key], handler):
+                logging.info("Server with key=%s cannot take more sessions", key)
+                handler.send_data(struct.pack('@i', base.RPC_CODE_MISMATCH))
+                handler.signal_close()
             return
         elif key not in pool_dst:
             pool_dst[key] = handler
@@ -418,6 +745,7 @@ class Proxy(object):
 
     web_port : int, optional
         The http/websocket port of the server.
+        The metrics of the proxy are served as json at /metrics.
 
     timeout_client : float, optional
         Timeout of client until it sees a matching connection.
@@ -477,7 +805,58 @@ class Proxy(object):
         self.terminate()
 
 
-def websocket_proxy_server(url, key=""):
+class _MuxServer(object):
+    """Serve the sessions multiplexed on a proxy connection.
+
+    Parameters
+    ----------
+    fsend : function(bytes)
+        Function that sends data to the proxy.
+
+    name : str
+        The name of the server.
+    """
+    def __init__(self, fsend, name):
+        self._fsend = fsend
+        self._name = name
+        self._sessions = {}
+        self._buffer = bytearray()
+
+    def _create_session(self, channel):
+        def _fsend(data):
+            data = bytes(data)
+            self._fsend(_MUX_HEADER.pack(channel, _MUX_DATA, len(data)) + data)
+            return len(data)
+        return base._CreateEventDrivenServer(
+            _fsend, "%s#%d" % (self._name, channel), "%toinit")
+
+    def on_data(self, message):
+        """Split the received data into frames and run the sessions."""
+        self._buffer += message
+        offset = 0
+        while len(self._buffer) - offset >= _MUX_HEADER.size:
+            channel, kind, nbytes = _MUX_HEADER.unpack_from(self._buffer, offset)
+            end = offset + _MUX_HEADER.size + nbytes
+            if len(self._buffer) < end:
+                break
+            payload = self._buffer[offset + _MUX_HEADER.size:end]
+            offset = end
+            if kind == _MUX_OPEN:
+                logging.info("%s: open session %d", self._name, channel)
+                self._sessions[channel] = self._create_session(channel)
+            elif kind == _MUX_CLOSE:
+                self._sessions.pop(channel, None)
+                continue
+            on_message = self._sessions.get(channel, None)
+            if on_message is not None and payload:
+                if on_message(payload, 3) == 0:
+                    # the client shutdown the session
+                    self._sessions.pop(channel)
+                    self._fsend(_MUX_HEADER.pack(channel, _MUX_CLOSE, 0))
+        del self._buffer[:offset]
+
+
+def websocket_proxy_server(url, key="", mux=0):
     """Create a RPC server that uses an websocket that connects to a proxy.
 
     Parameters
@@ -487,12 +866,19 @@ def websocket_proxy_server(url, key=""):
 
     key : str
         The key to identify the server.
+
+    mux : int, optional
+        Serve up to mux concurrent sessions over the single connection,
+        one session at a time if 0.
     """
     def create_on_message(conn):
         def _fsend(data):
             data = bytes(data)
             conn.write_message(data, binary=True)
             return len(data)
+        if mux:
+            server = _MuxServer(_fsend, "WebSocketProxyServer")
+            return lambda msg, _: server.on_data(msg)
         on_message = base._CreateEventDrivenServer(
             _fsend, "WebSocketProxyServer", "%toinit")
         return on_message
@@ -505,6 +891,8 @@ def websocket_proxy_server(url, key=""):
         # Start connecton
         conn.write_message(struct.pack('@i', base.RPC_MAGIC), binary=True)
         key = "server:" + key
+        if mux:
+            key += " -mux=%d" % mux
         conn.write_message(struct.pack('@i', len(key)), binary=True)
         conn.write_message(key.encode("utf-8"), binary=True)
         msg = yield conn.read_message()
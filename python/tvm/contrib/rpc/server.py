@@ -11,6 +11,7 @@ Server is TCP based with the following protocol:
 from __future__ import absolute_import
 
 import os
+import json
 import socket
 import select
 import struct
@@ -18,9 +19,12 @@ import logging
 import multiprocessing
 import subprocess
 import time
+import zlib
+from multiprocessing import reduction
 
-from ..._ffi.function import register_func
+from ..._ffi.function import register_func, get_global_func
 from ..._ffi.base import py_str
+from ..._ffi.ndarray import context as _context, empty as _empty
 from ...module import load as _load_module
 from .. import util, cc, tar
 from . import base
@@ -30,14 +34,56 @@ def _server_env():
     """Server environment function return temp dir"""
     temp = util.tempdir()
     # pylint: disable=unused-variable
-    @register_func("tvm.contrib.rpc.server.workpath")
+    @register_func("tvm.contrib.rpc.server.workpath", override=True)
     def get_workpath(path):
         return temp.relpath(path)
 
     @register_func("tvm.contrib.rpc.server.load_module", override=True)
     def load_module(file_name):
         """Load module from remote side."""
+        return _load(temp.relpath(file_name))
+
+    @register_func("tvm.contrib.rpc.server.upload_chunk_zlib", override=True)
+    def upload_chunk_zlib(file_name, offset, blob):
+        """Upload a zlib compressed chunk, offset is in uncompressed bytes."""
+        get_global_func("tvm.contrib.rpc.server.upload_chunk")(
+            file_name, offset, bytearray(zlib.decompress(bytes(blob))))
+
+    @register_func("tvm.contrib.rpc.server.download_chunk_zlib", override=True)
+    def download_chunk_zlib(file_name, offset, size):
+        """Download a chunk compressed by zlib, offset is in uncompressed bytes."""
+        blob = get_global_func("tvm.contrib.rpc.server.download_chunk")(
+            file_name, offset, size)
+        return bytearray(zlib.compress(bytes(blob)))
+
+    @register_func("tvm.contrib.rpc.server.untar_batch", override=True)
+    def untar_batch(file_name):
+        """Unpack a batch of modules, return the file names as json list."""
         path = temp.relpath(file_name)
+        batch_dir = path + ".d"
+        os.mkdir(batch_dir)
+        tar.untar(path, batch_dir)
+        prefix = os.path.basename(batch_dir)
+        return json.dumps([os.path.join(prefix, x) for x in sorted(os.listdir(batch_dir))])
+
+    @register_func("tvm.contrib.rpc.server.measure_module", override=True)
+    def measure_module(file_name, config):
+        """Load a module and measure its function, return the costs as json."""
+        config = json.loads(config)
+        try:
+            mod = _load(temp.relpath(file_name))
+            ctx = _context(config["device_type"], config["device_id"])
+            args = [_empty(shape, dtype, ctx) for shape, dtype in config["args"]]
+            func_name = config["func_name"] or mod.entry_name
+            ftimer = mod.time_evaluator(
+                func_name, ctx, number=config["number"], repeat=config["repeat"])
+            prof = ftimer(*args)
+            ret = {"mean": prof.mean, "results": list(prof.results)}
+        except Exception as err:  # pylint: disable=broad-except
+            ret = {"error": str(err)}
+        return json.dumps(ret)
+
+    def _load(path):
         # Try create a shared library in remote
         if path.endswith(".o"):
             logging.info("Create shared library based on %s", path)
@@ -64,6 +110,92 @@ def _serve_loop(sock, addr):
     logging.info("Finish serving %s", addr)
 
 
+def _warm_worker_loop(pipe, warm_devices):
+    """Worker process serving the connections sent by the master."""
+    for dev_type in warm_devices:
+        # create the device context ahead of the sessions
+        if not _context(dev_type, 0).exist:
+            logging.info("RPCServer: device %s does not exist", dev_type)
+    while True:
+        try:
+            addr = pipe.recv()
+        except EOFError:
+            break
+        if addr is None:
+            break
+        fd = reduction.recv_handle(pipe)
+        sock = socket.fromfd(fd, socket.AF_INET, socket.SOCK_STREAM)
+        os.close(fd)
+        _serve_loop(sock, addr)
+        sock.close()
+        pipe.send(True)
+
+
+class _WarmWorker(object):
+    """A pre-forked worker process serving one session at a time."""
+    def __init__(self, warm_devices):
+        self.pipe, child = multiprocessing.Pipe()
+        self.proc = multiprocessing.Process(
+            target=_warm_worker_loop, args=(child, warm_devices))
+        self.proc.daemon = True
+        self.proc.start()
+        child.close()
+        self.num_sessions = 0
+
+    def serve(self, conn, addr, timeout):
+        """Serve the connection, return whether the worker is still usable."""
+        try:
+            self.pipe.send(addr)
+            reduction.send_handle(self.pipe, conn.fileno(), self.proc.pid)
+        except (IOError, OSError):
+            return False
+        finally:
+            # close from our side.
+            conn.close()
+        self.num_sessions += 1
+        if not self.pipe.poll(timeout):
+            logging.info("RPCServer: Timeout in RPC session, kill..")
+            return False
+        try:
+            self.pipe.recv()
+        except EOFError:
+            logging.info("RPCServer: worker exited during RPC session")
+            return False
+        return True
+
+    def stop(self):
+        """Stop the worker process."""
+        try:
+            self.pipe.send(None)
+        except (IOError, OSError):
+            pass
+        self.proc.join(1)
+        if self.proc.is_alive():
+            self.proc.terminate()
+        self.pipe.close()
+
+
+class _WorkerPool(object):
+    """Pool of warm workers, recycled after max_sessions sessions or a failure.
+
+    The workers serve in turn, so a replaced worker has time to start
+    while the others serve.
+    """
+    def __init__(self, size, max_sessions, warm_devices):
+        self._max_sessions = max_sessions
+        self._warm_devices = warm_devices
+        self._workers = [_WarmWorker(warm_devices) for _ in range(size)]
+
+    def serve(self, conn, addr, timeout):
+        """Serve the connection in the next worker."""
+        worker = self._workers.pop(0)
+        usable = worker.serve(conn, addr, timeout)
+        if not usable or (self._max_sessions and worker.num_sessions >= self._max_sessions):
+            worker.stop()
+            worker = _WarmWorker(self._warm_devices)
+        self._workers.append(worker)
+
+
 def _parse_server_opt(opts):
     # parse client options
     ret = {}
@@ -73,9 +205,10 @@ def _parse_server_opt(opts):
     return ret
 
 
-def _listen_loop(sock, port, rpc_key, tracker_addr):
+def _listen_loop(sock, port, rpc_key, tracker_addr,
+                 worker_pool=0, max_sessions=0, warm_devices=(), tracker_retry_period=5):
     """Lisenting loop of the server master."""
-    def _accept_conn(listen_sock, tracker_conn, ping_period=0.1):
+    def _accept_conn(listen_sock, tracker_conn, matchkey, ping_period=0.1):
         """Accept connection from the other places.
 
         Parameters
@@ -86,12 +219,14 @@ def _listen_loop(sock, port, rpc_key, tracker_addr):
         tracker_conn : connnection to tracker
             Tracker connection
 
+        matchkey : str
+            The match key reported to the tracker.
+
         ping_period : float, optional
             ping tracker every k seconds if no connection is accepted.
         """
         # Report resource to tracker
         if tracker_conn:
-            matchkey = base.random_key(":")
             base.sendjson(tracker_conn,
                           [TrackerCode.PUT, rpc_key, (port, matchkey)])
             assert base.recvjson(tracker_conn) == TrackerCode.SUCCESS
@@ -129,11 +264,16 @@ def _listen_loop(sock, port, rpc_key, tracker_addr):
 
     # Server logic
     tracker_conn = None
+    # kept when the tracker reconnects, so the tracker can
+    # restore the resource from its state log
+    matchkey = None
+    pool = _WorkerPool(worker_pool, max_sessions, warm_devices) if worker_pool else None
     while True:
         try:
             # step 1: setup tracker and report to tracker
             if tracker_addr and tracker_conn is None:
-                tracker_conn = base.connect_with_retry(tracker_addr)
+                tracker_conn = base.connect_with_retry(
+                    tracker_addr, retry_period=tracker_retry_period)
                 tracker_conn.sendall(struct.pack("@i", base.RPC_TRACKER_MAGIC))
                 magic = struct.unpack("@i", base.recvall(tracker_conn, 4))[0]
                 if magic != base.RPC_TRACKER_MAGIC:
@@ -145,7 +285,10 @@ def _listen_loop(sock, port, rpc_key, tracker_addr):
                 assert base.recvjson(tracker_conn) == TrackerCode.SUCCESS
 
             # step 2: wait for in-coming connections
-            conn, addr, opts = _accept_conn(sock, tracker_conn)
+            if matchkey is None:
+                matchkey = base.random_key(":") if tracker_conn else ""
+            conn, addr, opts = _accept_conn(sock, tracker_conn, matchkey)
+            matchkey = None
         except (socket.error, IOError):
             # retry when tracker is dropped
             tracker_conn.close()
@@ -154,6 +297,9 @@ def _listen_loop(sock, port, rpc_key, tracker_addr):
 
         # step 3: serving
         logging.info("RPCServer: connection from %s", addr)
+        if pool:
+            pool.serve(conn, addr, opts.get("timeout", None))
+            continue
         server_proc = multiprocessing.Process(target=_serve_loop, args=(conn, addr))
         server_proc.deamon = True
         server_proc.start()
@@ -248,6 +394,23 @@ class Server(object):
 
     key : str, optional
         The key used to identify the server in Proxy connection.
+
+    worker_pool : int, optional
+        Number of pre-forked worker processes serving the sessions in turn.
+        When zero, a new process is forked for each session. The workers
+        are kept across sessions, so the sessions do not pay the process
+        and device initialization.
+
+    max_sessions : int, optional
+        Number of sessions after which a worker of the pool is replaced,
+        zero to keep it until it fails or times out.
+
+    warm_devices : list of str, optional
+        The device types initialized by the workers of the pool before
+        the first session, e.g. ["cpu", "opencl"].
+
+    tracker_retry_period : float, optional
+        Seconds between the attempts to reconnect to the tracker.
     """
     def __init__(self,
                  host,
@@ -256,7 +419,11 @@ class Server(object):
                  is_proxy=False,
                  use_popen=False,
                  tracker_addr=None,
-                 key=""):
+                 key="",
+                 worker_pool=0,
+                 max_sessions=0,
+                 warm_devices=None,
+                 tracker_retry_period=5):
         try:
             if base._ServerLoop is None:
                 raise RuntimeError("Please compile with USE_RPC=1")
@@ -274,7 +441,13 @@ class Server(object):
             if tracker_addr:
                 assert key
                 cmd += ["--tracker=%s:%d" % tracker_addr,
-                        "--key=%s" % key]
+                        "--key=%s" % key,
+                        "--tracker-retry-period=%g" % tracker_retry_period]
+            if worker_pool:
+                cmd += ["--worker-pool=%d" % worker_pool,
+                        "--max-sessions=%d" % max_sessions]
+                if warm_devices:
+                    cmd += ["--warm-devices=%s" % ",".join(warm_devices)]
             self.proc = multiprocessing.Process(
                 target=subprocess.check_call, args=(cmd,))
             self.proc.deamon = True
@@ -300,7 +473,9 @@ class Server(object):
             self.sock = sock
             self.proc = multiprocessing.Process(
                 target=_listen_loop, args=(
-                    self.sock, self.port, key, tracker_addr))
+                    self.sock, self.port, key, tracker_addr,
+                    worker_pool, max_sessions, tuple(warm_devices or ()),
+                    tracker_retry_period))
             self.proc.deamon = True
             self.proc.start()
         else:
@@ -4,6 +4,12 @@ import socket
 import errno
 from tornado import ioloop
 
+# size of each read from the socket
+_READ_SIZE = 1 << 16
+# small pending messages are joined up to this size before each send
+_WRITE_COALESCE_SIZE = 1 << 16
+
+
 class TCPHandler(object):
     """TCP socket handler backed tornado event loop.
 
@@ -17,6 +23,8 @@ class TCPHandler(object):
         self._ioloop = ioloop.IOLoop.current()
         self._sock.setblocking(0)
         self._pending_write = []
+        self._pending_bytes = 0
+        self._reading = True
         self._signal_close = False
         def _event_handler(_, events):
             self._event_handler(events)
@@ -49,8 +57,60 @@ class TCPHandler(object):
     def write_message(self, message, binary=True):
         assert binary
         self._pending_write.append(message)
+        self._pending_bytes += len(message)
         self._update_write()
 
+    def pending_bytes(self):
+        """Get the number of bytes waiting to be sent.
+
+        Returns
+        -------
+        nbytes : int
+            The size of the pending messages.
+        """
+        return self._pending_bytes
+
+    def pause_reading(self):
+        """Stop reading from the socket until resume_reading is called."""
+        if self._reading:
+            self._reading = False
+            self._update_events()
+
+    def resume_reading(self):
+        """Resume reading from the socket."""
+        if not self._reading:
+            self._reading = True
+            self._update_events()
+
+    def on_write_drained(self):
+        """Event when some pending messages are sent, can be overriden."""
+        pass
+
+    def _update_events(self):
+        if self._sock is None:
+            return
+        events = self._ioloop.ERROR
+        if self._reading:
+            events |= self._ioloop.READ
+        if self._pending_write:
+            events |= self._ioloop.WRITE
+        self._ioloop.update_handler(self._sock.fileno(), events)
+
+    def _coalesce_write(self):
+        """Join the small messages at the head of the pending queue."""
+        count = 0
+        size = 0
+        for msg in self._pending_write:
+            if count and size + len(msg) > _WRITE_COALESCE_SIZE:
+                break
+            size += len(msg)
+            count += 1
+        if count > 1:
+            buf = bytearray()
+            for msg in self._pending_write[:count]:
+                buf += msg
+            self._pending_write[:count] = [buf]
+
     def _event_handler(self, events):
         """centeral event handler"""
         if (events & self._ioloop.ERROR) or (events & self._ioloop.READ):
@@ -61,12 +121,18 @@ class TCPHandler(object):
 
     def _update_write(self):
         """Update the state on write"""
+        nbytes = self._pending_bytes
         while self._pending_write:
             try:
+                if (len(self._pending_write) > 1 and
+                        len(self._pending_write[0]) < _WRITE_COALESCE_SIZE):
+                    self._coalesce_write()
                 msg = self._pending_write[0]
                 nsend = self._sock.send(msg)
+                self._pending_bytes -= nsend
                 if nsend != len(msg):
-                    self._pending_write[0] = msg[nsend:]
+                    # keep the rest without copying it
+                    self._pending_write[0] = memoryview(msg)[nsend:]
                 else:
                     self._pending_write.pop(0)
             except socket.error as err:
@@ -74,20 +140,18 @@ class TCPHandler(object):
                     break
                 else:
                     self.on_error(err)
-        if self._pending_write:
-            self._ioloop.update_handler(
-                self._sock.fileno(), self._ioloop.READ | self._ioloop.ERROR | self._ioloop.WRITE)
-        else:
-            if self._signal_close:
-                self.close()
-            else:
-                self._ioloop.update_handler(
-                    self._sock.fileno(), self._ioloop.READ | self._ioloop.ERROR)
+                    return
+        if not self._pending_write and self._signal_close:
+            self.close()
+            return
+        self._update_events()
+        if self._pending_bytes < nbytes:
+            self.on_write_drained()
 
     def _update_read(self):
         """Update state when there is read event"""
         try:
-            msg = bytes(self._sock.recv(4096))
+            msg = bytes(self._sock.recv(_READ_SIZE))
             if msg:
                 self.on_message(msg)
                 return True
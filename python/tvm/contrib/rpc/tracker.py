@@ -22,8 +22,18 @@ List of available APIs:
 - REQUEST: request a new resource from tracker
   - input: [TrackerCode.REQUEST, [key, user, priority]]
   - return: [TrackerCode.SUCCESS, [url, port, match-key]]
+
+The order in which requests are served is decided by the scheduler of
+each key, see SCHEDULERS for the available policies.
+
+The tracker can log the resources to a state file that is replayed when
+it restarts, and probe the free resources to evict the servers that do
+not respond. A server probe is a RPC handshake with a key that never
+matches, which the server answers with RPC_CODE_MISMATCH. The replayed
+resources are always probed once when the tracker starts, and evicted
+at the first failure.
 """
-import heapq
+import os
 import time
 import logging
 import socket
@@ -31,9 +41,12 @@ import multiprocessing
 import errno
 import struct
 import json
+from datetime import timedelta
 
 try:
     from tornado import ioloop
+    from tornado import gen
+    from tornado import tcpclient
     from . import tornado_util
 except ImportError as error_msg:
     raise ImportError(
@@ -75,6 +88,32 @@ class Scheduler(object):
         """
         raise NotImplementedError()
 
+    def release(self, value):
+        """Release a resource given to a request that is not put back.
+
+        Called when the server of the resource disconnects during a session.
+
+        Parameters
+        ----------
+        value : object
+            The resource given to a request.
+        """
+
+    def remove(self, value):
+        """Remove a free resource from the scheduler.
+
+        Parameters
+        ----------
+        value : object
+            The resource to be removed.
+
+        Returns
+        -------
+        removed : bool
+            Whether the resource was free.
+        """
+        raise NotImplementedError()
+
     def summary(self):
         """Get summary information of the scheduler."""
         raise NotImplementedError()
@@ -86,13 +125,38 @@ class PriorityScheduler(Scheduler):
         self._key = key
         self._values = []
         self._requests = []
+        self._num_served = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _pick_request(self):
+        """Get the index of the next request to serve, None if none can be served."""
+        return min(range(len(self._requests)),
+                   key=lambda i: (-self._requests[i][0], self._requests[i][1]))
+
+    def _pick_value(self, request):
+        """Get the index of the free resource given to the request."""
+        # pylint: disable=unused-argument
+        return 0
+
+    def _on_serve(self, request, value):
+        """Callback when value is given to the request."""
 
     def _schedule(self):
         while self._requests and self._values:
-            value = self._values.pop(0)
-            item = heapq.heappop(self._requests)
-            callback = item[-1]
-            if not callback(value):
+            ridx = self._pick_request()
+            if ridx is None:
+                return
+            request = self._requests.pop(ridx)
+            value = self._values.pop(self._pick_value(request))
+            tstart, callback = request[1], request[3]
+            wait = time.time() - tstart
+            self._num_served += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            if callback(value):
+                self._on_serve(request, value)
+            else:
                 self._values.append(value)
 
     def put(self, value):
@@ -100,13 +164,131 @@ class PriorityScheduler(Scheduler):
         self._schedule()
 
     def request(self, user, priority, callback):
-        heapq.heappush(self._requests, (-priority, time.time(), callback))
+        self._requests.append((priority, time.time(), user, callback))
         self._schedule()
 
+    def remove(self, value):
+        if value in self._values:
+            self._values.remove(value)
+            return True
+        return False
+
     def summary(self):
         """Get summary information of the scheduler."""
         return {"free": len(self._values),
-                "pending": len(self._requests)}
+                "pending": len(self._requests),
+                "served": self._num_served,
+                "wait_mean": self._total_wait / max(self._num_served, 1),
+                "wait_max": self._max_wait}
+
+
+class FairShareScheduler(PriorityScheduler):
+    """Scheduler sharing the resources fairly between users.
+
+    Among the requests of the highest priority, the user holding the
+    fewest resources is served first, FIFO based on time between
+    requests of the same user. A resource is held by a user from the
+    time it is given until the server puts it back after the session,
+    or until the server disconnects.
+
+    Parameters
+    ----------
+    key : str
+        The key of the resources.
+
+    quotas : dict of str to int, optional
+        Maximum number of resources held at the same time by each user.
+        The requests of a user at the quota wait even if resources are free.
+    """
+    def __init__(self, key, quotas=None):
+        super(FairShareScheduler, self).__init__(key)
+        self._quotas = quotas if quotas else {}
+        self._active = {}
+        self._holder = {}
+
+    def _pick_request(self):
+        candidates = [i for i, req in enumerate(self._requests)
+                      if self._active.get(req[2], 0) < self._quotas.get(req[2], float("inf"))]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda i: (-self._requests[i][0],
+                                              self._active.get(self._requests[i][2], 0),
+                                              self._requests[i][1]))
+
+    def _on_serve(self, request, value):
+        user = request[2]
+        self._active[user] = self._active.get(user, 0) + 1
+        self._holder[tuple(value[:2])] = user
+
+    def put(self, value):
+        # the server puts the resource back after the session of the holder
+        self.release(value)
+        super(FairShareScheduler, self).put(value)
+
+    def release(self, value):
+        user = self._holder.pop(tuple(value[:2]), None)
+        if user is not None:
+            self._active[user] -= 1
+            # the user may have been at its quota
+            self._schedule()
+
+    def summary(self):
+        """Get summary information of the scheduler."""
+        res = super(FairShareScheduler, self).summary()
+        users = {}
+        for user, active in self._active.items():
+            users[user] = {"active": active, "pending": 0}
+        for req in self._requests:
+            users.setdefault(req[2], {"active": 0, "pending": 0})["pending"] += 1
+        res["users"] = users
+        return res
+
+
+class AffinityScheduler(FairShareScheduler):
+    """Fair share scheduler preferring the server a user had last time.
+
+    Repeated requests of a user are routed to the same server when it is
+    free, so the modules uploaded in previous sessions can be reused.
+
+    Parameters
+    ----------
+    key : str
+        The key of the resources.
+
+    quotas : dict of str to int, optional
+        Maximum number of resources held at the same time by each user.
+    """
+    def __init__(self, key, quotas=None):
+        super(AffinityScheduler, self).__init__(key, quotas)
+        self._last_server = {}
+        self._num_affinity_hits = 0
+
+    def _pick_value(self, request):
+        server = self._last_server.get(request[2])
+        for i, value in enumerate(self._values):
+            if tuple(value[:2]) == server:
+                return i
+        return 0
+
+    def _on_serve(self, request, value):
+        super(AffinityScheduler, self)._on_serve(request, value)
+        # only count the handoffs that succeeded
+        if self._last_server.get(request[2]) == tuple(value[:2]):
+            self._num_affinity_hits += 1
+        self._last_server[request[2]] = tuple(value[:2])
+
+    def summary(self):
+        """Get summary information of the scheduler."""
+        res = super(AffinityScheduler, self).summary()
+        res["affinity_hits"] = self._num_affinity_hits
+        return res
+
+
+SCHEDULERS = {
+    "priority": PriorityScheduler,
+    "fair": FairShareScheduler,
+    "affinity": AffinityScheduler,
+}
 
 
 class TCPEventHandler(tornado_util.TCPHandler):
@@ -160,28 +342,28 @@ class TCPEventHandler(tornado_util.TCPHandler):
             return
 
         self._data += message
-
+        # handle all the complete messages, then drop them at once
+        offset = 0
         while True:
             if self._msg_size == 0:
-                if len(self._data) >= 4:
-                    self._msg_size = struct.unpack('@i', self._data[:4])[0]
+                if len(self._data) - offset >= 4:
+                    self._msg_size = struct.unpack_from('@i', self._data, offset)[0]
                 else:
-                    return
-            if self._msg_size != 0 and len(self._data) >= self._msg_size + 4:
-                msg = py_str(bytes(self._data[4:4 + self._msg_size]))
-                del self._data[:4 + self._msg_size]
+                    break
+            if self._msg_size != 0 and len(self._data) - offset >= self._msg_size + 4:
+                msg = py_str(bytes(self._data[offset + 4:offset + 4 + self._msg_size]))
+                offset += 4 + self._msg_size
                 self._msg_size = 0
                 # pylint: disable=broad-except
                 self.call_handler(json.loads(msg))
             else:
-                return
+                break
+        del self._data[:offset]
 
     def ret_value(self, data):
         """return value to the output"""
-        data = json.dumps(data)
-        self.write_message(
-            struct.pack('@i', len(data)), binary=True)
-        self.write_message(data.encode("utf-8"), binary=True)
+        data = json.dumps(data).encode("utf-8")
+        self.write_message(struct.pack('@i', len(data)) + data, binary=True)
 
     def call_handler(self, args):
         """Event handler when json request arrives."""
@@ -189,13 +371,16 @@ class TCPEventHandler(tornado_util.TCPHandler):
         if code == TrackerCode.PUT:
             key = args[1]
             port, matchkey = args[2]
-            self._tracker.put(key, (self._addr[0], port, matchkey))
+            self._tracker.put(key, (self._addr[0], port, matchkey), self)
             self.ret_value(TrackerCode.SUCCESS)
         elif code == TrackerCode.REQUEST:
             key = args[1]
             user = args[2]
             priority = args[3]
             def _cb(value):
+                # keep the value if the client gave up the request
+                if self._sock is None:
+                    return False
                 self.ret_value([TrackerCode.SUCCESS, value])
                 return True
             self._tracker.request(key, user, priority, _cb)
@@ -220,21 +405,129 @@ class TCPEventHandler(tornado_util.TCPHandler):
 
     def on_close(self):
         self._tracker._connections.remove(self)
+        self._tracker.close_connection(self)
 
     def on_error(self, err):
         logging.info("%s: Error in RPC Tracker: %s", self.name(), err)
         self.close()
 
 
+# consecutive probe failures before a server is evicted
+_PROBE_MAX_FAILURES = 2
+# number of records appended to the state log before it is compacted
+_STATE_LOG_COMPACT = 10000
+
+
+class _StateLog(object):
+    """Append only log of the free resources of the tracker.
+
+    Each line is a json record [op, key, value] where op is
+    "put" when a resource is reported, "take" when it is given
+    to a request and "evict" when it is removed.
+
+    Parameters
+    ----------
+    path : str
+        The path to the log file.
+    """
+    def __init__(self, path):
+        self._path = path
+        self._file = None
+        self._num_records = 0
+
+    def load(self):
+        """Replay the log.
+
+        Returns
+        -------
+        free : list of tuple (key, value)
+            The free resources in the order they were reported.
+        """
+        free = []
+        if not os.path.exists(self._path):
+            return free
+        with open(self._path) as fin:
+            for line in fin:
+                try:
+                    op, key, value = json.loads(line)
+                except ValueError:
+                    # the last record can be torn by a crash
+                    continue
+                item = (key, tuple(value))
+                if op == "put":
+                    free.append(item)
+                elif item in free:
+                    free.remove(item)
+        return free
+
+    def compact(self, free):
+        """Rewrite the log with the put records of the free resources."""
+        if self._file:
+            self._file.close()
+        tmp_path = self._path + ".tmp"
+        with open(tmp_path, "w") as fout:
+            for key, value in free:
+                fout.write(json.dumps(["put", key, value]) + "\n")
+        os.rename(tmp_path, self._path)
+        self._file = open(self._path, "a")
+        self._num_records = len(free)
+
+    def append(self, op, key, value):
+        """Append a record to the log, return True when it needs compaction."""
+        self._file.write(json.dumps([op, key, value]) + "\n")
+        self._file.flush()
+        self._num_records += 1
+        return self._num_records > _STATE_LOG_COMPACT
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
 class TrackerServerHandler(object):
     """Tracker that tracks the resources."""
-    def __init__(self, sock, stop_key):
+    def __init__(self,
+                 sock,
+                 stop_key,
+                 scheduler="priority",
+                 scheduler_args=None,
+                 state_file=None,
+                 probe_interval=0,
+                 probe_timeout=5):
         self._scheduler_map = {}
+        self._scheduler = SCHEDULERS.get(scheduler, scheduler)
+        self._scheduler_args = scheduler_args if scheduler_args else {}
         self._sock = sock
         self._sock.setblocking(0)
         self._ioloop = ioloop.IOLoop.current()
         self._stop_key = stop_key
+        self._stopping = False
         self._connections = set()
+        # free resources (key, value) -> the connection that put it,
+        # None if it is replayed from the state log
+        self._free = {}
+        # resources given to requests (key, value) -> the connection that put it
+        self._taken = {}
+        self._probe_timeout = probe_timeout
+        self._probing = set()
+        # (key, host, port) -> probe statistics
+        self._latency = {}
+        self._state_log = None
+        if state_file:
+            self._state_log = _StateLog(state_file)
+            free = self._state_log.load()
+            self._state_log.compact(free)
+            for key, value in free:
+                self._put(key, value, None)
+                # the servers may have died while the tracker was down
+                self._probing.add((key, value))
+                self._ioloop.spawn_callback(self._probe, key, value)
+            logging.info("Replayed %d resources from %s", len(free), state_file)
+        if probe_interval:
+            self._probe_timer = ioloop.PeriodicCallback(
+                self._probe_all, probe_interval * 1000)
+            self._probe_timer.start()
         def _event_handler(_, events):
             self._on_event(events)
         self._ioloop.add_handler(
@@ -251,24 +544,145 @@ class TrackerServerHandler(object):
 
     def create_scheduler(self, key):
         """Create a new scheduler."""
-        return PriorityScheduler(key)
+        return self._scheduler(key, **self._scheduler_args)
+
+    def _log(self, op, key, value):
+        if self._state_log and self._state_log.append(op, key, value):
+            self._state_log.compact(list(self._free))
 
-    def put(self, key, value):
-        """Report a new resource to the tracker."""
+    def _get_scheduler(self, key):
         if key not in self._scheduler_map:
             self._scheduler_map[key] = self.create_scheduler(key)
-        self._scheduler_map[key].put(value)
+        return self._scheduler_map[key]
+
+    def _put(self, key, value, conn):
+        self._free[(key, value)] = conn
+        self._get_scheduler(key).put(value)
+
+    def put(self, key, value, conn=None):
+        """Report a new resource to the tracker.
+
+        Parameters
+        ----------
+        key : str
+            The key of the resource.
+
+        value : tuple
+            The resource, (host, port, match-key).
+
+        conn : TCPEventHandler, optional
+            The connection reporting the resource, the resource is
+            evicted when the connection closes.
+        """
+        value = tuple(value)
+        if (key, value) in self._free and self._free[(key, value)] is None:
+            # the server reports again a resource replayed from the log
+            self._free[(key, value)] = conn
+            return
+        # replayed resources of the same server are out of date
+        for item, owner in list(self._free.items()):
+            if owner is None and item[0] == key and item[1][:2] == value[:2]:
+                self.evict(*item)
+        # the session of the resource taken from the same server is over
+        for item in list(self._taken):
+            if item[0] == key and item[1][:2] == value[:2]:
+                del self._taken[item]
+        self._log("put", key, value)
+        self._put(key, value, conn)
 
     def request(self, key, user, priority, callback):
         """Request a new resource."""
-        if key not in self._scheduler_map:
-            self._scheduler_map[key] = self.create_scheduler(key)
-        self._scheduler_map[key].request(user, priority, callback)
+        def _callback(value):
+            if not callback(value):
+                return False
+            conn = self._free.pop((key, value), None)
+            if conn is not None:
+                self._taken[(key, value)] = conn
+            self._log("take", key, value)
+            return True
+        self._get_scheduler(key).request(user, priority, _callback)
+
+    def evict(self, key, value):
+        """Remove a free resource."""
+        if self._free.pop((key, value), False) is False:
+            return
+        self._get_scheduler(key).remove(value)
+        self._log("evict", key, value)
+        logging.info("Evict %s %s", key, str(value))
+
+    def close_connection(self, conn):
+        """Evict the resources reported by a closed connection.
+
+        The match keys of the resources are out of date,
+        the server reports new ones when it reconnects.
+        The resources of the connection that are given to requests
+        are released, the server will not put them back.
+        """
+        if self._stopping:
+            return
+        for item, owner in list(self._free.items()):
+            if owner is conn:
+                self.evict(*item)
+        for item, owner in list(self._taken.items()):
+            if owner is conn:
+                del self._taken[item]
+                self._get_scheduler(item[0]).release(item[1])
+
+    def _probe_all(self):
+        for item in list(self._free):
+            if item not in self._probing:
+                self._probing.add(item)
+                self._ioloop.spawn_callback(self._probe, *item)
+
+    @gen.coroutine
+    def _probe(self, key, value):
+        """Probe a free resource with a handshake that never matches."""
+        timeout = timedelta(seconds=self._probe_timeout)
+        tstart = time.time()
+        alive = False
+        try:
+            stream = yield gen.with_timeout(
+                timeout, tcpclient.TCPClient().connect(value[0], value[1]))
+            try:
+                probe_key = ("client:%s:tracker-probe" % key).encode("utf-8")
+                stream.write(struct.pack("@ii", base.RPC_MAGIC, len(probe_key)) + probe_key)
+                data = yield gen.with_timeout(timeout, stream.read_bytes(4))
+                alive = struct.unpack("@i", data)[0] == base.RPC_CODE_MISMATCH
+            finally:
+                stream.close()
+        except (IOError, socket.error, gen.TimeoutError):
+            pass
+        finally:
+            self._probing.discard((key, value))
+        stat = self._latency.setdefault(
+            (key, value[0], value[1]),
+            {"latency": None, "probes": 0, "failures": 0, "consecutive_failures": 0})
+        stat["probes"] += 1
+        if alive:
+            stat["latency"] = time.time() - tstart
+            stat["consecutive_failures"] = 0
+            return
+        stat["failures"] += 1
+        stat["consecutive_failures"] += 1
+        if (key, value) not in self._free:
+            return
+        conn = self._free[(key, value)]
+        # a replayed resource is not confirmed by its server since the restart
+        if conn is None or stat["consecutive_failures"] >= _PROBE_MAX_FAILURES:
+            self.evict(key, value)
+            stat["consecutive_failures"] = 0
+            if conn is not None:
+                # a server that is alive reconnects and reports itself again
+                conn.close()
 
     def stop(self):
         """Safely stop tracker."""
+        # keep the resources in the state log
+        self._stopping = True
         for conn in list(self._connections):
             conn.close()
+        if self._state_log:
+            self._state_log.close()
         self._sock.close()
         self._ioloop.stop()
 
@@ -283,14 +697,20 @@ class TrackerServerHandler(object):
             res = conn.summary()
             if res.get("key", "").startswith("server"):
                 cinfo.append(res)
-        return {"queue_info": qinfo, "server_info": cinfo}
+        linfo = []
+        for (key, host, port), stat in self._latency.items():
+            linfo.append({"key": key, "addr": [host, port], "latency": stat["latency"],
+                          "probes": stat["probes"], "failures": stat["failures"]})
+        return {"queue_info": qinfo, "server_info": cinfo, "server_latency": linfo}
 
     def run(self):
         """Run the tracker server"""
         self._ioloop.start()
 
-def _tracker_server(listen_sock, stop_key):
-    handler = TrackerServerHandler(listen_sock, stop_key)
+def _tracker_server(listen_sock, stop_key, scheduler, scheduler_args,
+                    state_file, probe_interval, probe_timeout):
+    handler = TrackerServerHandler(listen_sock, stop_key, scheduler, scheduler_args,
+                                   state_file, probe_interval, probe_timeout)
     handler.run()
     logging.info("Tracker Stop signal received, terminating...")
 
@@ -310,12 +730,41 @@ class Tracker(object):
 
     port_end : int, optional
         The end TCP port to search
+
+    scheduler : str or class, optional
+        The scheduling policy, a key of SCHEDULERS or a subclass of Scheduler
+        constructed with the key of the resources.
+
+    scheduler_args : dict, optional
+        Additional keyword arguments of the scheduler, e.g. quotas.
+
+    state_file : str, optional
+        Path to the log of the free resources, replayed when the tracker
+        starts so that the registered servers survive a restart.
+        The replayed resources are probed once, even if probe_interval is zero.
+
+    probe_interval : float, optional
+        Interval in seconds between the probes of the free servers,
+        unresponsive servers are evicted. Zero disables the probes.
+
+    probe_timeout : float, optional
+        Timeout of each probe in seconds.
     """
     def __init__(self,
                  host,
                  port=9190,
-                 port_end=9199):
+                 port_end=9199,
+                 scheduler="priority",
+                 scheduler_args=None,
+                 state_file=None,
+                 probe_interval=0,
+                 probe_timeout=5):
+        if isinstance(scheduler, str) and scheduler not in SCHEDULERS:
+            raise ValueError("Unknown scheduler %s" % scheduler)
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # the connections closed by a previous tracker leave the port in TIME_WAIT,
+        # a restarted tracker must get the same port back for the servers to reconnect
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.port = None
         self.stop_key = base.random_key("tracker")
         for my_port in range(port, port_end):
@@ -333,7 +782,9 @@ class Tracker(object):
         logging.info("RPCTracker: bind to %s:%d", host, self.port)
         sock.listen(1)
         self.proc = multiprocessing.Process(
-            target=_tracker_server, args=(sock, self.stop_key))
+            target=_tracker_server,
+            args=(sock, self.stop_key, scheduler, scheduler_args,
+                  state_file, probe_interval, probe_timeout))
         self.proc.start()
         self.host = host
         # close the socket on this process
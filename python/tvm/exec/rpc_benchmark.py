@@ -0,0 +1,144 @@
+"""Benchmark the throughput of the RPC tracker and proxy.
+
+e.g.
+python3 -m tvm.exec.rpc_benchmark tracker --clients 4 --number 10000
+python3 -m tvm.exec.rpc_benchmark proxy --size-mb 64 --number 4
+"""
+from __future__ import absolute_import
+
+import argparse
+import logging
+import multiprocessing
+import struct
+import time
+
+from ..contrib import rpc
+from ..contrib.rpc import base
+from ..contrib.rpc.base import TrackerCode
+
+
+def _tracker_client(args):
+    """Put and request resources in a loop, return the elapsed seconds."""
+    addr, key, number = args
+    sock = base.connect_with_retry(addr)
+    sock.sendall(struct.pack("@i", base.RPC_TRACKER_MAGIC))
+    magic = struct.unpack("@i", base.recvall(sock, 4))[0]
+    assert magic == base.RPC_TRACKER_MAGIC
+    tstart = time.time()
+    for i in range(number):
+        base.sendjson(sock, [TrackerCode.PUT, key, (9090, "%s:%d" % (key, i))])
+        assert base.recvjson(sock) == TrackerCode.SUCCESS
+        base.sendjson(sock, [TrackerCode.REQUEST, key, "", 1])
+        assert base.recvjson(sock)[0] == TrackerCode.SUCCESS
+    duration = time.time() - tstart
+    sock.close()
+    return duration
+
+
+def benchmark_tracker(addr, clients, number):
+    """Measure the request rate of a tracker.
+
+    Each client puts a resource and requests it back in a loop.
+
+    Parameters
+    ----------
+    addr : tuple
+        The address of the tracker.
+
+    clients : int
+        Number of concurrent client processes.
+
+    number : int
+        Number of requests of each client.
+
+    Returns
+    -------
+    rate : float
+        The number of requests served per second.
+    """
+    pool = multiprocessing.Pool(clients)
+    tstart = time.time()
+    pool.map(_tracker_client,
+             [(addr, "bench%d" % i, number) for i in range(clients)])
+    duration = time.time() - tstart
+    pool.close()
+    return clients * number / duration
+
+
+def benchmark_proxy(proxy_addr, size_mb, number):
+    """Measure the forwarding bandwidth of a proxy.
+
+    A server connected through the proxy receives and sends back a blob.
+
+    Parameters
+    ----------
+    proxy_addr : tuple
+        The address of the proxy.
+
+    size_mb : int
+        The size of the blob in MB.
+
+    number : int
+        Number of round trips.
+
+    Returns
+    -------
+    bandwidth : float
+        The bandwidth in MB per second, counting both directions.
+    """
+    server = rpc.Server(proxy_addr[0], proxy_addr[1], is_proxy=True, key="bench")
+    # wait for the server to connect to the proxy
+    time.sleep(0.5)
+    remote = rpc.connect(proxy_addr[0], proxy_addr[1], key="bench")
+    blob = bytearray(size_mb << 20)
+    tstart = time.time()
+    for _ in range(number):
+        remote.upload(blob, "blob.bin")
+        remote.download("blob.bin")
+    duration = time.time() - tstart
+    server.terminate()
+    return 2 * size_mb * number / duration
+
+
+def main():
+    """Main funciton"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('mode', choices=["tracker", "proxy"],
+                        help='The component to benchmark')
+    parser.add_argument('--host', type=str, default="",
+                        help='The host of a running tracker or proxy, start one if empty')
+    parser.add_argument('--port', type=int, default=9190,
+                        help='The port of the running tracker or proxy')
+    parser.add_argument('--clients', type=int, default=1,
+                        help='Number of concurrent tracker clients')
+    parser.add_argument('--number', type=int, default=1000,
+                        help='Number of requests per client or proxy round trips')
+    parser.add_argument('--size-mb', type=int, default=16,
+                        help='The size of the blob sent through the proxy')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    local = None
+    if args.mode == "tracker":
+        if not args.host:
+            from ..contrib.rpc.tracker import Tracker
+            local = Tracker("localhost", port=args.port, port_end=args.port + 100)
+            addr = ("localhost", local.port)
+        else:
+            addr = (args.host, args.port)
+        rate = benchmark_tracker(addr, args.clients, args.number)
+        print("Tracker: %.1f requests/sec with %d clients" % (rate, args.clients))
+    else:
+        if not args.host:
+            from ..contrib.rpc.proxy import Proxy
+            local = Proxy("localhost", port=args.port, port_end=args.port + 100)
+            addr = ("localhost", local.port)
+        else:
+            addr = (args.host, args.port)
+        bandwidth = benchmark_proxy(addr, args.size_mb, args.number)
+        print("Proxy: %.1f MB/sec" % bandwidth)
+    if local:
+        local.terminate()
+
+if __name__ == "__main__":
+    main()
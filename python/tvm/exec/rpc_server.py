@@ -25,6 +25,14 @@ def main():
                         help="Additional library to load")
     parser.add_argument('--tracker', type=str, default="",
                         help="Report to RPC tracker")
+    parser.add_argument('--tracker-retry-period', type=float, default=5,
+                        help="Seconds between the attempts to reconnect to the tracker")
+    parser.add_argument('--worker-pool', type=int, default=0,
+                        help="Number of pre-forked worker processes, 0 to fork per session")
+    parser.add_argument('--max-sessions', type=int, default=0,
+                        help="Number of sessions after which a worker is replaced")
+    parser.add_argument('--warm-devices', type=str, default="",
+                        help="Comma separated device types initialized by the workers")
     args = parser.parse_args()
 
     logging.basicConfig(level=logging.INFO)
@@ -53,7 +61,11 @@ def main():
                         args.port,
                         args.port_end,
                         key=args.key,
-                        tracker_addr=tracker_addr)
+                        tracker_addr=tracker_addr,
+                        tracker_retry_period=args.tracker_retry_period,
+                        worker_pool=args.worker_pool,
+                        max_sessions=args.max_sessions,
+                        warm_devices=[x for x in args.warm_devices.split(",") if x])
     server.libs += libs
     server.proc.join()
 
@@ -3,7 +3,7 @@ from __future__ import absolute_import
 
 import logging
 import argparse
-from ..contrib.rpc.tracker import Tracker
+from ..contrib.rpc.tracker import Tracker, SCHEDULERS
 
 def main():
     """Main funciton"""
@@ -12,9 +12,26 @@ def main():
                         help='the hostname of the tracker')
     parser.add_argument('--port', type=int, default=9190,
                         help='The port of the PRC')
+    parser.add_argument('--scheduler', type=str, default="priority",
+                        choices=sorted(SCHEDULERS.keys()),
+                        help='The scheduling policy of the requests')
+    parser.add_argument('--quota', type=str, action='append', default=[],
+                        help='Maximum number of servers held by a user, as user=num')
+    parser.add_argument('--state-file', type=str, default=None,
+                        help='Log of the registered servers, replayed and probed on restart')
+    parser.add_argument('--probe-interval', type=float, default=0,
+                        help='Seconds between the health probes of the free servers, 0 to disable')
     args = parser.parse_args()
     logging.basicConfig(level=logging.INFO)
-    tracker = Tracker(args.host, port=args.port)
+    scheduler_args = {}
+    if args.quota:
+        if args.scheduler == "priority":
+            raise ValueError("--quota requires the fair or affinity scheduler")
+        scheduler_args["quotas"] = {
+            user: int(num) for user, num in (x.split("=") for x in args.quota)}
+    tracker = Tracker(args.host, port=args.port,
+                      scheduler=args.scheduler, scheduler_args=scheduler_args,
+                      state_file=args.state_file, probe_interval=args.probe_interval)
     tracker.proc.join()
 
 if __name__ == "__main__":
@@ -8,7 +8,7 @@ from ._ffi.function import ModuleBase, _set_class_module
 from ._ffi.function import _init_api
 from .contrib import cc as _cc, tar as _tar, util as _util
 
-ProfileResult = namedtuple("ProfileResult", ["mean", "results"])
+ProfileResult = namedtuple("ProfileResult", ["mean", "results", "median", "std", "min", "max"])
 
 
 class Module(ModuleBase):
@@ -74,7 +74,8 @@ class Module(ModuleBase):
                        **kwargs):
         """Export the module and its imported device code one library.
 
-        This function only works on host llvm modules.
+        This function only works on host llvm modules, or on the dso
+        modules that keep the objects they were linked from.
         It will pack all the imported modules
 
         Parameters
@@ -94,17 +95,23 @@ class Module(ModuleBase):
             raise ValueError("Module[%s]: export_library requires llvm module,"
                              " did you build with LLVM enabled?" % self.type_key)
 
-        if self.type_key != "llvm":
-            raise ValueError("Module[%s]: Only llvm support export shared" % self.type_key)
         temp = _util.tempdir()
         if fcompile is not None and hasattr(fcompile, "object_format"):
             object_format = fcompile.object_format
         else:
             object_format = "o"
-        path_obj = temp.relpath("lib." + object_format)
-        self.save(path_obj)
-        files = [path_obj]
-        is_system_lib = self.get_function("__tvm_is_system_module")()
+        if self.type_key == "llvm":
+            path_obj = temp.relpath("lib." + object_format)
+            self.save(path_obj)
+            files = [path_obj]
+        elif getattr(self, "host_objects", None) and object_format == "o":
+            # dso module built from objects, e.g. with build_config(build_jobs=N)
+            files = list(self.host_objects)
+        else:
+            raise ValueError("Module[%s]: Only llvm support export shared" % self.type_key)
+        # the parallel build skips system libs, so a dso module is never one
+        is_system_lib = (self.type_key == "llvm" and
+                         self.get_function("__tvm_is_system_module")())
         if self.imported_modules:
             path_cc = temp.relpath("devc.cc")
             with open(path_cc, "w") as f:
@@ -117,7 +124,8 @@ class Module(ModuleBase):
                 fcompile = _cc.create_shared
         fcompile(file_name, files, **kwargs)
 
-    def time_evaluator(self, func_name, ctx, number, repeat=1):
+    def time_evaluator(self, func_name, ctx, number, repeat=1,
+                       min_repeat_ms=0, warmup=1, flush_cache=False):
         """Get an evaluator that measures time cost of running function.
 
         Parameters
@@ -135,29 +143,50 @@ class Module(ModuleBase):
             Number of times to run the timer measurement
             If repeat equals 3, then we will get 3 numbers in the ProfileResult.
 
+        min_repeat_ms: int, optional
+            Minimum duration of each timer measurement in milliseconds.
+            When a measurement is shorter, number is scaled up and the
+            measurement is run again, so that small kernels are not
+            dominated by the timer overhead.
+
+        warmup: int, optional
+            Number of calls before the measurements, which are discarded
+            in case there is lazy initialization.
+
+        flush_cache: bool, optional
+            Whether to flush the cpu cache before each measurement, so the
+            first call of each measurement does not run on cache hot data.
+            Use number=1 to measure cold calls only. Ignored on non-cpu context.
+
         Note
         ----
-        The function will be invoked  repeat * number + 1 times,
-        with the first call discarded in case there is lazy initialization.
+        The function will be invoked  repeat * number + warmup times,
+        with the warmup calls discarded.
 
         Returns
         -------
         ftimer : Function
             The function that takes same argument as func
-            and return a float representing seconds per function call.
+            and return a ProfileResult of the mean, median, std, min and
+            max seconds per function call over the repeats.
         """
         try:
             feval = _RPCTimeEvaluator(
-                self, func_name, ctx.device_type, ctx.device_id, number, repeat)
+                self, func_name, ctx.device_type, ctx.device_id, number, repeat,
+                min_repeat_ms, warmup, flush_cache)
 
             def evaluator(*args):
                 """Internal wrapped evaluator."""
-                # Wrap feval so we can add more stats in future.
                 blob = feval(*args)
                 fmt = "@" + ("d" * repeat)
                 results = struct.unpack(fmt, blob)
                 mean = sum(results) / float(repeat)
-                return ProfileResult(mean=mean, results=results)
+                ordered = sorted(results)
+                half = repeat // 2
+                median = ordered[half] if repeat % 2 else (ordered[half - 1] + ordered[half]) / 2
+                std = (sum((x - mean) ** 2 for x in results) / float(repeat)) ** 0.5
+                return ProfileResult(mean=mean, results=results, median=median, std=std,
+                                     min=ordered[0], max=ordered[-1])
 
             return evaluator
         except NameError:
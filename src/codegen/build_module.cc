@@ -518,7 +518,11 @@ TVM_STATIC_IR_FUNCTOR(IRPrinter, vtable)
   p->stream << "restricted_func=" << op->restricted_func << ", ";
   p->stream << "detect_global_barrier=" << op->detect_global_barrier << ", ";
   p->stream << "partition_const_loop=" << op->partition_const_loop << ", ";
-  p->stream << "dump_pass_ir=" << op->dump_pass_ir;
+  p->stream << "dump_pass_ir=" << op->dump_pass_ir << ", ";
+  p->stream << "build_cache_dir=" << op->build_cache_dir << ", ";
+  p->stream << "build_cache_max_mb=" << op->build_cache_max_mb << ", ";
+  p->stream << "build_jobs=" << op->build_jobs << ", ";
+  p->stream << "profile_pass=" << op->profile_pass;
   p->stream << ")";
 });
 
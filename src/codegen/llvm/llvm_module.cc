@@ -260,6 +260,23 @@ TVM_REGISTER_API("module.loadfile_ll")
     *rv = runtime::Module(n);
   });
 
+TVM_REGISTER_API("codegen.llvm_version")
+.set_body([](TVMArgs args, TVMRetValue* rv) {
+    *rv = TVM_LLVM_VERSION;
+  });
+
+TVM_REGISTER_API("codegen.llvm_host_cpu")
+.set_body([](TVMArgs args, TVMRetValue* rv) {
+    *rv = llvm::sys::getHostCPUName().str();
+  });
+
+TVM_REGISTER_API("codegen.llvm_host_has_feature")
+.set_body([](TVMArgs args, TVMRetValue* rv) {
+    llvm::StringMap<bool> features;
+    std::string name = args[0];
+    *rv = llvm::sys::getHostCPUFeatures(features) && features.lookup(name);
+  });
+
 TVM_REGISTER_API("codegen.llvm_target_enabled")
 .set_body([](TVMArgs args, TVMRetValue* rv) {
     InitializeLLVM();
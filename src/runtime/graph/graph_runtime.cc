@@ -4,10 +4,28 @@
  */
 #include <tvm/runtime/packed_func.h>
 #include <tvm/runtime/registry.h>
+#include <tvm/runtime/device_api.h>
+#include <tvm/runtime/c_backend_api.h>
+#include <tvm/runtime/threading_backend.h>
 #include <dmlc/memory_io.h>
 #include <dmlc/json.h>
+#include <algorithm>
+#include <chrono>
+#include <cmath>
+#include <functional>
 #include <numeric>
+#include <memory>
+#include <mutex>
+#include <unordered_map>
+#include <unordered_set>
+#if !defined(_WIN32) && !defined(_LIBCPP_SGX_CONFIG)
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#endif
 #include "./graph_runtime.h"
+#include "../file_util.h"
 
 namespace tvm {
 namespace runtime {
@@ -30,7 +48,9 @@ class GraphRuntime : public ModuleNode {
  public:
   ~GraphRuntime() {
     for (DLTensor* t : storage_pool_) {
-      TVM_CCALL(TVMArrayFree(t));
+      if (t != nullptr) {
+        TVM_CCALL(TVMArrayFree(t));
+      }
     }
   }
   /*!
@@ -50,20 +70,66 @@ class GraphRuntime : public ModuleNode {
     return "GraphRuntime";
   }
   void Run() {
+    if (level_tasks_.size() != 0) {
+      this->RunParallel();
+      return;
+    }
     // setup the array and requirements.
     for (size_t i = 0; i < op_execs_.size(); ++i) {
       if (op_execs_[i]) op_execs_[i]();
     }
   }
+  /*!
+   * \brief Run the graph level by level on the thread pool.
+   *
+   *  The nodes of a level are independent and run concurrently, each
+   *  on a single thread. A level of one node runs in the calling thread,
+   *  so the operator can use all the threads of the pool.
+   */
+  void RunParallel();
+#ifndef _LIBCPP_SGX_NO_IOSTREAMS
+  /*!
+   * \brief Run the graph number times and time each operator.
+   *
+   *  The device is synchronized after each operator on non-CPU context,
+   *  so the time of an operator does not include the previous ones.
+   *
+   * \param number The number of runs to aggregate.
+   * \return JSON array with one object per operator node, holding
+   *  the node name, function name, argument shapes, the mean, median and
+   *  standard deviation of the time in seconds and the bytes of the arguments.
+   */
+  std::string RunProfile(int number);
+#endif
+  /*!
+   * \brief Run the graph with kernels launched on stream.
+   * \param stream The stream of the context, nullptr for the default stream.
+   */
+  void Run(TVMStreamHandle stream) {
+    if (stream == nullptr) {
+      this->Run();
+      return;
+    }
+    TVM_CCALL(TVMSetStream(ctx_.device_type, ctx_.device_id, stream));
+    this->Run();
+    TVM_CCALL(TVMSetStream(ctx_.device_type, ctx_.device_id, nullptr));
+  }
   /*!
    * \brief Initialize the graph executor with graph and context.
    * \param graph_json The execution graph.
    * \param module The module containing the compiled functions.
    * \param ctx The context where the graph should sit on
+   * \param plan_memory Whether to pack the entries into one arena by their
+   *  lifetimes instead of using the storage plan in the graph.
+   * \param inter_op_threads Number of threads running independent nodes
+   *  concurrently, 0 to run the nodes sequentially, negative to use all
+   *  the threads of the pool. Implies plan_memory.
    */
   void Init(const std::string& graph_json,
             tvm::runtime::Module module,
-            TVMContext ctx) {
+            TVMContext ctx,
+            bool plan_memory = false,
+            int inter_op_threads = 0) {
 #ifndef _LIBCPP_SGX_NO_IOSTREAMS
     std::istringstream is(graph_json);
 #else
@@ -73,9 +139,53 @@ class GraphRuntime : public ModuleNode {
     this->Load(&reader);
     module_ = module;
     ctx_ = ctx;
+    plan_memory_ = plan_memory;
+    inter_op_threads_ = inter_op_threads;
+    this->SetupSchedule();
     this->SetupStorage();
     this->SetupOpExecs();
   }
+  /*!
+   * \brief Create an execution instance of the same graph.
+   *
+   *  The instance shares the compiled module and the storage of the
+   *  parameters loaded by LoadParams, and owns the storage of all
+   *  other entries, so instances can run concurrently in different threads.
+   *  Parameters loaded later are propagated to the instances, including
+   *  the instances created from an instance, the loading must not run
+   *  concurrently with them.
+   *
+   * \param sptr_to_self The pointer to this module node, kept alive by the instance.
+   * \return The created instance.
+   */
+  Module CreateInstance(const std::shared_ptr<ModuleNode>& sptr_to_self) {
+    std::shared_ptr<GraphRuntime> exec = std::make_shared<GraphRuntime>();
+    exec->nodes_ = nodes_;
+    exec->input_nodes_ = input_nodes_;
+    exec->node_row_ptr_ = node_row_ptr_;
+    exec->outputs_ = outputs_;
+    exec->attrs_ = attrs_;
+    exec->module_ = module_;
+    exec->ctx_ = ctx_;
+    exec->param_eids_ = param_eids_;
+    exec->plan_memory_ = plan_memory_;
+    exec->inter_op_threads_ = inter_op_threads_;
+    exec->node_level_ = node_level_;
+    exec->level_tasks_ = level_tasks_;
+    exec->parent_ = sptr_to_self;
+    exec->SetupStorage(this);
+    exec->SetupOpExecs();
+    // Only the root loads parameters, so the instances of instances are kept on it.
+    GraphRuntime* root = this;
+    while (root->parent_ != nullptr) {
+      root = static_cast<GraphRuntime*>(root->parent_.get());
+    }
+    {
+      std::lock_guard<std::mutex> lock(root->instances_mutex_);
+      root->instances_.push_back(exec);
+    }
+    return Module(exec);
+  }
   /*!
    * \brief Get the input index given the name of input.
    * \param name The name of the input.
@@ -95,11 +205,12 @@ class GraphRuntime : public ModuleNode {
    * \brief set index-th input to the graph.
    * \param index The input index.
    * \param data_in The input data.
+   * \param stream The stream the copy is enqueued on, nullptr for the default stream.
    */
-  void SetInput(int index, DLTensor* data_in) {
+  void SetInput(int index, DLTensor* data_in, TVMStreamHandle stream = nullptr) {
     CHECK_LT(static_cast<size_t>(index), input_nodes_.size());
     uint32_t eid = this->entry_id(input_nodes_[index], 0);
-    TVM_CCALL(TVMArrayCopyFromTo(data_in, &data_entry_[eid], nullptr));
+    TVM_CCALL(TVMArrayCopyFromTo(data_in, &data_entry_[eid], stream));
   }
   /*!
    * \brief Copy index-th input to data_out
@@ -115,11 +226,12 @@ class GraphRuntime : public ModuleNode {
    * \brief Copy index-th output to data_out.
    * \param index The output index.
    * \param data_out the output data.
+   * \param stream The stream the copy is enqueued on, nullptr for the default stream.
    */
-  void GetOutput(int index, DLTensor* data_out) {
+  void GetOutput(int index, DLTensor* data_out, TVMStreamHandle stream = nullptr) {
     CHECK_LT(static_cast<size_t>(index), outputs_.size());
     uint32_t eid = this->entry_id(outputs_[index]);
-    TVM_CCALL(TVMArrayCopyFromTo(&data_entry_[eid], data_out, nullptr));
+    TVM_CCALL(TVMArrayCopyFromTo(&data_entry_[eid], data_out, stream));
   }
 #ifdef TVM_GRAPH_RUNTIME_DEBUG
   /*!
@@ -162,8 +274,10 @@ class GraphRuntime : public ModuleNode {
   /*!
    * \brief Load parameters from binary stream
    * \param strm The input stream.
+   * \param mapped_base If not nullptr, strm is a memory stream over the
+   *  memory starting at mapped_base, where the parameters can be bound to.
    */
-  void LoadParams(dmlc::Stream* strm);
+  void LoadParams(dmlc::Stream* strm, char* mapped_base = nullptr);
   /*!
    * \brief Load parameters from parameter blob.
    * \param param_blob A binary blob of parameter.
@@ -172,6 +286,16 @@ class GraphRuntime : public ModuleNode {
     dmlc::MemoryStringStream strm(const_cast<std::string*>(&param_blob));
     this->LoadParams(&strm);
   }
+  /*!
+   * \brief Load parameters from a parameter file.
+   *
+   *  The file is memory mapped. On CPU context, the parameters whose data is
+   *  suitably aligned in the file are bound to the mapped pages directly
+   *  instead of being copied into the storage pool.
+   *
+   * \param path The path to the parameter file.
+   */
+  void LoadParamsFromFile(const std::string& path);
 
  private:
   // Node entry
@@ -342,9 +466,52 @@ class GraphRuntime : public ModuleNode {
       }
       CHECK_EQ(bitmask, 1|2|4|8|16) << "invalid format";
   }
-  void LoadDLTensor(dmlc::Stream* strm, DLTensor* tensor);
-  /*! \brief Setup the temporal storage */
-  void SetupStorage();
+  /*!
+   * \brief Load a DLTensor from stream into tensor.
+   * \param strm The input stream.
+   * \param tensor The destination tensor.
+   * \param mapped_base Base address of strm if it is a memory stream, nullptr otherwise.
+   * \return Whether tensor is bound to the memory of strm instead of copied.
+   */
+  bool LoadDLTensor(dmlc::Stream* strm, DLTensor* tensor, char* mapped_base = nullptr);
+  /*!
+   * \brief Make the instances see the parameters after they are loaded.
+   *
+   *  The shared entries follow the entries of this runtime, which may be
+   *  rebound to a mapped file, and the private copies are updated.
+   * \param eids The loaded entries.
+   */
+  void UpdateInstances(const std::vector<uint32_t>& eids);
+  /*!
+   * \brief Setup the temporal storage
+   * \param parent The runtime whose parameter storage is shared, nullptr if none.
+   */
+  void SetupStorage(const GraphRuntime* parent = nullptr);
+  /*!
+   * \brief Group the entries that must share memory when re-planning storage.
+   * \return The storage group of each entry.
+   */
+  std::vector<uint32_t> PlanStorageGroups();
+  /*!
+   * \brief Assign offsets of storage groups in one arena by their lifetimes.
+   * \param group The storage group of each entry.
+   * \param group_bytes The size of each group.
+   * \param skip Whether each group is excluded from the arena.
+   * \param group_offset The offset of each group in the arena.
+   * \return The size of the arena.
+   */
+  size_t PlanStorageOffsets(const std::vector<uint32_t>& group,
+                            const std::vector<size_t>& group_bytes,
+                            const std::vector<bool>& skip,
+                            std::vector<size_t>* group_offset);
+  /*!
+   * \brief Setup the static schedule of the inter-op parallel execution.
+   *
+   *  A node is in the level after the deepest of its inputs. The nodes
+   *  of each level are assigned to the tasks greedily, largest first,
+   *  with the number of elements of the arguments as the cost.
+   */
+  void SetupSchedule();
   /*! \brief Setup the executors */
   void SetupOpExecs();
   /*!
@@ -387,8 +554,35 @@ class GraphRuntime : public ModuleNode {
   tvm::runtime::Module module_;
   /*! \brief execution context */
   TVMContext ctx_;
-  /*! \brief common storage pool */
+  /*!
+   * \brief common storage pool, nullptr if the entries in the storage
+   *  are bound to memory owned elsewhere.
+   */
   std::vector<DLTensor*> storage_pool_;
+  /*! \brief index in storage_pool_ of each entry, -1 if bound elsewhere */
+  std::vector<int> entry_pool_;
+  /*! \brief whether to re-plan the storage instead of the plan in the graph */
+  bool plan_memory_{false};
+  /*! \brief bytes of each storage pool */
+  std::vector<size_t> pool_bytes_;
+  /*! \brief total bytes of the allocated storage pools */
+  size_t storage_bytes_{0};
+  /*! \brief number of threads of the inter-op parallel execution, 0 if sequential */
+  int inter_op_threads_{0};
+  /*! \brief level of each node in the inter-op parallel execution */
+  std::vector<uint32_t> node_level_;
+  /*! \brief nodes run by each task of each level, empty if sequential */
+  std::vector<std::vector<std::vector<uint32_t> > > level_tasks_;
+  /*! \brief memory mapped parameter files the entries can be bound to, and their sizes */
+  std::vector<std::pair<std::shared_ptr<void>, size_t> > mapped_params_;
+  /*! \brief entries whose content is loaded by LoadParams */
+  std::unordered_set<uint32_t> param_eids_;
+  /*! \brief the runtime this instance shares parameters with */
+  std::shared_ptr<ModuleNode> parent_;
+  /*! \brief the instances sharing the parameters of this root runtime, nested ones included */
+  std::vector<std::weak_ptr<GraphRuntime> > instances_;
+  /*! \brief mutex guarding instances_ */
+  std::mutex instances_mutex_;
   /*! \brief data entry of each node */
   std::vector<DLTensor> data_entry_;
   /*! \brief operator on each node */
@@ -396,7 +590,7 @@ class GraphRuntime : public ModuleNode {
 };
 
 
-void GraphRuntime::LoadDLTensor(dmlc::Stream* strm, DLTensor* dst) {
+bool GraphRuntime::LoadDLTensor(dmlc::Stream* strm, DLTensor* dst, char* mapped_base) {
   uint64_t header, reserved;
   CHECK(strm->Read(&header, sizeof(header)))
       << "Invalid DLTensor file format";
@@ -434,13 +628,27 @@ void GraphRuntime::LoadDLTensor(dmlc::Stream* strm, DLTensor* dst) {
       << "Invalid DLTensor file format";
   CHECK(data_byte_size == size)
       << "Invalid DLTensor file format";
+  if (mapped_base != nullptr) {
+    dmlc::SeekStream* mstrm = static_cast<dmlc::SeekStream*>(strm);
+    char* data = mapped_base + mstrm->Tell();
+    mstrm->Seek(mstrm->Tell() + data_byte_size);
+    if (dst->ctx.device_type == kDLCPU &&
+        reinterpret_cast<uintptr_t>(data) % kAllocAlignment == 0) {
+      dst->data = data;
+      dst->byte_offset = 0;
+      return true;
+    }
+    TVM_CCALL(TVMArrayCopyFromBytes(dst, data, data_byte_size));
+    return false;
+  }
   std::vector<uint8_t> bytes(data_byte_size + 1);
   CHECK(strm->Read(&bytes[0], data_byte_size))
       << "Invalid DLTensor file format";
   TVM_CCALL(TVMArrayCopyFromBytes(dst, &bytes[0], data_byte_size));
+  return false;
 }
 
-void GraphRuntime::LoadParams(dmlc::Stream* strm) {
+void GraphRuntime::LoadParams(dmlc::Stream* strm, char* mapped_base) {
   uint64_t header, reserved;
   CHECK(strm->Read(&header))
       << "Invalid parameters file format";
@@ -458,25 +666,110 @@ void GraphRuntime::LoadParams(dmlc::Stream* strm) {
 
   CHECK(size == names.size())
       << "Invalid parameters file format";
+  CHECK(parent_ == nullptr)
+      << "Cannot load parameters into an instance that shares parameters";
+  std::unordered_set<uint32_t> bound_eids;
+  std::vector<uint32_t> loaded_eids;
   for (size_t i = 0; i < size; ++i) {
     int in_idx = GetInputIndex(names[i]);
     CHECK_GE(in_idx, 0) << "Found param for non-existent input: " << names[i];
     uint32_t eid = this->entry_id(input_nodes_[in_idx], 0);
     CHECK_LT(eid, data_entry_.size());
-    LoadDLTensor(strm, &data_entry_[eid]);
+    if (LoadDLTensor(strm, &data_entry_[eid], mapped_base)) {
+      bound_eids.insert(eid);
+    }
+    param_eids_.insert(eid);
+    loaded_eids.push_back(eid);
+  }
+  for (uint32_t eid : bound_eids) {
+    entry_pool_[eid] = -1;
+  }
+  // Rebind the instances before the storage they may refer to is released.
+  this->UpdateInstances(loaded_eids);
+  if (bound_eids.size() == 0) return;
+  // Release the pool storage that is no longer referred by any entry.
+  std::vector<bool> unused(storage_pool_.size(), true);
+  for (int pool : entry_pool_) {
+    if (pool >= 0) unused[pool] = false;
+  }
+  storage_bytes_ = 0;
+  for (size_t i = 0; i < storage_pool_.size(); ++i) {
+    if (unused[i] && storage_pool_[i] != nullptr) {
+      TVM_CCALL(TVMArrayFree(storage_pool_[i]));
+      storage_pool_[i] = nullptr;
+    }
+    if (storage_pool_[i] != nullptr) storage_bytes_ += pool_bytes_[i];
+  }
+  // The executors hold copies of the entries, rebuild them.
+  this->SetupOpExecs();
+}
+
+void GraphRuntime::UpdateInstances(const std::vector<uint32_t>& eids) {
+  std::lock_guard<std::mutex> lock(instances_mutex_);
+  std::vector<std::weak_ptr<GraphRuntime> > alive;
+  for (const auto& weak : instances_) {
+    std::shared_ptr<GraphRuntime> inst = weak.lock();
+    if (inst == nullptr) continue;
+    for (uint32_t eid : eids) {
+      if (inst->entry_pool_[eid] < 0) {
+        inst->data_entry_[eid].data = data_entry_[eid].data;
+        inst->data_entry_[eid].byte_offset = data_entry_[eid].byte_offset;
+      } else {
+        TVM_CCALL(TVMArrayCopyFromTo(&data_entry_[eid], &inst->data_entry_[eid], nullptr));
+      }
+    }
+    inst->SetupOpExecs();
+    alive.push_back(weak);
   }
+  instances_.swap(alive);
+}
+
+void GraphRuntime::LoadParamsFromFile(const std::string& path) {
+#if defined(_LIBCPP_SGX_CONFIG)
+  LOG(FATAL) << "SGX does not support LoadParamsFromFile";
+#elif defined(_WIN32)
+  std::string param_blob;
+  LoadBinaryFromFile(path, &param_blob);
+  this->LoadParams(param_blob);
+#else
+  int fd = open(path.c_str(), O_RDONLY);
+  CHECK_GE(fd, 0) << "Cannot open parameter file " << path;
+  struct stat st;
+  CHECK_EQ(fstat(fd, &st), 0) << "Cannot stat parameter file " << path;
+  size_t size = static_cast<size_t>(st.st_size);
+  // private writable mapping, writes to bound parameters are copy-on-write.
+  void* addr = mmap(nullptr, size, PROT_READ | PROT_WRITE, MAP_PRIVATE, fd, 0);
+  close(fd);
+  CHECK(addr != MAP_FAILED) << "Cannot mmap parameter file " << path;
+  std::shared_ptr<void> mapped(addr, [size](void* p) { munmap(p, size); });
+  dmlc::MemoryFixedSizeStream strm(addr, size);
+  this->LoadParams(&strm, static_cast<char*>(addr));
+  mapped_params_.emplace_back(mapped, size);
+  // Release the mappings of earlier files whose parameters are all replaced.
+  std::vector<std::pair<std::shared_ptr<void>, size_t> > used;
+  for (const auto& m : mapped_params_) {
+    const char* begin = static_cast<const char*>(m.first.get());
+    for (size_t eid = 0; eid < data_entry_.size(); ++eid) {
+      const char* data = static_cast<const char*>(data_entry_[eid].data);
+      if (entry_pool_[eid] < 0 && data >= begin && data < begin + m.second) {
+        used.push_back(m);
+        break;
+      }
+    }
+  }
+  mapped_params_.swap(used);
+#endif
 }
 
-void GraphRuntime::SetupStorage() {
+void GraphRuntime::SetupStorage(const GraphRuntime* parent) {
   // Grab saved optimization plan from graph.
   std::vector<TVMType> vtype;
   for (const std::string& s_type : attrs_.dltype) {
     vtype.push_back(tvm::runtime::String2TVMType(s_type));
   }
   data_entry_.resize(num_node_entries());
-  // size of each storage pool entry
-  std::vector<size_t> pool_entry_bytes;
-  // Find the maximum space size.
+  // size of each entry
+  std::vector<size_t> entry_bytes;
   for (size_t i = 0; i < attrs_.shape.size(); ++i) {
     int storage_id = attrs_.storage_id[i];
     size_t size = 1;
@@ -487,31 +780,360 @@ void GraphRuntime::SetupStorage() {
     DLDataType t = vtype[i];
     size_t bits = t.bits * t.lanes;
     CHECK_EQ(bits % 8U, 0U);
-    size_t bytes = (bits / 8U) * size;
-
-    size_t sid = static_cast<size_t>(storage_id);
-    if (sid >= pool_entry_bytes.size()) {
-      pool_entry_bytes.resize(sid + 1, 0);
+    entry_bytes.push_back((bits / 8U) * size);
+  }
+  if (plan_memory_ &&
+      ctx_.device_type != kDLCPU &&
+      ctx_.device_type != kDLGPU &&
+      ctx_.device_type != kDLROCM) {
+    LOG(WARNING) << "Memory planning requires addressable device memory, "
+                 << "use the storage plan of the graph instead";
+    plan_memory_ = false;
+  }
+  // The entries of a storage group share the same memory.
+  std::vector<uint32_t> group;
+  if (plan_memory_) {
+    group = this->PlanStorageGroups();
+  } else {
+    group.assign(attrs_.storage_id.begin(), attrs_.storage_id.end());
+  }
+  uint32_t num_groups = 0;
+  for (uint32_t g : group) {
+    num_groups = std::max(num_groups, g + 1);
+  }
+  // size of each storage group
+  std::vector<size_t> group_bytes(num_groups, 0);
+  for (size_t i = 0; i < group.size(); ++i) {
+    group_bytes[group[i]] = std::max(group_bytes[group[i]], entry_bytes[i]);
+  }
+  // A group can be shared with the parent only if it holds nothing but parameters.
+  std::vector<bool> shared(num_groups, parent != nullptr);
+  for (size_t i = 0; i < group.size(); ++i) {
+    if (param_eids_.count(static_cast<uint32_t>(i)) == 0) {
+      shared[group[i]] = false;
     }
-    pool_entry_bytes[sid] = std::max(pool_entry_bytes[sid], bytes);
   }
   // Allocate the space.
-  for (size_t i = 0; i < pool_entry_bytes.size(); ++i) {
-    int64_t shape[] = {static_cast<int64_t>(pool_entry_bytes[i] + 3) / 4};
+  std::vector<int> group_pool(num_groups, -1);
+  std::vector<size_t> group_offset(num_groups, 0);
+  std::vector<size_t> pool_bytes;
+  if (plan_memory_) {
+    // Pack all the groups into one arena.
+    size_t arena_bytes = this->PlanStorageOffsets(group, group_bytes, shared, &group_offset);
+    for (uint32_t g = 0; g < num_groups; ++g) {
+      if (!shared[g]) group_pool[g] = 0;
+    }
+    pool_bytes.push_back(arena_bytes);
+  } else {
+    for (uint32_t g = 0; g < num_groups; ++g) {
+      if (shared[g]) {
+        // the entries refer to the memory of the parent
+        pool_bytes.push_back(0);
+      } else {
+        group_pool[g] = static_cast<int>(pool_bytes.size());
+        pool_bytes.push_back(group_bytes[g]);
+      }
+    }
+  }
+  std::vector<bool> pool_used(pool_bytes.size(), false);
+  for (int pool : group_pool) {
+    if (pool >= 0) pool_used[pool] = true;
+  }
+  storage_bytes_ = 0;
+  pool_bytes_ = pool_bytes;
+  for (size_t i = 0; i < pool_bytes.size(); ++i) {
+    if (!pool_used[i]) {
+      storage_pool_.push_back(nullptr);
+      continue;
+    }
+    int64_t shape[] = {static_cast<int64_t>(pool_bytes[i] + 3) / 4};
     DLTensor* tensor;
     TVM_CCALL(TVMArrayAlloc(
         shape, 1, kDLFloat, 32, 1, ctx_.device_type, ctx_.device_id, &tensor));
     storage_pool_.push_back(tensor);
+    storage_bytes_ += pool_bytes[i];
   }
   // Assign the pooled entries.
+  entry_pool_.resize(data_entry_.size());
   for (size_t i = 0; i < data_entry_.size(); ++i) {
-    int storage_id = attrs_.storage_id[i];
-    CHECK_LT(static_cast<size_t>(storage_id), storage_pool_.size());
-    data_entry_[i] = *storage_pool_[storage_id];
+    int pool = group_pool[group[i]];
+    entry_pool_[i] = pool;
+    if (pool >= 0) {
+      data_entry_[i] = *storage_pool_[pool];
+      data_entry_[i].data = static_cast<char*>(data_entry_[i].data) + group_offset[group[i]];
+    } else {
+      data_entry_[i] = parent->data_entry_[i];
+    }
     data_entry_[i].shape = const_cast<int64_t*>(attrs_.shape[i].data());
     data_entry_[i].ndim = static_cast<int>(attrs_.shape[i].size());
     data_entry_[i].dtype = vtype[i];
   }
+  // Parameters in private storage are copied from the parent.
+  if (parent != nullptr) {
+    for (uint32_t eid : param_eids_) {
+      if (entry_pool_[eid] >= 0) {
+        DLTensor* from = const_cast<DLTensor*>(&(parent->data_entry_[eid]));
+        TVM_CCALL(TVMArrayCopyFromTo(from, &data_entry_[eid], nullptr));
+      }
+    }
+  }
+}
+
+std::vector<uint32_t> GraphRuntime::PlanStorageGroups() {
+  // Union find over entries, __nop operators alias their outputs to inputs.
+  std::vector<uint32_t> parent(num_node_entries());
+  std::iota(parent.begin(), parent.end(), 0);
+  std::function<uint32_t(uint32_t)> find = [&parent, &find](uint32_t x) {
+    if (parent[x] != x) parent[x] = find(parent[x]);
+    return parent[x];
+  };
+  for (uint32_t nid = 0; nid < this->num_nodes(); ++nid) {
+    const auto& inode = nodes_[nid];
+    if (inode.op_type == "null" || inode.param.func_name != "__nop") continue;
+    for (uint32_t index = 0; index < inode.param.num_outputs; ++index) {
+      if (index >= inode.inputs.size()) break;
+      uint32_t eid = this->entry_id(nid, index);
+      uint32_t in_eid = this->entry_id(inode.inputs[index]);
+      // only alias entries that share the storage in the graph plan
+      if (attrs_.storage_id[eid] == attrs_.storage_id[in_eid]) {
+        parent[find(eid)] = find(in_eid);
+      }
+    }
+  }
+  // Renumber the roots to consecutive group ids.
+  std::vector<uint32_t> group(parent.size());
+  std::unordered_map<uint32_t, uint32_t> root_group;
+  for (uint32_t i = 0; i < parent.size(); ++i) {
+    uint32_t root = find(i);
+    if (root_group.count(root) == 0) {
+      uint32_t gid = static_cast<uint32_t>(root_group.size());
+      root_group[root] = gid;
+    }
+    group[i] = root_group.at(root);
+  }
+  return group;
+}
+
+size_t GraphRuntime::PlanStorageOffsets(const std::vector<uint32_t>& group,
+                                        const std::vector<size_t>& group_bytes,
+                                        const std::vector<bool>& skip,
+                                        std::vector<size_t>* group_offset) {
+  const uint32_t kForever = this->num_nodes();
+  size_t num_groups = group_bytes.size();
+  // Lifetime of each group in node order, or in levels when the nodes of
+  // a level run concurrently, [start, end] both inclusive.
+  auto time = [this](uint32_t nid) {
+    return level_tasks_.size() != 0 ? node_level_[nid] : nid;
+  };
+  std::vector<uint32_t> start(num_groups, kForever), end(num_groups, 0);
+  auto extend = [&](uint32_t eid, uint32_t b, uint32_t e) {
+    uint32_t g = group[eid];
+    start[g] = std::min(start[g], b);
+    end[g] = std::max(end[g], e);
+  };
+  for (uint32_t nid : input_nodes_) {
+    extend(this->entry_id(nid, 0), 0, kForever);
+  }
+  for (const NodeEntry& e : outputs_) {
+    extend(this->entry_id(e), 0, kForever);
+  }
+  for (uint32_t nid = 0; nid < this->num_nodes(); ++nid) {
+    const auto& inode = nodes_[nid];
+    if (inode.op_type == "null") continue;
+    for (uint32_t index = 0; index < inode.param.num_outputs; ++index) {
+      extend(this->entry_id(nid, index), time(nid), time(nid));
+    }
+    for (const NodeEntry& e : inode.inputs) {
+      extend(this->entry_id(e), time(nid), time(nid));
+    }
+  }
+  // Greedy by size: place larger groups first at the lowest offset
+  // that does not overlap the groups already placed in the same lifetime.
+  auto align = [](size_t x) {
+    return (x + kAllocAlignment - 1) / kAllocAlignment * kAllocAlignment;
+  };
+  std::vector<uint32_t> order;
+  for (uint32_t g = 0; g < num_groups; ++g) {
+    if (!skip[g]) order.push_back(g);
+  }
+  std::stable_sort(order.begin(), order.end(), [&group_bytes](uint32_t a, uint32_t b) {
+      return group_bytes[a] > group_bytes[b];
+    });
+  std::vector<uint32_t> placed;
+  size_t total = 0;
+  for (uint32_t g : order) {
+    std::vector<uint32_t> conflicts;
+    for (uint32_t p : placed) {
+      if (start[p] <= end[g] && start[g] <= end[p]) conflicts.push_back(p);
+    }
+    std::sort(conflicts.begin(), conflicts.end(), [group_offset](uint32_t a, uint32_t b) {
+        return (*group_offset)[a] < (*group_offset)[b];
+      });
+    size_t offset = 0;
+    for (uint32_t p : conflicts) {
+      if (offset + group_bytes[g] <= (*group_offset)[p]) break;
+      offset = std::max(offset, align((*group_offset)[p] + group_bytes[p]));
+    }
+    (*group_offset)[g] = offset;
+    total = std::max(total, offset + group_bytes[g]);
+    placed.push_back(g);
+  }
+  return total;
+}
+
+#ifndef _LIBCPP_SGX_NO_IOSTREAMS
+std::string GraphRuntime::RunProfile(int number) {
+  CHECK_GT(number, 0);
+  std::vector<std::vector<double> > times(op_execs_.size());
+  for (int r = 0; r < number; ++r) {
+    for (size_t i = 0; i < op_execs_.size(); ++i) {
+      if (!op_execs_[i]) continue;
+      auto tbegin = std::chrono::high_resolution_clock::now();
+      op_execs_[i]();
+      if (ctx_.device_type != kDLCPU) {
+        TVM_CCALL(TVMSynchronize(ctx_.device_type, ctx_.device_id, nullptr));
+      }
+      auto tend = std::chrono::high_resolution_clock::now();
+      times[i].push_back(std::chrono::duration_cast<
+          std::chrono::duration<double> >(tend - tbegin).count());
+    }
+  }
+  std::ostringstream os;
+  dmlc::JSONWriter writer(&os);
+  writer.BeginArray();
+  for (uint32_t nid = 0; nid < this->num_nodes(); ++nid) {
+    if (!op_execs_[nid]) continue;
+    const auto& inode = nodes_[nid];
+    std::vector<uint32_t> eids;
+    for (const auto& e : inode.inputs) {
+      eids.push_back(this->entry_id(e));
+    }
+    for (uint32_t index = 0; index < inode.param.num_outputs; ++index) {
+      eids.push_back(this->entry_id(nid, index));
+    }
+    std::vector<std::vector<int64_t> > shapes;
+    size_t nbytes = 0;
+    for (uint32_t eid : eids) {
+      const DLTensor& t = data_entry_[eid];
+      size_t size = (t.dtype.bits * t.dtype.lanes + 7) / 8;
+      for (int i = 0; i < t.ndim; ++i) {
+        size *= static_cast<size_t>(t.shape[i]);
+      }
+      nbytes += size;
+      shapes.push_back(attrs_.shape[eid]);
+    }
+    std::vector<double> sorted = times[nid];
+    std::sort(sorted.begin(), sorted.end());
+    double mean = std::accumulate(sorted.begin(), sorted.end(), 0.0) / sorted.size();
+    double median = sorted.size() % 2 == 1 ? sorted[sorted.size() / 2] :
+        (sorted[sorted.size() / 2 - 1] + sorted[sorted.size() / 2]) / 2;
+    double var = 0;
+    for (double t : sorted) {
+      var += (t - mean) * (t - mean);
+    }
+    writer.WriteArraySeperator();
+    writer.BeginObject();
+    writer.WriteObjectKeyValue("name", inode.name);
+    writer.WriteObjectKeyValue("func_name", inode.param.func_name);
+    writer.WriteObjectKeyValue("shapes", shapes);
+    writer.WriteObjectKeyValue("mean", mean);
+    writer.WriteObjectKeyValue("median", median);
+    writer.WriteObjectKeyValue("std", std::sqrt(var / sorted.size()));
+    writer.WriteObjectKeyValue("bytes", nbytes);
+    writer.EndObject();
+  }
+  writer.EndArray();
+  return os.str();
+}
+#endif
+
+void GraphRuntime::SetupSchedule() {
+  if (inter_op_threads_ != 0 && ctx_.device_type != kDLCPU) {
+    LOG(WARNING) << "Inter-op parallel execution is only supported on cpu, "
+                 << "run the nodes sequentially instead";
+    inter_op_threads_ = 0;
+  }
+  node_level_.assign(this->num_nodes(), 0);
+  level_tasks_.clear();
+  if (inter_op_threads_ == 0) return;
+  int max_threads = threading::MaxConcurrency();
+  int num_threads = inter_op_threads_ < 0 ? max_threads :
+      std::min(inter_op_threads_, max_threads);
+  // Nodes of a level run concurrently, the storage plan must know it.
+  plan_memory_ = true;
+  std::vector<std::vector<uint32_t> > levels;
+  for (uint32_t nid = 0; nid < this->num_nodes(); ++nid) {
+    const auto& inode = nodes_[nid];
+    if (inode.op_type == "null") continue;
+    uint32_t level = 0;
+    for (const NodeEntry& e : inode.inputs) {
+      if (nodes_[e.node_id].op_type == "null") continue;
+      level = std::max(level, node_level_[e.node_id] + 1);
+    }
+    node_level_[nid] = level;
+    if (levels.size() <= level) levels.resize(level + 1);
+    levels[level].push_back(nid);
+  }
+  auto cost = [this](uint32_t nid) {
+    int64_t elems = 0;
+    const auto& inode = nodes_[nid];
+    std::vector<uint32_t> eids;
+    for (const NodeEntry& e : inode.inputs) {
+      eids.push_back(this->entry_id(e));
+    }
+    for (uint32_t index = 0; index < inode.param.num_outputs; ++index) {
+      eids.push_back(this->entry_id(nid, index));
+    }
+    for (uint32_t eid : eids) {
+      elems += std::accumulate(attrs_.shape[eid].begin(), attrs_.shape[eid].end(),
+                               static_cast<int64_t>(1), std::multiplies<int64_t>());
+    }
+    return elems;
+  };
+  for (std::vector<uint32_t>& level : levels) {
+    std::stable_sort(level.begin(), level.end(), [&cost](uint32_t a, uint32_t b) {
+        return cost(a) > cost(b);
+      });
+    size_t num_tasks = std::min(level.size(), static_cast<size_t>(num_threads));
+    std::vector<std::vector<uint32_t> > tasks(num_tasks);
+    std::vector<int64_t> load(num_tasks, 0);
+    for (uint32_t nid : level) {
+      size_t task = std::min_element(load.begin(), load.end()) - load.begin();
+      tasks[task].push_back(nid);
+      load[task] += cost(nid);
+    }
+    level_tasks_.push_back(tasks);
+  }
+}
+
+void GraphRuntime::RunParallel() {
+  struct LevelClosure {
+    GraphRuntime* self;
+    const std::vector<std::vector<uint32_t> >* tasks;
+  };
+  auto flambda = [](int task_id, TVMParallelGroupEnv* penv, void* cdata) {
+    LevelClosure* closure = static_cast<LevelClosure*>(cdata);
+    try {
+      for (uint32_t nid : (*closure->tasks)[task_id]) {
+        closure->self->op_execs_[nid]();
+      }
+    } catch (const std::runtime_error& e) {
+      TVMAPISetLastError(e.what());
+      return -1;
+    }
+    return 0;
+  };
+  for (const auto& tasks : level_tasks_) {
+    if (tasks.size() == 1) {
+      for (uint32_t nid : tasks[0]) {
+        op_execs_[nid]();
+      }
+      continue;
+    }
+    LevelClosure closure{this, &tasks};
+    TVM_CCALL(TVMBackendParallelLaunch(
+        flambda, &closure, static_cast<int>(tasks.size())));
+  }
 }
 
 void GraphRuntime::SetupOpExecs() {
@@ -585,16 +1207,18 @@ PackedFunc GraphRuntime::GetFunction(
   // return member functions during query.
   if (name == "set_input") {
     return PackedFunc([sptr_to_self, this](TVMArgs args, TVMRetValue* rv) {
+        TVMStreamHandle stream = args.num_args > 2 ? args[2].operator void*() : nullptr;
         if (args[0].type_code() == kStr) {
           int in_idx = this->GetInputIndex(args[0]);
-          if (in_idx >= 0) this->SetInput(in_idx, args[1]);
+          if (in_idx >= 0) this->SetInput(in_idx, args[1], stream);
         } else {
-          this->SetInput(args[0], args[1]);
+          this->SetInput(args[0], args[1], stream);
         }
       });
   } else if (name == "get_output") {
     return PackedFunc([sptr_to_self, this](TVMArgs args, TVMRetValue* rv) {
-        this->GetOutput(args[0], args[1]);
+        TVMStreamHandle stream = args.num_args > 2 ? args[2].operator void*() : nullptr;
+        this->GetOutput(args[0], args[1], stream);
       });
   } else if (name == "get_input") {
     return PackedFunc([sptr_to_self, this](TVMArgs args, TVMRetValue* rv) {
@@ -618,12 +1242,34 @@ PackedFunc GraphRuntime::GetFunction(
 #endif
   } else if (name == "run") {
     return PackedFunc([sptr_to_self, this](TVMArgs args, TVMRetValue* rv) {
-        this->Run();
+        if (args.num_args > 0) {
+          this->Run(args[0].operator void*());
+        } else {
+          this->Run();
+        }
+      });
+#ifndef _LIBCPP_SGX_NO_IOSTREAMS
+  } else if (name == "run_profile") {
+    return PackedFunc([sptr_to_self, this](TVMArgs args, TVMRetValue* rv) {
+        *rv = this->RunProfile(args[0]);
+      });
+#endif
+  } else if (name == "get_storage_bytes") {
+    return PackedFunc([sptr_to_self, this](TVMArgs args, TVMRetValue* rv) {
+        *rv = static_cast<int64_t>(this->storage_bytes_);
+      });
+  } else if (name == "create_instance") {
+    return PackedFunc([sptr_to_self, this](TVMArgs args, TVMRetValue* rv) {
+        *rv = this->CreateInstance(sptr_to_self);
       });
   } else if (name == "load_params") {
     return PackedFunc([sptr_to_self, this](TVMArgs args, TVMRetValue* rv) {
         this->LoadParams(args[0].operator std::string());
       });
+  } else if (name == "load_params_from_file") {
+    return PackedFunc([sptr_to_self, this](TVMArgs args, TVMRetValue* rv) {
+        this->LoadParamsFromFile(args[0]);
+      });
   } else {
     return PackedFunc();
   }
@@ -632,26 +1278,33 @@ PackedFunc GraphRuntime::GetFunction(
 Module GraphRuntimeCreate(std::string sym_json,
                           tvm::runtime::Module m,
                           int device_type,
-                          int device_id) {
+                          int device_id,
+                          bool plan_memory,
+                          int inter_op_threads) {
   TVMContext ctx;
   ctx.device_type = static_cast<DLDeviceType>(device_type);
   ctx.device_id   = device_id;
   std::shared_ptr<GraphRuntime> exec = std::make_shared<GraphRuntime>();
-  exec->Init(sym_json, m, ctx);
+  exec->Init(sym_json, m, ctx, plan_memory, inter_op_threads);
   return Module(exec);
 }
 
 TVM_REGISTER_GLOBAL("tvm.graph_runtime.create")
 .set_body([](TVMArgs args, TVMRetValue *rv) {
-    *rv = GraphRuntimeCreate(args[0], args[1], args[2], args[3]);
+    bool plan_memory = args.num_args > 4 ? static_cast<bool>(args[4]) : false;
+    int inter_op_threads = args.num_args > 5 ? static_cast<int>(args[5]) : 0;
+    *rv = GraphRuntimeCreate(args[0], args[1], args[2], args[3],
+                             plan_memory, inter_op_threads);
   });
 
 TVM_REGISTER_GLOBAL("tvm.graph_runtime.remote_create")
 .set_body([](TVMArgs args, TVMRetValue *rv) {
     void* mhandle = args[1];
+    bool plan_memory = args.num_args > 4 ? static_cast<bool>(args[4]) : false;
+    int inter_op_threads = args.num_args > 5 ? static_cast<int>(args[5]) : 0;
     *rv = GraphRuntimeCreate(args[0],
                              *static_cast<tvm::runtime::Module*>(mhandle),
-                             args[2], args[3]);
+                             args[2], args[3], plan_memory, inter_op_threads);
   });
 }  // namespace runtime
 }  // namespace tvm
@@ -79,10 +79,14 @@ class RPCModuleNode final : public ModuleNode {
   PackedFunc GetTimeEvaluator(const std::string& name,
                               TVMContext ctx,
                               int number,
-                              int repeat) {
+                              int repeat,
+                              int min_repeat_ms,
+                              int warmup,
+                              bool flush_cache) {
     RPCFuncHandle handle = GetFuncHandle(name);
     if (handle == nullptr) return PackedFunc();
-    handle = sess_->GetTimeEvaluator(handle, ctx, number, repeat);
+    handle = sess_->GetTimeEvaluator(
+        handle, ctx, number, repeat, min_repeat_ms, warmup, flush_cache);
     return WrapRemote(handle);
   }
 
@@ -148,12 +152,17 @@ TVM_REGISTER_GLOBAL("module._RPCTimeEvaluator")
     TVMContext ctx;
     ctx.device_type = static_cast<DLDeviceType>(args[2].operator int());
     ctx.device_id = args[3];
+    int min_repeat_ms = args.num_args > 6 ? args[6].operator int() : 0;
+    int warmup = args.num_args > 7 ? args[7].operator int() : 1;
+    bool flush_cache = args.num_args > 8 ? args[8].operator bool() : false;
     if (tkey == "rpc") {
       *rv = static_cast<RPCModuleNode*>(m.operator->())
-          ->GetTimeEvaluator(args[1], ctx, args[4], args[5]);
+          ->GetTimeEvaluator(args[1], ctx, args[4], args[5],
+                             min_repeat_ms, warmup, flush_cache);
     } else {
       *rv = WrapTimeEvaluator(
-          m.GetFunction(args[1], false), ctx, args[4], args[5]);
+          m.GetFunction(args[1], false), ctx, args[4], args[5],
+          min_repeat_ms, warmup, flush_cache);
     }
   });
 
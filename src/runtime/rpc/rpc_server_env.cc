@@ -4,6 +4,9 @@
  * \brief Server environment of the RPC.
  */
 #include <tvm/runtime/registry.h>
+#include <algorithm>
+#include <fstream>
+#include <vector>
 #include "../file_util.h"
 
 namespace tvm {
@@ -36,5 +39,86 @@ TVM_REGISTER_GLOBAL("tvm.contrib.rpc.server.download")
     *rv = arr;
   });
 
+TVM_REGISTER_GLOBAL("tvm.contrib.rpc.server.file_size")
+.set_body([](TVMArgs args, TVMRetValue *rv) {
+    std::string file_name = RPCGetPath(args[0]);
+    std::ifstream fs(file_name, std::ios::in | std::ios::binary | std::ios::ate);
+    *rv = fs.fail() ? static_cast<int64_t>(-1) : static_cast<int64_t>(fs.tellg());
+  });
+
+TVM_REGISTER_GLOBAL("tvm.contrib.rpc.server.file_hash")
+.set_body([](TVMArgs args, TVMRetValue *rv) {
+    std::string file_name = RPCGetPath(args[0]);
+    int64_t nbytes = args[1];
+    // CRC-32 of the first nbytes, the same as zlib.crc32, -1 if the file is shorter
+    static std::vector<uint32_t> table = []() {
+      std::vector<uint32_t> t(256);
+      for (uint32_t i = 0; i < 256; ++i) {
+        uint32_t c = i;
+        for (int k = 0; k < 8; ++k) {
+          c = (c & 1) ? 0xEDB88320U ^ (c >> 1) : c >> 1;
+        }
+        t[i] = c;
+      }
+      return t;
+    }();
+    std::ifstream fs(file_name, std::ios::in | std::ios::binary);
+    if (fs.fail()) {
+      *rv = static_cast<int64_t>(-1);
+      return;
+    }
+    uint32_t crc = 0xFFFFFFFFU;
+    std::vector<char> buf(1 << 16);
+    while (nbytes > 0) {
+      fs.read(buf.data(), std::min(nbytes, static_cast<int64_t>(buf.size())));
+      int64_t n = static_cast<int64_t>(fs.gcount());
+      if (n <= 0) {
+        *rv = static_cast<int64_t>(-1);
+        return;
+      }
+      for (int64_t i = 0; i < n; ++i) {
+        crc = table[(crc ^ static_cast<uint8_t>(buf[i])) & 0xFF] ^ (crc >> 8);
+      }
+      nbytes -= n;
+    }
+    *rv = static_cast<int64_t>(crc ^ 0xFFFFFFFFU);
+  });
+
+TVM_REGISTER_GLOBAL("tvm.contrib.rpc.server.upload_chunk")
+.set_body([](TVMArgs args, TVMRetValue *rv) {
+    std::string file_name = RPCGetPath(args[0]);
+    int64_t offset = args[1];
+    std::string data = args[2];
+    // the first chunk creates the file, the others are written at offset
+    std::ios::openmode mode = std::ios::out | std::ios::binary;
+    if (offset != 0) mode |= std::ios::in;
+    std::fstream fs(file_name, mode);
+    CHECK(!fs.fail()) << "Cannot open " << file_name;
+    fs.seekp(0, std::ios::end);
+    CHECK_LE(offset, static_cast<int64_t>(fs.tellp()))
+        << "Upload chunk at " << offset << " leaves a hole in " << file_name;
+    fs.seekp(offset);
+    fs.write(data.data(), data.length());
+    CHECK(!fs.fail()) << "Cannot write " << file_name;
+  });
+
+TVM_REGISTER_GLOBAL("tvm.contrib.rpc.server.download_chunk")
+.set_body([](TVMArgs args, TVMRetValue *rv) {
+    std::string file_name = RPCGetPath(args[0]);
+    int64_t offset = args[1];
+    int64_t size = args[2];
+    std::ifstream fs(file_name, std::ios::in | std::ios::binary | std::ios::ate);
+    CHECK(!fs.fail()) << "Cannot open " << file_name;
+    int64_t file_size = static_cast<int64_t>(fs.tellg());
+    size = std::max(std::min(size, file_size - offset), static_cast<int64_t>(0));
+    std::string data(static_cast<size_t>(size), '\0');
+    fs.seekg(offset);
+    fs.read(&data[0], size);
+    TVMByteArray arr;
+    arr.data = data.c_str();
+    arr.size = data.length();
+    *rv = arr;
+  });
+
 }  // namespace runtime
 }  // namespace tvm
@@ -6,6 +6,7 @@
 #include <tvm/runtime/packed_func.h>
 #include <tvm/runtime/device_api.h>
 #include <tvm/runtime/registry.h>
+#include <algorithm>
 #include <memory>
 #include <array>
 #include <string>
@@ -881,9 +882,11 @@ void RPCSession::CopyFromRemote(void* from,
 }
 
 RPCFuncHandle RPCSession::GetTimeEvaluator(
-    RPCFuncHandle fhandle, TVMContext ctx, int number, int repeat) {
+    RPCFuncHandle fhandle, TVMContext ctx, int number, int repeat,
+    int min_repeat_ms, int warmup, bool flush_cache) {
   return this->CallRemote(
-      RPCCode::kGetTimeEvaluator, fhandle, ctx, number, repeat);
+      RPCCode::kGetTimeEvaluator, fhandle, ctx, number, repeat,
+      min_repeat_ms, warmup, static_cast<int>(flush_cache));
 }
 
 // Event handler functions
@@ -1011,7 +1014,12 @@ void RPCModuleGetSource(TVMArgs args, TVMRetValue *rv) {
 
 void RPCGetTimeEvaluator(TVMArgs args, TVMRetValue *rv) {
   PackedFunc *pf = static_cast<PackedFunc*>(args[0].operator void*());
-  void *fhandle = new PackedFunc(WrapTimeEvaluator(*pf, args[1], args[2], args[3]));
+  // the options after repeat are absent in the requests of older clients
+  int min_repeat_ms = args.num_args > 4 ? args[4].operator int() : 0;
+  int warmup = args.num_args > 5 ? args[5].operator int() : 1;
+  bool flush_cache = args.num_args > 6 ? args[6].operator bool() : false;
+  void *fhandle = new PackedFunc(WrapTimeEvaluator(
+      *pf, args[1], args[2], args[3], min_repeat_ms, warmup, flush_cache));
   delete pf;
   *rv = fhandle;
 }
@@ -1062,23 +1070,56 @@ void RPCSession::EventHandler::HandlePackedCall() {
   CHECK_EQ(state_, kRecvCode);
 }
 
-PackedFunc WrapTimeEvaluator(PackedFunc pf, TVMContext ctx, int number, int repeat) {
-  auto ftimer = [pf, ctx, number, repeat](TVMArgs args, TVMRetValue *rv) {
+// Evict the data of the previous calls from the cpu caches.
+static void FlushCPUCache() {
+  // larger than the last level cache of common cpus
+  const size_t kCacheFlushBytes = 64 << 20;
+  static std::vector<char> buffer(kCacheFlushBytes);
+  volatile char* data = buffer.data();
+  for (size_t i = 0; i < buffer.size(); i += 64) {
+    data[i] = static_cast<char>(data[i] + 1);
+  }
+}
+
+PackedFunc WrapTimeEvaluator(PackedFunc pf,
+                             TVMContext ctx,
+                             int number,
+                             int repeat,
+                             int min_repeat_ms,
+                             int warmup,
+                             bool flush_cache) {
+  auto ftimer = [pf, ctx, number, repeat, min_repeat_ms, warmup, flush_cache](
+      TVMArgs args, TVMRetValue *rv) {
+    int num = number;
     TVMRetValue temp;
     std::ostringstream os;
-    // skip first time call, to activate lazy compilation components.
-    pf.CallPacked(args, &temp);
+    // skip the warmup calls, to activate lazy compilation components.
+    for (int i = 0; i < warmup; ++i) {
+      pf.CallPacked(args, &temp);
+    }
     DeviceAPI::Get(ctx)->StreamSync(ctx, nullptr);
     for (int i = 0; i < repeat; ++i) {
-      // start timing
-      auto tbegin = std::chrono::high_resolution_clock::now();
-      for (int i = 0; i < number; ++i) {
-        pf.CallPacked(args, &temp);
-      }
-      DeviceAPI::Get(ctx)->StreamSync(ctx, nullptr);
-      auto tend = std::chrono::high_resolution_clock::now();
-      double speed = std::chrono::duration_cast<std::chrono::duration<double> >(
-          tend - tbegin).count() / number;
+      double duration_ms = -1.0;
+      do {
+        if (duration_ms >= 0.0) {
+          // too short to measure, scale number to last min_repeat_ms
+          double scaled = duration_ms > 0.0 ? min_repeat_ms / (duration_ms / num) + 1 : num * 2;
+          num = static_cast<int>(std::min(std::max(scaled, num * 1.618), 1e9));
+        }
+        if (flush_cache && ctx.device_type == kDLCPU) {
+          FlushCPUCache();
+        }
+        // start timing
+        auto tbegin = std::chrono::high_resolution_clock::now();
+        for (int j = 0; j < num; ++j) {
+          pf.CallPacked(args, &temp);
+        }
+        DeviceAPI::Get(ctx)->StreamSync(ctx, nullptr);
+        auto tend = std::chrono::high_resolution_clock::now();
+        duration_ms = std::chrono::duration_cast<std::chrono::duration<double, std::milli> >(
+            tend - tbegin).count();
+      } while (duration_ms < min_repeat_ms);
+      double speed = duration_ms / 1e3 / num;
       os.write(reinterpret_cast<char*>(&speed), sizeof(speed));
     }
     std::string blob = os.str();
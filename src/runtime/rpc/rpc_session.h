@@ -148,12 +148,18 @@ class RPCSession {
    * \param ctx The ctx to run measurement on.
    * \param number How many steps to run in each time evaluation
    * \param repeat How many times to repeat the timer
+   * \param min_repeat_ms Minimum duration of each time evaluation in milliseconds
+   * \param warmup Number of discarded calls before the time evaluations
+   * \param flush_cache Whether to flush the cpu cache before each time evaluation
    * \return A remote timer function
    */
   RPCFuncHandle GetTimeEvaluator(RPCFuncHandle fhandle,
                                  TVMContext ctx,
                                  int number,
-                                 int repeat);
+                                 int repeat,
+                                 int min_repeat_ms,
+                                 int warmup,
+                                 bool flush_cache);
   /*!
    * \brief Call a remote defined system function with arguments.
    * \param fcode The function code.
@@ -221,8 +227,21 @@ class RPCSession {
  * \param ctx The context.
  * \param number Number of steps in the inner iteration
  * \param repeat How many steps to repeat the time evaluation.
+ * \param min_repeat_ms Minimum duration of each time evaluation in milliseconds,
+ *  number is scaled up until a time evaluation takes at least this long.
+ * \param warmup Number of calls before the time evaluations, which are
+ *  discarded in case there is lazy initialization.
+ * \param flush_cache Whether to flush the cpu cache before each time evaluation.
+ * \return The timer function, returning the time of each evaluation in seconds
+ *  as an array of double.
  */
-PackedFunc WrapTimeEvaluator(PackedFunc f, TVMContext ctx, int number, int repeat);
+PackedFunc WrapTimeEvaluator(PackedFunc f,
+                             TVMContext ctx,
+                             int number,
+                             int repeat,
+                             int min_repeat_ms = 0,
+                             int warmup = 1,
+                             bool flush_cache = false);
 
 /*!
  * \brief Create a Global RPC module that refers to the session.
@@ -82,6 +82,14 @@ Module RPCClientConnect(std::string url, int port, std::string key) {
   return CreateRPCModule(RPCConnect(url, port, "client:" + key));
 }
 
+// Create a client session on a socket that has done the handshake.
+Module RPCClientConnectSocket(int sockfd, std::string key, std::string remote_key) {
+  common::TCPSocket sock(
+      static_cast<common::TCPSocket::SockType>(sockfd));
+  return CreateRPCModule(RPCSession::Create(
+      std::unique_ptr<SockChannel>(new SockChannel(sock)), key, remote_key));
+}
+
 void RPCServerLoop(int sockfd) {
   common::TCPSocket sock(
       static_cast<common::TCPSocket::SockType>(sockfd));
@@ -95,6 +103,11 @@ TVM_REGISTER_GLOBAL("contrib.rpc._Connect")
     *rv = RPCClientConnect(args[0], args[1], args[2]);
   });
 
+TVM_REGISTER_GLOBAL("contrib.rpc._ConnectSocket")
+.set_body([](TVMArgs args, TVMRetValue* rv) {
+    *rv = RPCClientConnectSocket(args[0], args[1], args[2]);
+  });
+
 TVM_REGISTER_GLOBAL("contrib.rpc._ServerLoop")
 .set_body([](TVMArgs args, TVMRetValue* rv) {
     RPCServerLoop(args[0]);
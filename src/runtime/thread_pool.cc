@@ -260,8 +260,11 @@ class ThreadPool {
              int num_task,
              int need_sync) {
     ParallelLauncher* launcher = ParallelLauncher::ThreadLocal();
-    CHECK(!launcher->is_worker)
-        << "Cannot launch parallel job inside worker, consider fuse then parallel";
+    if (launcher->is_worker) {
+      // Nested launch inside a task, e.g. an operator run by the inter-op
+      // parallel graph runtime. Run the whole job as one task in this thread.
+      return RunNested(flambda, cdata);
+    }
     if (num_task == 0) {
       num_task = num_workers_;
     }
@@ -281,10 +284,14 @@ class ThreadPool {
     // use the master thread to run task 0
     if (exclude_worker0_) {
       TVMParallelGroupEnv* penv = &(tsk.launcher->env);
-      if ((*tsk.launcher->flambda)(0, penv, cdata) == 0) {
+      // the master acts as a worker while running task 0
+      launcher->is_worker = true;
+      int ret = (*tsk.launcher->flambda)(0, penv, cdata);
+      launcher->is_worker = false;
+      if (ret == 0) {
         tsk.launcher->SignalJobFinish();
       } else {
-        tsk.launcher->SignalJobError(tsk.task_id);
+        tsk.launcher->SignalJobError(0);
       }
     }
     int res = launcher->WaitForJobs();
@@ -297,6 +304,15 @@ class ThreadPool {
   }
 
  private:
+  // Run a job serially in the calling thread.
+  static int RunNested(FTVMParallelLambda flambda, void* cdata) {
+    std::atomic<int> sync_counter[kSyncStride];
+    sync_counter[0].store(0, std::memory_order_relaxed);
+    TVMParallelGroupEnv env;
+    env.num_task = 1;
+    env.sync_handle = sync_counter;
+    return (*flambda)(0, &env, cdata) == 0 ? 0 : -1;
+  }
   // Internal worker function.
   void RunWorker(int worker_id) {
     SpscTaskQueue* queue = queues_[worker_id].get();
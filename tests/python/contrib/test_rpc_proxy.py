@@ -1,4 +1,5 @@
 import tvm
+import json
 import logging
 import numpy as np
 import time
@@ -41,6 +42,27 @@ def rpc_proxy_check():
             assert f1(10) == 11
             f2 = client.get_function("rpc.test2.strcat")
             assert f2("abc", 11) == "abc:11"
+
+            # two sessions multiplexed over one websocket
+            server = multiprocessing.Process(
+                target=proxy.websocket_proxy_server,
+                args=("ws://localhost:%d/ws" % web_port, "x2", 2))
+            server.deamon = True
+            server.start()
+            time.sleep(0.1)
+            clients = [rpc.connect(prox.host, prox.port, key="x2") for _ in range(2)]
+            for i, client in enumerate(clients):
+                f1 = client.get_function("rpc.test2.addone")
+                assert f1(i) == i + 1
+            try:
+                from urllib.request import urlopen
+            except ImportError:
+                from urllib2 import urlopen
+            url = "http://localhost:%d/metrics" % web_port
+            metrics = json.loads(urlopen(url).read().decode("utf-8"))
+            assert metrics["mux_channels"] == 2
+            assert metrics["active_pairs"] >= 2
+            assert metrics["bytes_forwarded"] > 0
         check()
     except ImportError:
         print("Skipping because tornado is not avaliable...")
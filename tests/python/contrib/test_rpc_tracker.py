@@ -1,6 +1,7 @@
 import tvm
 import logging
 import numpy as np
+import sys
 import time
 import multiprocessing
 from tvm.contrib import rpc
@@ -72,6 +73,201 @@ def check_server_drop():
         print("Skip because tornado is not available")
 
 
+def check_scheduler():
+    """test the scheduling policies"""
+    try:
+        from tvm.contrib.rpc import tracker
+    except ImportError:
+        print("Skip because tornado is not available")
+        return
+
+    def _request(sched, user, got, priority=1):
+        def _cb(value):
+            got.append((user, value))
+            return True
+        sched.request(user, priority, _cb)
+
+    # fair share: the user holding fewer servers is served first
+    sched = tracker.FairShareScheduler("xyz", quotas={"b": 1})
+    got = []
+    for user in ["a", "a", "a", "b", "b"]:
+        _request(sched, user, got)
+    sched.put(("h", 1, "m1"))
+    sched.put(("h", 2, "m2"))
+    sched.put(("h", 3, "m3"))
+    assert [user for user, _ in got] == ["a", "b", "a"]
+    # b is at its quota until its server is put back
+    sched.put(("h", 4, "m4"))
+    assert [user for user, _ in got] == ["a", "b", "a", "a"]
+    sched.put(("h", got[1][1][1], "m5"))
+    assert got[-1] == ("b", ("h", got[1][1][1], "m5"))
+    summary = sched.summary()
+    assert summary["pending"] == 0
+    assert summary["served"] == 5
+    assert summary["users"]["a"]["active"] == 3
+    # b waits at its quota, then the server it holds disconnects
+    _request(sched, "b", got)
+    sched.put(("h", 6, "m6"))
+    assert len(got) == 5
+    sched.release(got[4][1])
+    assert got[-1] == ("b", ("h", 6, "m6"))
+
+    # affinity: a user gets the server of its previous session
+    sched = tracker.AffinityScheduler("xyz")
+    got = []
+    sched.put(("h", 1, "m1"))
+    sched.put(("h", 2, "m2"))
+    _request(sched, "a", got)
+    _request(sched, "b", got)
+    server_a = got[0][1][1]
+    sched.put(("h", 2, "m3"))
+    sched.put(("h", 1, "m4"))
+    _request(sched, "a", got)
+    assert got[-1][1][1] == server_a
+    assert sched.summary()["affinity_hits"] == 1
+    # a failed handoff is not counted as a hit
+    sched.put(("h", server_a, "m5"))
+    sched.request("a", 1, lambda value: False)
+    assert sched.summary()["affinity_hits"] == 1
+
+
+def _build_add(factor):
+    n = 1024
+    A = tvm.placeholder((n,), name='A')
+    B = tvm.compute(A.shape, lambda *i: A(*i) + 1.0, name='B')
+    s = tvm.create_schedule(B.op)
+    s[B].split(B.op.axis[0], factor=factor)
+    return tvm.build(s, [A, B], "llvm", name="myadd")
+
+
+def check_measure_pipelined():
+    """test pipelined build and measurement"""
+    if not tvm.module.enabled("llvm"):
+        print("Skip because llvm is not enabled")
+        return
+    try:
+        from tvm.contrib.rpc import tracker
+
+        tserver = tracker.Tracker("localhost", 8888)
+        servers = [rpc.Server("localhost", port=9100 + 10 * i,
+                              tracker_addr=("localhost", tserver.port),
+                              key="measure") for i in range(2)]
+        factors = [1, 4, 16, 64]
+        builds = [(_build_add, (f,)) for f in factors]
+        builds.append((_build_add, (None,)))
+        results = list(rpc.measure_pipelined(
+            builds, ("localhost", tserver.port), "measure",
+            [((1024,), "float32"), ((1024,), "float32")],
+            num_devices=2, build_jobs=2, func_name="myadd", number=4))
+        assert sorted(r.index for r in results) == list(range(len(builds)))
+        for r in results:
+            if r.index < len(factors):
+                assert r.error is None and r.mean > 0
+            else:
+                # split without factor fails to build
+                assert r.error is not None
+        tserver.terminate()
+        for server in servers:
+            server.terminate()
+    except ImportError:
+        print("Skip because tornado is not available")
+
+
+def check_state_log():
+    """test the state log and the health probes"""
+    try:
+        from tvm.contrib import util
+        from tvm.contrib.rpc import tracker, base
+        from tvm.contrib.rpc.base import TrackerCode
+
+        temp = util.tempdir()
+        state_file = temp.relpath("tracker.log")
+        tserver = tracker.Tracker("localhost", 8888, state_file=state_file)
+        tclient = rpc.connect_tracker("localhost", tserver.port)
+        # a server that does not exist
+        base.sendjson(tclient._sock, [TrackerCode.PUT, "dead", (9999, "abc")])
+        assert base.recvjson(tclient._sock) == TrackerCode.SUCCESS
+        tclient.close()
+        # the resource of a closed connection is out of date
+        time.sleep(0.1)
+        tclient = rpc.connect_tracker("localhost", tserver.port)
+        assert tclient.summary()["queue_info"]["dead"]["free"] == 0
+        base.sendjson(tclient._sock, [TrackerCode.PUT, "dead", (9999, "abc")])
+        assert base.recvjson(tclient._sock) == TrackerCode.SUCCESS
+        server = rpc.Server("localhost", port=9100,
+                            tracker_addr=("localhost", tserver.port), key="alive",
+                            tracker_retry_period=0.2)
+        time.sleep(0.5)
+        tserver.terminate()
+
+        # restart on the same port, the replayed resources are probed
+        # once even without periodic probes
+        tserver = tracker.Tracker("localhost", 8888, state_file=state_file,
+                                  probe_timeout=0.5)
+        assert tserver.port == 8888
+        tclient = rpc.connect_tracker("localhost", tserver.port)
+        # the server reconnects after its retry period
+        time.sleep(1)
+        summary = tclient.summary()
+        assert "dead" not in summary["queue_info"] or \
+            summary["queue_info"]["dead"]["free"] == 0
+        assert summary["queue_info"]["alive"]["free"] == 1
+        latency = {item["key"]: item for item in summary["server_latency"]}
+        assert latency["alive"]["latency"] is not None
+        assert latency["dead"]["failures"] == 1
+        print(tclient.text_summary())
+        tclient.close()
+        server.terminate()
+        tserver.terminate()
+    except ImportError:
+        print("Skip because tornado is not available")
+
+
+def check_async_request():
+    """test the asyncio client"""
+    if sys.version_info < (3, 5):
+        print("Skip because asyncio client requires python 3.5")
+        return
+    try:
+        import asyncio
+        from tvm.contrib.rpc import tracker, aio
+
+        # check_server_drop may have registered it already
+        @tvm.register_func("rpc.test2.addone", override=True)
+        def addone(x):
+            return x + 1
+
+        tserver = tracker.Tracker("localhost", 8888)
+        servers = [rpc.Server("localhost", port=9100 + 10 * i,
+                              tracker_addr=("localhost", tserver.port),
+                              key="async") for i in range(2)]
+        time.sleep(0.5)
+        loop = asyncio.new_event_loop()
+        # gather binds its futures to the current loop
+        asyncio.set_event_loop(loop)
+        atracker = aio.connect_tracker("localhost", tserver.port)
+        # both devices are held at the same time by a single thread
+        remotes = loop.run_until_complete(asyncio.gather(
+            *[atracker.request("async") for _ in range(2)]))
+        results = loop.run_until_complete(asyncio.gather(
+            *[remote.run(lambda sess, i=i: sess.get_function("rpc.test2.addone")(i))
+              for i, remote in enumerate(remotes)]))
+        assert results == [1, 2]
+        summary = loop.run_until_complete(atracker.summary())
+        assert summary["queue_info"]["async"]["free"] == 0
+        loop.close()
+        asyncio.set_event_loop(None)
+        tserver.terminate()
+        for server in servers:
+            server.terminate()
+    except ImportError:
+        print("Skip because tornado is not available")
+
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     check_server_drop()
+    check_scheduler()
+    check_measure_pipelined()
+    check_state_log()
+    check_async_request()
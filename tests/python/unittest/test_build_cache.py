@@ -0,0 +1,86 @@
+import os
+import tvm
+import numpy as np
+from tvm.contrib import util, build_cache
+
+
+def _schedule(n):
+    A = tvm.placeholder((n,), name='A')
+    B = tvm.compute(A.shape, lambda i: A[i] + 1.0, name='B')
+    s = tvm.create_schedule(B.op)
+    return s, [A, B]
+
+
+def test_build_cache_hit():
+    if not tvm.module.enabled("llvm"):
+        return
+    temp = util.tempdir()
+    cache_dir = temp.relpath("cache")
+    with tvm.build_config(build_cache_dir=cache_dir):
+        s, args = _schedule(16)
+        f1 = tvm.build(s, args, "llvm", name="myadd")
+        assert len(build_cache.get_cache(cache_dir).entries()) == 1
+        # identical inputs are served from the cache, without lowering nor codegen
+        def _fail(*args, **kwargs):
+            raise RuntimeError("compiled on a cache hit")
+        lower, build_module = tvm.build_module.lower, tvm.codegen.build_module
+        tvm.build_module.lower = tvm.codegen.build_module = _fail
+        try:
+            s, args = _schedule(16)
+            f2 = tvm.build(s, args, "llvm", name="myadd")
+        finally:
+            tvm.build_module.lower, tvm.codegen.build_module = lower, build_module
+        # a cached module behaves like a freshly built one
+        assert f2.type_key == f1.type_key
+        f2.export_library(temp.relpath("myadd.so"))
+        assert len(build_cache.get_cache(cache_dir).entries()) == 1
+        # a different shape is a new entry
+        s, args = _schedule(32)
+        tvm.build(s, args, "llvm", name="myadd")
+        assert len(build_cache.get_cache(cache_dir).entries()) == 2
+
+    ctx = tvm.cpu(0)
+    a = tvm.nd.array(np.random.uniform(size=16).astype("float32"), ctx)
+    b = tvm.nd.array(np.zeros(16, dtype="float32"), ctx)
+    f2(a, b)
+    np.testing.assert_allclose(b.asnumpy(), a.asnumpy() + 1)
+    b = tvm.nd.array(np.zeros(16, dtype="float32"), ctx)
+    tvm.module.load(temp.relpath("myadd.so"))(a, b)
+    np.testing.assert_allclose(b.asnumpy(), a.asnumpy() + 1)
+
+
+def test_build_cache_key():
+    if not tvm.module.enabled("llvm"):
+        return
+    def _key(s, args, name="myadd"):
+        return tvm.build_module._build_cache_key([s, args, {}], name, "llvm", None)
+    # the key only depends on the build inputs, not on the node addresses
+    keys = [_key(*_schedule(16)) for _ in range(2)]
+    assert keys[0] == keys[1]
+    assert _key(*_schedule(16), name="myadd2") != keys[0]
+    # distinct variables of the same name are told apart
+    n = tvm.var("n")
+    A = tvm.placeholder((n,), name='A')
+    B = tvm.placeholder((n,), name='B')
+    C = tvm.compute(A.shape, lambda i: A[i] + B[i], name='C')
+    A2 = tvm.placeholder((tvm.var("n"),), name='A')
+    C2 = tvm.compute(A2.shape, lambda i: A2[i] + B[i], name='C')
+    assert (_key(tvm.create_schedule(C.op), [A, B, C]) !=
+            _key(tvm.create_schedule(C2.op), [A2, B, C2]))
+
+
+def test_build_cache_evict():
+    temp = util.tempdir()
+    cache = build_cache.BuildCache(temp.relpath("cache"), max_mb=1)
+    for i, key in enumerate(["a", "b", "c"]):
+        with open(cache.path(key), "wb") as f:
+            f.write(b"0" * (400 * 1024))
+        os.utime(cache.path(key), (i, i))
+    cache._evict()
+    assert [k for k, _ in cache.entries()] == ["b", "c"]
+
+
+if __name__ == "__main__":
+    test_build_cache_hit()
+    test_build_cache_key()
+    test_build_cache_evict()
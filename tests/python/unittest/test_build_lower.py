@@ -16,5 +16,28 @@ def test_lower_rfactor():
     s[BF].compute_at(s[B], s[B].op.reduce_axis[0])
     fapi = tvm.lower(s, [A, B])
 
+def test_lower_profile_pass():
+    n = 128
+    A = tvm.placeholder((n,), name='A')
+    B = tvm.compute((n,), lambda i: A[i] + 1, name='B')
+    s = tvm.create_schedule(B.op)
+    xo, xi = s[B].split(B.op.axis[0], factor=8)
+    s[B].unroll(xi)
+    def custom(stmt):
+        return stmt
+    with tvm.build_config(profile_pass=True,
+                          add_lower_pass=[(1, custom)]) as cfg:
+        tvm.lower(s, [A, B])
+    names = [e.name for e in cfg.pass_profile.entries]
+    assert "StorageFlatten" in names
+    assert "custom0_phase1" in names
+    unroll = [e for e in cfg.pass_profile.entries if e.name == "UnrollLoop"][0]
+    assert unroll.nodes_after > unroll.nodes_before
+    assert cfg.pass_profile.aggregate()[0][2] >= unroll.time
+    # passes are restored after the scope exits
+    assert tvm.ir_pass.StorageFlatten.__name__ == "StorageFlatten"
+
+
 if __name__ == "__main__":
     test_lower_rfactor()
+    test_lower_profile_pass()
@@ -1,4 +1,5 @@
 import tvm
+from tvm.contrib import util
 import numpy as np
 import ctypes
 
@@ -233,6 +234,45 @@ def test_multiple_func():
     check_llvm()
 
 
+def test_multiple_func_parallel_build():
+    nn = 1024
+    n = tvm.convert(nn)
+    A = tvm.placeholder((n,), name='A')
+    B = tvm.placeholder((n,), name='B')
+    C = tvm.compute(A.shape, lambda *i: A(*i) + B(*i), name='C')
+    D = tvm.compute(A.shape, lambda *i: A(*i) * B(*i), name='D')
+    def check_llvm():
+        if not tvm.module.enabled("llvm"):
+            return
+        funcs = [tvm.lower(tvm.create_schedule(C.op), [A, B, C], name="fadd%d" % i)
+                 for i in range(3)]
+        funcs += [tvm.lower(tvm.create_schedule(D.op), [A, B, D], name="fmul")]
+        with tvm.build_config(build_jobs=2):
+            m = tvm.build(funcs, "llvm")
+        ctx = tvm.cpu(0)
+        a = tvm.nd.array(np.random.uniform(size=nn).astype(A.dtype), ctx)
+        b = tvm.nd.array(np.random.uniform(size=nn).astype(B.dtype), ctx)
+        def check(mod):
+            for i in range(3):
+                c = tvm.nd.array(np.zeros(nn, dtype=C.dtype), ctx)
+                mod['fadd%d' % i](a, b, c)
+                np.testing.assert_allclose(c.asnumpy(), a.asnumpy() + b.asnumpy())
+            d = tvm.nd.array(np.zeros(nn, dtype=D.dtype), ctx)
+            mod['fmul'](a, b, d)
+            np.testing.assert_allclose(d.asnumpy(), a.asnumpy() * b.asnumpy())
+            # the entry function is still the first one
+            c = tvm.nd.array(np.zeros(nn, dtype=C.dtype), ctx)
+            mod(a, b, c)
+            np.testing.assert_allclose(c.asnumpy(), a.asnumpy() + b.asnumpy())
+        check(m)
+        # the module can still be exported
+        temp = util.tempdir()
+        path = temp.relpath("lib.so")
+        m.export_library(path)
+        check(tvm.module.load(path))
+    check_llvm()
+
+
 
 def test_llvm_select():
     def check_llvm(n, offset):
@@ -321,6 +361,7 @@ if __name__ == "__main__":
     test_llvm_add_pipeline()
     test_llvm_intrin()
     test_multiple_func()
+    test_multiple_func_parallel_build()
     test_llvm_flip_pipeline()
     test_llvm_madd_pipeline()
     test_llvm_temp_space()
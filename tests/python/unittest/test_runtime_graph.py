@@ -1,6 +1,7 @@
 import tvm
 import numpy as np
 import json
+import struct
 from tvm.contrib import rpc, util, graph_runtime
 
 def test_graph_simple():
@@ -64,8 +65,213 @@ def test_graph_simple():
         out = mod.get_output(0, out)
         np.testing.assert_equal(out.asnumpy(), a + 1)
 
+    def check_pipelined():
+        for target, ctx in [("llvm", tvm.cpu(0)), ("cuda", tvm.gpu(0))]:
+            if not tvm.module.enabled(target) or not ctx.exist:
+                print("Skip because %s is not enabled" % target)
+                continue
+            sch = tvm.create_schedule(B.op)
+            if target == "cuda":
+                sch[B].bind(B.op.axis[0], tvm.thread_axis("threadIdx.x"))
+            mlib = tvm.build(sch, [A, B], target, name="myadd")
+            mod = graph_runtime.create_pipelined(graph, mlib, ctx)
+            inputs = [np.random.uniform(size=(n,)).astype(A.dtype) for _ in range(5)]
+            outputs = list(mod.run_pipelined({"x": a} for a in inputs))
+            assert len(outputs) == len(inputs)
+            for a, out in zip(inputs, outputs):
+                np.testing.assert_equal(out[0], a + 1)
+
     check_verify()
     check_remote()
+    check_pipelined()
+
+def save_params(params):
+    """Serialize dict of numpy array in the format of load_params"""
+    blob = struct.pack("<QQQ", 0xF7E58D4F05049CB7, 0, len(params))
+    for name in params:
+        blob += struct.pack("<Q", len(name)) + name.encode("utf-8")
+    blob += struct.pack("<Q", len(params))
+    for arr in params.values():
+        blob += struct.pack("<QQiii", 0xDD5E40F096B4A13F, 0, 1, 0, arr.ndim)
+        blob += struct.pack("<BBH", 2, 32, 1)
+        blob += struct.pack("<%dq" % arr.ndim, *arr.shape)
+        blob += struct.pack("<Q", arr.nbytes) + arr.tobytes()
+    return blob
+
+
+def test_graph_shared_params():
+    n = 4
+    X = tvm.placeholder((n,), name='X')
+    W = tvm.placeholder((n,), name='W')
+    Y = tvm.compute(X.shape, lambda i: X[i] + W[i], name='Y')
+    s = tvm.create_schedule(Y.op)
+    node0 = {"op": "null", "name": "x", "inputs": []}
+    # with this name the data of w is 64 bytes aligned in the file,
+    # so load_params_from_file binds it to the mapped pages
+    wname = "w" * 40
+    node1 = {"op": "null", "name": wname, "inputs": []}
+    node2 = {"op": "tvm_op", "name": "add",
+             "inputs": [[0, 0, 0], [1, 0, 0]],
+             "attrs": {"func_name": "myadd",
+                       "flatten_data": "1",
+                       "num_inputs" : "2",
+                       "num_outputs" : "1"}}
+    shape = (n,)
+    graph = json.dumps({
+        "nodes": [node0, node1, node2],
+        "arg_nodes": [0, 1],
+        "node_row_ptr": [0, 1, 2, 3],
+        "heads": [[2, 0, 0]],
+        "attrs": {
+            "shape" : ["list_shape", [shape, shape, shape]],
+            "dltype" : ["list_str", ["float32", "float32", "float32"]],
+            "storage_id" : ["list_int", [0, 1, 2]]}})
+    if not tvm.module.enabled("llvm"):
+        print("Skip because llvm is not enabled")
+        return
+    mlib = tvm.build(s, [X, W, Y], "llvm", name="myadd")
+    mod = graph_runtime.create(graph, mlib, tvm.cpu(0))
+    w = np.random.uniform(size=shape).astype("float32")
+    mod.load_params(save_params({wname: w}))
+    instances = [mod.create_instance() for _ in range(3)]
+    # an instance of an instance also shares the parameters of mod
+    instances.append(instances[0].create_instance())
+    for k, inst in enumerate(instances):
+        x = np.full(shape, k, dtype="float32")
+        inst.run(x=x)
+        out = inst.get_output(0, tvm.nd.empty(shape))
+        np.testing.assert_allclose(out.asnumpy(), x + w)
+    # instances see the parameters of the parent
+    w2 = w * 2
+    mod.load_params(save_params({wname: w2}))
+    instances[0].run()
+    out = instances[0].get_output(0, tvm.nd.empty(shape))
+    np.testing.assert_allclose(out.asnumpy(), w2)
+    # load from memory mapped file
+    temp = util.tempdir()
+    path_params = temp.relpath("deploy.params")
+    w3 = w * 3
+    with open(path_params, "wb") as fo:
+        fo.write(save_params({wname: w3}))
+    assert mod.get_storage_bytes() == 3 * n * 4
+    mod.load_params_from_file(path_params)
+    # the pool of w is released
+    assert mod.get_storage_bytes() == 2 * n * 4
+    mod.run(x=np.zeros(shape, dtype="float32"))
+    out = mod.get_output(0, tvm.nd.empty(shape))
+    np.testing.assert_allclose(out.asnumpy(), w3)
+    # the instances are rebound to the mapped parameters
+    for inst in instances:
+        inst.run(x=np.zeros(shape, dtype="float32"))
+        out = inst.get_output(0, tvm.nd.empty(shape))
+        np.testing.assert_allclose(out.asnumpy(), w3)
+    # reloading releases the mapping of the previous file
+    w4 = w * 4
+    path_params = temp.relpath("deploy2.params")
+    with open(path_params, "wb") as fo:
+        fo.write(save_params({wname: w4}))
+    mod.load_params_from_file(path_params)
+    instances[1].run(x=np.zeros(shape, dtype="float32"))
+    out = instances[1].get_output(0, tvm.nd.empty(shape))
+    np.testing.assert_allclose(out.asnumpy(), w4)
+
+
+def test_graph_plan_memory():
+    n = 64
+    A = tvm.placeholder((n,), name='A')
+    B = tvm.compute(A.shape, lambda *i: A(*i) + 1.0, name='B')
+    s = tvm.create_schedule(B.op)
+    num_ops = 5
+    nodes = [{"op": "null", "name": "x", "inputs": []}]
+    for i in range(num_ops):
+        nodes.append({"op": "tvm_op", "name": "add%d" % i,
+                      "inputs": [[i, 0, 0]],
+                      "attrs": {"func_name": "myadd",
+                                "flatten_data": "1",
+                                "num_inputs" : "1",
+                                "num_outputs" : "1"}})
+    shape = (n,)
+    graph = json.dumps({
+        "nodes": nodes,
+        "arg_nodes": [0],
+        "node_row_ptr": list(range(num_ops + 2)),
+        "heads": [[num_ops, 0, 0]],
+        "attrs": {
+            "shape" : ["list_shape", [shape] * (num_ops + 1)],
+            "dltype" : ["list_str", ["float32"] * (num_ops + 1)],
+            "storage_id" : ["list_int", list(range(num_ops + 1))]}})
+    if not tvm.module.enabled("llvm"):
+        print("Skip because llvm is not enabled")
+        return
+    mlib = tvm.build(s, [A, B], "llvm", name="myadd")
+    mod = graph_runtime.create(graph, mlib, tvm.cpu(0))
+    planned = graph_runtime.create(graph, mlib, tvm.cpu(0), plan_memory=True)
+    assert mod.get_storage_bytes() == n * 4 * (num_ops + 1)
+    assert planned.get_storage_bytes() < mod.get_storage_bytes()
+    a = np.random.uniform(size=shape).astype(A.dtype)
+    planned.run(x=a)
+    out = planned.get_output(0, tvm.nd.empty(shape))
+    np.testing.assert_allclose(out.asnumpy(), a + num_ops, rtol=1e-5)
+
+    prof = mod.run_profile(number=3, x=a)
+    assert [r.name for r in prof] == ["add%d" % i for i in range(num_ops)]
+    assert all(r.func_name == "myadd" for r in prof)
+    assert prof[0].shapes == [shape, shape]
+    assert prof[0].bytes == 2 * n * 4
+    assert all(r.mean >= 0 and r.std >= 0 for r in prof)
+
+
+def test_graph_inter_op_parallel():
+    n = 1024
+    A = tvm.placeholder((n,), name='A')
+    B = tvm.compute(A.shape, lambda *i: A(*i) + 1.0, name='B')
+    s = tvm.create_schedule(B.op)
+    # operators launching parallel jobs run serially inside a task
+    s[B].parallel(B.op.axis[0])
+    # four independent chains of two nodes
+    num_chains = 4
+    nodes = [{"op": "null", "name": "x", "inputs": []}]
+    heads = []
+    for c in range(num_chains):
+        for i in range(2):
+            src = 0 if i == 0 else len(nodes) - 1
+            nodes.append({"op": "tvm_op", "name": "add%d_%d" % (c, i),
+                          "inputs": [[src, 0, 0]],
+                          "attrs": {"func_name": "myadd",
+                                    "flatten_data": "1",
+                                    "num_inputs" : "1",
+                                    "num_outputs" : "1"}})
+        heads.append([len(nodes) - 1, 0, 0])
+    num_entries = len(nodes)
+    shape = (n,)
+    graph = json.dumps({
+        "nodes": nodes,
+        "arg_nodes": [0],
+        "node_row_ptr": list(range(num_entries + 1)),
+        "heads": heads,
+        "attrs": {
+            "shape" : ["list_shape", [shape] * num_entries],
+            "dltype" : ["list_str", ["float32"] * num_entries],
+            "storage_id" : ["list_int", list(range(num_entries))]}})
+    if not tvm.module.enabled("llvm"):
+        print("Skip because llvm is not enabled")
+        return
+    mlib = tvm.build(s, [A, B], "llvm", name="myadd")
+    a = np.random.uniform(size=shape).astype(A.dtype)
+    for threads in [-1, 2]:
+        mod = graph_runtime.create(graph, mlib, tvm.cpu(0), inter_op_threads=threads)
+        mod.run(x=a)
+        for c in range(num_chains):
+            out = mod.get_output(c, tvm.nd.empty(shape))
+            np.testing.assert_allclose(out.asnumpy(), a + 2, rtol=1e-5)
+        inst = mod.create_instance()
+        inst.run(x=a)
+        out = inst.get_output(0, tvm.nd.empty(shape))
+        np.testing.assert_allclose(out.asnumpy(), a + 2, rtol=1e-5)
+
 
 if __name__ == "__main__":
     test_graph_simple()
+    test_graph_shared_params()
+    test_graph_plan_memory()
+    test_graph_inter_op_parallel()
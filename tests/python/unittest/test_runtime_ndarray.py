@@ -35,5 +35,30 @@ def test_nd_create():
         ctx.sync()
 
 
+def test_nd_zero_copy():
+    x = tvm.nd.array(np.arange(12, dtype="float32").reshape(3, 4))
+    view = x.asnumpy(copy=False)
+    view[1, 1] = -1
+    assert x.asnumpy()[1, 1] == -1
+    del x
+    # the view keeps the array alive
+    assert view[2, 3] == 11
+
+    # allocate enough to find a 64-byte aligned offset
+    buf = np.zeros(16 + 12, dtype="float32")
+    offset = (-buf.ctypes.data % 64) // 4
+    data = buf[offset:offset + 12].reshape(3, 4)
+    y = tvm.nd.from_numpy(data)
+    assert y.shape == (3, 4)
+    data[0, 0] = 3
+    assert y.asnumpy()[0, 0] == 3
+    try:
+        tvm.nd.from_numpy(buf[offset + 1:offset + 13])
+        assert False
+    except ValueError:
+        pass
+
+
 if __name__ == "__main__":
     test_nd_create()
+    test_nd_zero_copy()
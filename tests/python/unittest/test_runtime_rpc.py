@@ -56,6 +56,30 @@ def test_rpc_file_exchange():
     remote.upload(blob, "dat.bin")
     rev = remote.download("dat.bin")
     assert(rev == blob)
+    # chunked, compressed and resumed transfers
+    blob = bytearray(np.random.randint(0, 3, size=(10000)).astype("uint8"))
+    remote.upload(blob, "chunk.bin", chunk_size=1024)
+    assert remote.download("chunk.bin") == blob
+    assert remote.download("chunk.bin", chunk_size=999, compress=True) == blob
+    remote.upload(blob[:3000], "resume.bin", chunk_size=1024, compress=True)
+    remote.upload(blob, "resume.bin", chunk_size=1024, resume=True)
+    assert remote.download("resume.bin") == blob
+    # a stale remote file is not resumed from
+    remote.upload(bytearray(3000), "resume.bin")
+    remote.upload(blob, "resume.bin", chunk_size=1024, resume=True)
+    assert remote.download("resume.bin") == blob
+    temp = util.tempdir()
+    path = temp.relpath("resume.bin")
+    with open(path, "wb") as fo:
+        fo.write(blob[:5000])
+    remote.download("resume.bin", chunk_size=1024, out_file=path, resume=True)
+    assert bytearray(open(path, "rb").read()) == blob
+    with open(path, "wb") as fo:
+        fo.write(bytearray(5000))
+    remote.download("resume.bin", chunk_size=1024, out_file=path, resume=True)
+    assert bytearray(open(path, "rb").read()) == blob
+    remote.upload(path, chunk_size=4096)
+    assert remote.download("resume.bin") == blob
 
 def test_rpc_remote_module():
     if not tvm.module.enabled("rpc"):
@@ -85,6 +109,12 @@ def test_rpc_remote_module():
         cost = time_f(a, b).mean
         print('%g secs/op' % cost)
         np.testing.assert_equal(b.asnumpy(), a.asnumpy() + 1)
+        time_f = f1.time_evaluator(f1.entry_name, remote.cpu(0), number=1, repeat=3,
+                                   min_repeat_ms=5, warmup=2, flush_cache=True)
+        prof = time_f(a, b)
+        assert len(prof.results) == 3
+        assert prof.min <= prof.median <= prof.max
+        assert prof.std >= 0
 
     def check_remote_link_cl():
         """Test function to run remote code such as cl
@@ -146,9 +176,87 @@ def test_rpc_return_func():
     fadd = f1(10)
     assert fadd(12) == 22
 
+def test_rpc_socket_io():
+    import socket
+    from tvm.contrib.rpc import base
+    sock_a, sock_b = socket.socketpair()
+    value = {"key": "x" * 10000, "list": list(range(100))}
+    base.sendjson(sock_a, value)
+    assert base.recvjson(sock_b) == value
+    blob = bytearray(np.random.randint(0, 255, size=(3000,)).astype("uint8"))
+    sock_a.sendall(blob[:1000])
+    sock_a.sendall(blob[1000:])
+    assert base.recvall(sock_b, len(blob)) == blob
+    sock_a.close()
+    try:
+        base.recvall(sock_b, 4)
+        assert False
+    except IOError:
+        pass
+    sock_b.close()
+
+
+def test_rpc_worker_pool():
+    if not tvm.module.enabled("rpc"):
+        return
+    @tvm.register_func("rpc.test.pool.addone")
+    def addone(x):
+        return x + 1
+    server = rpc.Server("localhost", key="x1", worker_pool=2,
+                        max_sessions=2, warm_devices=["cpu"])
+    # more sessions than the workers serve before they are replaced
+    for i in range(5):
+        client = rpc.connect(server.host, server.port, key="x1")
+        f1 = client.get_function("rpc.test.pool.addone")
+        assert f1(i) == i + 1
+        blob = bytearray(np.random.randint(0, 10, size=(10)))
+        client.upload(blob, "dat.bin")
+        assert client.download("dat.bin") == blob
+        del client
+    server.terminate()
+
+
+def test_rpc_measure_batch():
+    if not tvm.module.enabled("rpc"):
+        return
+    if not tvm.module.enabled("llvm"):
+        print("Skip because llvm is not enabled")
+        return
+    server = rpc.Server("localhost")
+    remote = rpc.connect(server.host, server.port)
+    n = 1024
+    A = tvm.placeholder((n,), name='A')
+    B = tvm.compute(A.shape, lambda *i: A(*i) + 1.0, name='B')
+    temp = util.tempdir()
+    files = []
+    for factor in [4, 16]:
+        s = tvm.create_schedule(B.op)
+        s[B].split(B.op.axis[0], factor=factor)
+        f = tvm.build(s, [A, B], "llvm", name="myadd")
+        path_dso = temp.relpath("myadd_%d.so" % factor)
+        f.export_library(path_dso)
+        files.append(path_dso)
+    # a broken module reports an error without stopping the batch
+    path_bad = temp.relpath("bad.so")
+    with open(path_bad, "wb") as fo:
+        fo.write(b"not a library")
+    files.insert(1, path_bad)
+    results = list(remote.measure_batch(
+        files, remote.cpu(0), [((n,), A.dtype), ((n,), B.dtype)],
+        func_name="myadd", number=4, repeat=2))
+    assert [r.path for r in results] == files
+    assert results[1].error is not None
+    for r in [results[0], results[2]]:
+        assert r.error is None
+        assert len(r.results) == 2
+        assert r.mean > 0
+
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
+    test_rpc_socket_io()
+    test_rpc_worker_pool()
+    test_rpc_measure_batch()
     test_rpc_remote_module()
     test_rpc_return_func()
     test_rpc_file_exchange()
@@ -28,6 +28,8 @@ from . import rasp
 from . import mali
 from . import opengl
 from . import util
+from . import schedule_db
+from . import tuner
 from . import rocm
 from . import vision
 # not import testing by default
@@ -53,6 +53,24 @@ def schedule_conv2d_nhwc(outs):
     return _default_schedule(outs, False)
 
 
+@tvm.target.generic_func
+def schedule_conv2d_NCHWc(outs):  # pylint: disable=invalid-name
+    """Schedule for conv2d_NCHWc
+
+    Parameters
+    ----------
+    outs: Array of Tensor
+          The computation graph description of conv2d_NCHWc
+          in the format of an array of tensors.
+
+    Returns
+    -------
+    sch: Schedule
+        The computation schedule for the op.
+    """
+    return _default_schedule(outs, False)
+
+
 @tvm.target.generic_func
 def schedule_conv2d_transpose_nchw(outs):
     """Schedule for conv2d_transpose_nchw
@@ -11,7 +11,7 @@ from .. import util
 from .. import tag
 from ..nn import pad
 from ..nn.conv2d import conv2d
-from ..nn.util import get_pad_tuple
+from ..nn.util import get_pad_tuple, const_matrix
 
 ##### SCHEDULE UTILITIES #####
 def fuse_and_bind(s, tensor, axis=None, num_thread=None):
@@ -65,21 +65,6 @@ def transpose(s, tensor, readers):
     s[tmp].compute_inline()
     return s.cache_write(tmp, "global"), tmp
 
-def const_array(data, name):
-    """ convert an const array to tvm tensor"""
-    row, col = data.shape
-    dtype = str(data.dtype)
-
-    def select_array(i, j):
-        now = tvm.const(0.0, dtype)
-        for ii in range(row):
-            for jj in range(col):
-                now = tvm.select(tvm.all(i % row == ii, j % col == jj),
-                                 tvm.const(data[ii][jj], dtype),
-                                 now)
-        return now
-    return tvm.compute(data.shape, select_array, name=name)
-
 
 @conv2d.register(["mali"])
 def decl_conv2d(data, kernel, stride, padding, layout='NCHW', out_dtype='float32'):
@@ -563,7 +548,7 @@ def _decl_winograd(data, kernel, stride, padding, layout, out_dtype):
                              name='d')
 
     # transform kernel
-    G = const_array(G_data, 'G')
+    G = const_matrix(G_data, 'G')
     r_kh = tvm.reduce_axis((0, KH), 'r_kh')
     r_kw = tvm.reduce_axis((0, KW), 'r_kw')
     U = tvm.compute((alpha, alpha, K // bna, C, bna), lambda eps, nu, k, c, kk:
@@ -571,7 +556,7 @@ def _decl_winograd(data, kernel, stride, padding, layout, out_dtype):
                             axis=[r_kh, r_kw]), name='U')
 
     # transform image
-    B = const_array(B_data, 'B')
+    B = const_matrix(B_data, 'B')
     r_eps = tvm.reduce_axis((0, alpha), 'r_eps')
     r_nu = tvm.reduce_axis((0, alpha), 'r_nu')
     V = tvm.compute((alpha, alpha, P_round // bnb, C, bnb), lambda eps, nu, b, c, bb:
@@ -585,7 +570,7 @@ def _decl_winograd(data, kernel, stride, padding, layout, out_dtype):
                             V[eps][nu][b // bnb][c][b % bnb], axis=c), name='M')
 
     # inverse transform
-    A = const_array(A_data, 'A')
+    A = const_matrix(A_data, 'A')
     r_eps = tvm.reduce_axis((0, alpha), 'r_eps')
     r_nu = tvm.reduce_axis((0, alpha), 'r_nu')
     Y = tvm.compute((K, P, m, m), lambda k, b, vh, vw:
@@ -2,10 +2,12 @@
 """Conv2D operators"""
 from __future__ import absolute_import as _abs
 from collections import namedtuple
+import numpy as np
 import tvm
 from .pad import pad
-from .util import get_pad_tuple
-from ..util import simplify
+from .util import get_pad_tuple, const_matrix
+from ..util import simplify, get_const_tuple
+from .. import schedule_db
 
 # workload description of conv2d
 Workload = namedtuple('Workload',
@@ -20,6 +22,10 @@ SpatialPack = namedtuple('SpatialPack',
 Im2ColPack = namedtuple('Im2ColPack',
                         ['vp', 'vq', 'ba', 'bc', 'unroll'])
 
+# schedule description of winograd F(tile_size x tile_size, 3 x 3)
+WinogradPack = namedtuple('WinogradPack',
+                          ['tile_size', 'bk', 'bp'])
+
 _WORKLOADS = [
     # workloads of resnet18 on imagenet
     Workload('float32', 'float32', 224, 224, 3, 64, 7, 7, 3, 3, 2, 2),
@@ -269,6 +275,200 @@ def _im2col_pack(data, kernel, stride, padding, out_dtype=None):
     return output
 
 
+def _winograd_matrices(tile_size, dtype):
+    """ Get the transform matrices A, B and G of winograd F(m x m, 3 x 3). """
+    if tile_size == 2:
+        A_data = np.array([
+            [1, 0],
+            [1, 1],
+            [1, -1],
+            [0, -1],
+        ], dtype)
+        B_data = np.array([
+            [1, 0, 0, 0],
+            [0, 1, -1, 1],
+            [-1, 1, 1, 0],
+            [0, 0, 0, -1],
+        ], dtype)
+        G_data = np.array([
+            [1, 0, 0],
+            [1.0/2, 1.0/2, 1.0/2],
+            [1.0/2, -1.0/2, 1.0/2],
+            [0, 0, 1],
+        ], dtype)
+    elif tile_size == 4:
+        A_data = np.array([
+            [1, 0, 0, 0],
+            [1, 1, 1, 1],
+            [1, -1, 1, -1],
+            [1, 2, 4, 8],
+            [1, -2, 4, -8],
+            [0, 0, 0, 1],
+        ], dtype)
+        B_data = np.array([
+            [4, 0, 0, 0, 0, 0],
+            [0, -4, 4, -2, 2, 4],
+            [-5, -4, -4, -1, -1, 0],
+            [0, 1, -1, 2, -2, -5],
+            [1, 1, 1, 1, 1, 0],
+            [0, 0, 0, 0, 0, 1],
+        ], dtype)
+        G_data = np.array([
+            [1.0/4, 0, 0],
+            [-1.0/6, -1.0/6, -1.0/6],
+            [-1.0/6, 1.0/6, -1.0/6],
+            [1.0/24, 1.0/12, 1.0/6],
+            [1.0/24, -1.0/12, 1.0/6],
+            [0, 0, 1],
+        ], dtype)
+    else:
+        raise ValueError("Unsupported tile size for winograd: {}".format(tile_size))
+    return A_data, B_data, G_data
+
+
+def winograd_weight_transform(kernel, tile_size, bk=1):
+    """Transform the kernel of a 3x3 convolution for winograd.
+
+    The result only depends on the kernel, so that it can be computed
+    once offline and given to conv2d_winograd_without_weight_transform.
+
+    Parameters
+    ----------
+    kernel : tvm.Tensor
+        4-D with shape [num_filter, in_channel, 3, 3]
+
+    tile_size : int
+        The output tile size of F(tile_size x tile_size, 3 x 3), 2 or 4.
+
+    bk : int, optional
+        The number of filters packed in the innermost axis.
+
+    Returns
+    -------
+    output : tvm.Tensor
+        5-D with shape [alpha, alpha, num_filter // bk, in_channel, bk],
+        where alpha = tile_size + 2
+    """
+    K, C, KH, KW = get_const_tuple(kernel.shape)
+    assert KH == 3 and KW == 3, "winograd only supports 3x3 kernels"
+    assert K % bk == 0, "bk must divide the number of filters"
+    alpha = tile_size + KH - 1
+    _, _, G_data = _winograd_matrices(tile_size, kernel.dtype)
+
+    G = const_matrix(G_data, 'G')
+    r_kh = tvm.reduce_axis((0, KH), 'r_kh')
+    r_kw = tvm.reduce_axis((0, KW), 'r_kw')
+    return tvm.compute((alpha, alpha, K // bk, C, bk), lambda eps, nu, k, c, kk:
+                       tvm.sum(kernel[k * bk + kk][c][r_kh][r_kw] * G[eps][r_kh] * G[nu][r_kw],
+                               axis=[r_kh, r_kw]), name='U', tag='winograd_weight_transform')
+
+
+def conv2d_winograd_without_weight_transform(data, kernel_transformed, stride, padding,
+                                             out_dtype=None, bp=8):
+    """Winograd convolution with a kernel transformed by winograd_weight_transform.
+
+    Parameters
+    ----------
+    data : tvm.Tensor
+        4-D with shape [batch, in_channel, in_height, in_width]
+
+    kernel_transformed : tvm.Tensor
+        5-D with shape [alpha, alpha, num_filter // bk, in_channel, bk]
+
+    stride : int or a list/tuple of two ints
+        stride size, must be 1
+
+    padding : int or a list/tuple of two ints
+        padding size, or [pad_height, pad_width]
+
+    out_dtype : str, optional
+        The output type, the type of data if None.
+
+    bp : int, optional
+        The number of tiles packed in the innermost axis.
+
+    Returns
+    -------
+    output : tvm.Tensor
+        4-D with shape [batch, out_channel, out_height, out_width]
+    """
+    out_dtype = data.dtype if out_dtype is None else out_dtype
+    N, C, H, W = get_const_tuple(data.shape)
+    alpha, _, KB, _, bk = get_const_tuple(kernel_transformed.shape)
+    K = KB * bk
+    m = alpha - 2
+    HPAD, WPAD, _, _ = get_pad_tuple(padding, (3, 3))
+    if isinstance(stride, (tuple, list)):
+        HSTR, WSTR = stride
+    else:
+        HSTR, WSTR = stride, stride
+    assert HSTR == 1 and WSTR == 1, "winograd only supports stride 1"
+
+    OH = H + 2 * HPAD - 2
+    OW = W + 2 * WPAD - 2
+    nH, nW = (OH + m - 1) // m, (OW + m - 1) // m
+    P = N * nH * nW
+    P_round = (P + bp - 1) // bp * bp
+    A_data, B_data, _ = _winograd_matrices(m, out_dtype)
+
+    # pad the partial tiles at the bottom and the right as well
+    data_pad = pad(data, (0, 0, HPAD, WPAD),
+                   (0, 0, nH * m + 2 - H - HPAD, nW * m + 2 - W - WPAD), name="data_pad")
+
+    # pack input tile
+    input_tile = tvm.compute((C, P_round // bp, alpha, alpha, bp),
+                             lambda c, b, eps, nu, bb:
+                             tvm.select(b * bp + bb < P,
+                                        data_pad[(b * bp + bb) // (nH * nW)][c]
+                                        [(b * bp + bb) // nW % nH * m + eps]
+                                        [(b * bp + bb) % nW * m + nu],
+                                        tvm.const(0, data_pad.dtype)),
+                             name='d')
+
+    # transform image
+    B = const_matrix(B_data, 'B')
+    r_eps = tvm.reduce_axis((0, alpha), 'r_eps')
+    r_nu = tvm.reduce_axis((0, alpha), 'r_nu')
+    V = tvm.compute((alpha, alpha, P_round // bp, C, bp), lambda eps, nu, b, c, bb:
+                    tvm.sum(input_tile[c][b][r_eps][r_nu][bb].astype(out_dtype) *
+                            B[r_eps][eps] * B[r_nu][nu],
+                            axis=[r_eps, r_nu]), name='V')
+
+    # batch gemm
+    c = tvm.reduce_axis((0, C), name='c')
+    M = tvm.compute((alpha, alpha, K, P_round), lambda eps, nu, k, b:
+                    tvm.sum(kernel_transformed[eps][nu][k // bk][c][k % bk].astype(out_dtype) *
+                            V[eps][nu][b // bp][c][b % bp], axis=c), name='M')
+
+    # inverse transform
+    A = const_matrix(A_data, 'A')
+    r_eps = tvm.reduce_axis((0, alpha), 'r_eps')
+    r_nu = tvm.reduce_axis((0, alpha), 'r_nu')
+    Y = tvm.compute((K, P, m, m), lambda k, b, vh, vw:
+                    tvm.sum(M[r_eps][r_nu][k][b] * A[r_eps][vh] * A[r_nu][vw],
+                            axis=[r_eps, r_nu]), name='Y')
+
+    # unpack output
+    output = tvm.compute((N, K, OH, OW), lambda n, k, h, w:
+                         Y[k][n * nH * nW + (h // m) * nW + w // m][h % m][w % m]
+                         # the following term is used to make the padding effective,
+                         # otherwise the padding will be eliminated by bound inference
+                         + tvm.const(0, out_dtype) * M[alpha - 1][alpha - 1][K - 1][P_round - 1],
+                         name='output', tag='winograd_conv_output')
+    return output
+
+
+def _winograd_pack(data, kernel, stride, padding, out_dtype=None):
+    """ Compute convolution with winograd, the kernel is transformed in the graph. """
+    if out_dtype is None:
+        out_dtype = data.dtype
+    wkl = _get_workload(data, kernel, stride, padding, out_dtype)
+    sch = _get_schedule(wkl)
+    kernel_transformed = winograd_weight_transform(kernel, sch.tile_size, sch.bk)
+    return conv2d_winograd_without_weight_transform(data, kernel_transformed, stride, padding,
+                                                    out_dtype, sch.bp)
+
+
 def conv2d_nchw(Input, Filter, stride, padding, out_dtype=None):
     """Convolution operator in NCHW layout.
 
@@ -425,8 +625,99 @@ def conv2d_nhwc(Input, Filter, stride, padding, out_dtype='float32'):
         name="Conv2dOutput", tag="conv2d_nhwc")
     return Output
 
+@tvm.target.generic_func
+def conv2d_NCHWc(data, kernel, stride, padding, out_dtype=None):
+    """Convolution operator in the channel blocked NCHW[x]c layout.
+
+    The data of a network can stay in the blocked layout between the
+    layers, the layout_transform ops only convert the inputs and outputs.
+
+    Parameters
+    ----------
+    data : tvm.Tensor
+        5-D with shape [batch, in_channel // ic_bn, in_height, in_width, ic_bn]
+
+    kernel : tvm.Tensor
+        6-D with shape [num_filter // oc_bn, in_channel // ic_bn,
+        filter_height, filter_width, ic_bn, oc_bn], i.e. layout OIHW[x]i[y]o
+
+    stride : int or a list/tuple of two ints
+        stride size, or [stride_height, stride_width]
+
+    padding : int or a list/tuple of two ints
+        padding size, or [pad_height, pad_width]
+
+    out_dtype : str, optional
+        The output type, the type of data if None.
+
+    Returns
+    -------
+    output : tvm.Tensor
+        5-D with shape [batch, num_filter // oc_bn, out_height, out_width, oc_bn]
+    """
+    out_dtype = data.dtype if out_dtype is None else out_dtype
+    batch, ic_chunk, in_height, in_width, ic_bn = get_const_tuple(data.shape)
+    oc_chunk, _, kernel_height, kernel_width, _, oc_bn = get_const_tuple(kernel.shape)
+    assert get_const_tuple(kernel.shape)[4] == ic_bn, "the in channel blocks do not match"
+    HPAD, WPAD, _, _ = get_pad_tuple(padding, (kernel_height, kernel_width))
+    if isinstance(stride, (tuple, list)):
+        HSTR, WSTR = stride
+    else:
+        HSTR, WSTR = stride, stride
+
+    out_height = (in_height + 2 * HPAD - kernel_height) // HSTR + 1
+    out_width = (in_width + 2 * WPAD - kernel_width) // WSTR + 1
+
+    DOPAD = (HPAD != 0 or WPAD != 0)
+    if DOPAD:
+        data_pad = pad(data, (0, 0, HPAD, WPAD, 0), name="data_pad")
+    else:
+        data_pad = data
+
+    ic = tvm.reduce_axis((0, ic_chunk * ic_bn), name='ic')
+    kh = tvm.reduce_axis((0, kernel_height), name='kh')
+    kw = tvm.reduce_axis((0, kernel_width), name='kw')
+    return tvm.compute((batch, oc_chunk, out_height, out_width, oc_bn),
+                       lambda n, occ, oh, ow, ocb:
+                       tvm.sum(data_pad[n, ic // ic_bn, oh * HSTR + kh, ow * WSTR + kw,
+                                        ic % ic_bn].astype(out_dtype) *
+                               kernel[occ, ic // ic_bn, kh, kw, ic % ic_bn, ocb].astype(out_dtype),
+                               axis=[ic, kh, kw]),
+                       name='conv2d_NCHWc', tag='conv2d_NCHWc')
+
+
+def _get_out_size(wkl):
+    """ Get the output height and width of a workload. """
+    out_height = (wkl.height + 2 * wkl.hpad - wkl.hkernel) // wkl.hstride + 1
+    out_width = (wkl.width + 2 * wkl.wpad - wkl.wkernel) // wkl.wstride + 1
+    return out_height, out_width
+
+
+def _valid_spatial_pack(wkl, sch):
+    out_height, out_width = _get_out_size(wkl)
+    return (wkl.out_filter % sch.vc == 0 and
+            out_height % sch.vh == 0 and out_width % sch.vw == 0)
+
+
+def _valid_im2col_pack(wkl, sch):
+    out_height, out_width = _get_out_size(wkl)
+    return (out_height * out_width) % sch.vp == 0 and wkl.out_filter % sch.vq == 0
+
+
+def _valid_winograd_pack(wkl, sch):
+    return (wkl.hkernel == 3 and wkl.wkernel == 3 and
+            wkl.hstride == 1 and wkl.wstride == 1 and
+            wkl.in_dtype.startswith('float') and sch.tile_size in (2, 4) and
+            wkl.out_filter % sch.bk == 0)
+
+
 # map from schedule type to declaration function
 _SCH_TO_DECL_FUNC = {
     SpatialPack: _spatial_pack,
     Im2ColPack: _im2col_pack,
+    WinogradPack: _winograd_pack,
 }
+
+schedule_db.register_schedule_type(SpatialPack, _valid_spatial_pack)
+schedule_db.register_schedule_type(Im2ColPack, _valid_im2col_pack)
+schedule_db.register_schedule_type(WinogradPack, _valid_winograd_pack)
@@ -1,6 +1,7 @@
 # pylint: disable=invalid-name, unused-variable
 """NN operator common utilities"""
 from __future__ import absolute_import
+import tvm
 from ..util import get_const_int
 
 def infer_pad(data, data_pad):
@@ -100,3 +101,36 @@ def get_pad_tuple(padding, kernel):
     pad_top = (pad_h + 1) // 2
     pad_left = (pad_w + 1) // 2
     return pad_top, pad_left, pad_h - pad_top, pad_w - pad_left
+
+
+def const_matrix(matrix, name="const_matrix"):
+    """Convert a constant numpy matrix to a tvm tensor.
+
+    The elements are selected by the indices, so that they are folded
+    into constants when the indices are unrolled.
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray
+        The 2-D constant matrix.
+
+    name : str, optional
+        The name of the tensor.
+
+    Returns
+    -------
+    tensor : tvm.Tensor
+        The tensor of the matrix.
+    """
+    row, col = matrix.shape
+    dtype = str(matrix.dtype)
+
+    def select_array(i, j):
+        now = tvm.const(0.0, dtype)
+        for ii in range(row):
+            for jj in range(col):
+                now = tvm.select(tvm.all(i % row == ii, j % col == jj),
+                                 tvm.const(matrix[ii][jj], dtype),
+                                 now)
+        return now
+    return tvm.compute(matrix.shape, select_array, name=name)
@@ -0,0 +1,71 @@
+# pylint: disable=invalid-name,unused-variable,invalid-name
+"""Winograd Conv2D schedule shared by the CPU targets"""
+from __future__ import absolute_import as _abs
+import tvm
+
+from ..util import get_const_tuple
+
+
+def _schedule_winograd(s, op, last):
+    """ Schedule winograd convolution, the blocking is read from the tensor shapes. """
+    output = op.output(0)
+    Y = op.input_tensors[0]
+    M, A = s[Y].op.input_tensors
+    U, V = s[M].op.input_tensors
+    d, B = s[V].op.input_tensors
+    data_pad = s[d].op.input_tensors[0]
+    bk = get_const_tuple(U.shape)[4]
+    bp = get_const_tuple(V.shape)[4]
+
+    # padding
+    s[data_pad].compute_inline()
+
+    # transform kernel, nothing to do when it is transformed offline
+    if isinstance(U.op, tvm.tensor.ComputeOp) and 'winograd_weight_transform' in U.op.tag:
+        kernel, G = s[U].op.input_tensors
+        s[G].compute_inline()
+        eps, nu, k, c, kk = s[U].op.axis
+        r_kh, r_kw = s[U].op.reduce_axis
+        s[U].reorder(k, c, eps, nu, r_kh, r_kw, kk)
+        _ = [s[U].unroll(x) for x in [eps, nu, r_kh, r_kw]]
+        s[U].vectorize(kk)
+        s[U].parallel(k)
+
+    # transform image, one tile of one channel at a time
+    s[B].compute_inline()
+    eps, nu, b, c, bb = s[V].op.axis
+    r_eps, r_nu = s[V].op.reduce_axis
+    s[V].reorder(b, c, eps, nu, r_eps, r_nu, bb)
+    _ = [s[V].unroll(x) for x in [eps, nu, r_eps, r_nu]]
+    s[V].vectorize(bb)
+    s[V].parallel(b)
+    s[d].compute_at(s[V], c)
+
+    # batch gemm, bk x bp accumulators stay in registers
+    MM = s.cache_write(M, 'global')
+    eps, nu, k, b = s[M].op.axis
+    ko, bo, ki, bi = s[M].tile(k, b, bk, bp)
+    s[M].vectorize(bi)
+    s[M].parallel(s[M].fuse(eps, nu))
+    s[MM].compute_at(s[M], bo)
+    eps, nu, k, b = s[MM].op.axis
+    c = s[MM].op.reduce_axis[0]
+    s[MM].reorder(eps, nu, c, k, b)
+    s[MM].unroll(k)
+    s[MM].vectorize(b)
+
+    # inverse transform
+    s[A].compute_inline()
+    k, b, vh, vw = s[Y].op.axis
+    r_eps, r_nu = s[Y].op.reduce_axis
+    _ = [s[Y].unroll(x) for x in [vh, vw, r_eps, r_nu]]
+    s[Y].parallel(k)
+
+    # schedule output
+    if output.op not in s.outputs:  # has bias
+        s[output].compute_inline()
+        output = last
+    n, k, h, w = s[output].op.axis
+    s[output].parallel(s[output].fuse(n, k))
+
+    return s
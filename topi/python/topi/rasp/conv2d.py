@@ -9,7 +9,9 @@ from ..nn.conv2d import SpatialPack, Im2ColPack
 from ..nn.conv2d import _WORKLOADS, _SCH_TO_DECL_FUNC
 from ..nn.conv2d import _get_workload
 from ..nn.util import infer_pad, infer_stride
+from ..nn.winograd_cpu import _schedule_winograd
 from .. import generic
+from .. import schedule_db
 
 _SCHEDULES = [
     # float32 imagenet
@@ -67,8 +69,17 @@ _SCHEDULES = [
 
 @_get_schedule.register("rasp")
 def _schedule_conv2d(wkl):
+    target = _target.current_target(allow_none=False)
+    # tuned schedules first, then the builtin table, then the nearest tuned workload
+    db = schedule_db.get_database()
+    sch = db.lookup(target, wkl, nearest=False, sch_types=_SCH_TO_DECL_FUNC)
+    if sch is not None:
+        return sch
     if wkl not in _WORKLOADS:
-        raise ValueError("no schedule for such workload: {}".format(wkl))
+        sch = db.lookup(target, wkl, sch_types=_SCH_TO_DECL_FUNC)
+        if sch is None:
+            raise ValueError("no schedule for such workload: {}".format(wkl))
+        return sch
     idx = _WORKLOADS.index(wkl)
     sch = _SCHEDULES[idx]
     return sch
@@ -355,5 +366,8 @@ def schedule_conv2d(outs):
                                     kernel, kernel_vec,
                                     conv_out, output, outs[0])
 
+        if 'winograd_conv_output' in op.tag:
+            _schedule_winograd(s, op, outs[0])
+
     traverse(outs[0].op)
     return s
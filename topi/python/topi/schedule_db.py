@@ -0,0 +1,267 @@
+"""Database of tuned conv2d schedules.
+
+The database maps a conv2d Workload and a target to the schedule
+parameters of the workload, e.g. SpatialPack or AVXConvCommonFwd.
+It is stored in a json file, or in a sqlite file when the path ends
+with .db or .sqlite, and is loaded lazily when it is first queried.
+
+The default database is given by the TOPI_SCHEDULE_DB environment
+variable and can be replaced with load_database. The platform specific
+_get_schedule functions consult it before their builtin tables, and
+fall back to the schedule of the nearest workload that is valid.
+"""
+from __future__ import absolute_import as _abs
+import json
+import math
+import os
+
+# name -> (schedule type, validate function)
+_SCHEDULE_TYPES = {}
+
+# workload fields that must be equal for a schedule to be reused
+_STRUCTURE_FIELDS = ('in_dtype', 'out_dtype', 'hkernel', 'wkernel',
+                     'hpad', 'wpad', 'hstride', 'wstride')
+# workload fields compared by the nearest workload search
+_SIZE_FIELDS = ('height', 'width', 'in_filter', 'out_filter')
+
+
+def register_schedule_type(sch_type, fvalid=None):
+    """Register a schedule type so that it can be stored in the database.
+
+    Parameters
+    ----------
+    sch_type : namedtuple class
+        The schedule type.
+
+    fvalid : function(Workload, schedule) -> bool, optional
+        Whether a schedule can be used by a workload,
+        e.g. its blocking factors divide the shape.
+    """
+    _SCHEDULE_TYPES[sch_type.__name__] = (sch_type, fvalid)
+
+
+def is_valid(wkl, sch):
+    """Check whether a schedule can be used by a workload.
+
+    Parameters
+    ----------
+    wkl : Workload
+        The conv2d workload.
+
+    sch : namedtuple
+        The schedule.
+
+    Returns
+    -------
+    valid : bool
+        Whether the schedule is valid for the workload.
+    """
+    entry = _SCHEDULE_TYPES.get(type(sch).__name__)
+    if entry is None:
+        return False
+    fvalid = entry[1]
+    return fvalid is None or fvalid(wkl, sch)
+
+
+def _target_key(target):
+    """The target name and the options that affect the schedule."""
+    parts = str(target).split()
+    opts = sorted(opt for opt in parts[1:]
+                  if opt.split('=')[0] in ('-device', '-mcpu', '-target'))
+    return " ".join(parts[:1] + opts)
+
+
+def _encode(wkl, sch):
+    return (json.dumps(dict(wkl._asdict()), sort_keys=True),
+            json.dumps({"type": type(sch).__name__, "params": dict(sch._asdict())},
+                       sort_keys=True))
+
+
+def _decode(wkl_json, sch_json):
+    from .nn.conv2d import Workload
+    wkl = Workload(**json.loads(wkl_json))
+    sch = json.loads(sch_json)
+    if sch["type"] not in _SCHEDULE_TYPES:
+        raise ValueError("unknown schedule type %s" % sch["type"])
+    return wkl, _SCHEDULE_TYPES[sch["type"]][0](**sch["params"])
+
+
+def _distance(lhs, rhs):
+    return sum(abs(math.log(float(getattr(lhs, f))) - math.log(float(getattr(rhs, f))))
+               for f in _SIZE_FIELDS)
+
+
+class ScheduleDatabase(object):
+    """Persistent database of conv2d schedules.
+
+    Parameters
+    ----------
+    path : str, optional
+        The json or sqlite file, the database is only in memory if None.
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self._records = None
+
+    def _is_sqlite(self, path):
+        return path.endswith(".db") or path.endswith(".sqlite")
+
+    def _load(self):
+        if self._records is not None:
+            return self._records
+        self._records = {}
+        if not self.path or not os.path.exists(self.path):
+            return self._records
+        if self._is_sqlite(self.path):
+            import sqlite3
+            conn = sqlite3.connect(self.path)
+            try:
+                rows = conn.execute("SELECT target, workload, schedule FROM schedules").fetchall()
+            finally:
+                conn.close()
+        else:
+            with open(self.path) as fin:
+                rows = [(rec["target"], json.dumps(rec["workload"]), json.dumps(rec["schedule"]))
+                        for rec in json.load(fin)]
+        for target, wkl_json, sch_json in rows:
+            wkl, sch = _decode(wkl_json, sch_json)
+            self._records.setdefault(target, {})[wkl] = sch
+        return self._records
+
+    def add(self, target, wkl, sch):
+        """Add the schedule of a workload, replacing the existing one.
+
+        Parameters
+        ----------
+        target : tvm.target.Target or str
+            The target of the schedule.
+
+        wkl : Workload
+            The conv2d workload.
+
+        sch : namedtuple
+            The schedule, its type must be registered.
+        """
+        if type(sch).__name__ not in _SCHEDULE_TYPES:
+            raise ValueError("unknown schedule type %s" % type(sch).__name__)
+        self._load().setdefault(_target_key(target), {})[wkl] = sch
+
+    def records(self):
+        """List all the records.
+
+        Returns
+        -------
+        records : list of tuple (target, Workload, schedule)
+            The records in the database.
+        """
+        return [(target, wkl, sch)
+                for target, table in self._load().items()
+                for wkl, sch in table.items()]
+
+    def save(self, path=None):
+        """Save the database.
+
+        Parameters
+        ----------
+        path : str, optional
+            The file to be written, the path of the database if None.
+        """
+        path = path or self.path
+        if not path:
+            raise ValueError("the database has no path")
+        rows = [(target,) + _encode(wkl, sch) for target, wkl, sch in self.records()]
+        if self._is_sqlite(path):
+            import sqlite3
+            conn = sqlite3.connect(path)
+            try:
+                conn.execute("CREATE TABLE IF NOT EXISTS schedules ("
+                             "target TEXT, workload TEXT, schedule TEXT, "
+                             "PRIMARY KEY (target, workload))")
+                conn.executemany("INSERT OR REPLACE INTO schedules VALUES (?, ?, ?)", rows)
+                conn.commit()
+            finally:
+                conn.close()
+        else:
+            recs = [{"target": target,
+                     "workload": json.loads(wkl_json),
+                     "schedule": json.loads(sch_json)} for target, wkl_json, sch_json in rows]
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w") as fout:
+                json.dump(recs, fout, indent=2)
+            os.rename(tmp_path, path)
+
+    def lookup(self, target, wkl, nearest=True, sch_types=None):
+        """Find the schedule of a workload.
+
+        Parameters
+        ----------
+        target : tvm.target.Target or str
+            The target of the schedule.
+
+        wkl : Workload
+            The conv2d workload.
+
+        nearest : bool, optional
+            When the workload is not in the database, use the schedule of
+            the nearest workload with the same kernel, padding and stride
+            that is valid for wkl.
+
+        sch_types : list of type, optional
+            The schedule types accepted by the caller.
+
+        Returns
+        -------
+        sch : namedtuple or None
+            The schedule, None if none is found.
+        """
+        table = self._load().get(_target_key(target), {})
+        sch = table.get(wkl)
+        if sch is not None and (sch_types is None or type(sch) in sch_types):
+            return sch
+        if not nearest:
+            return None
+        best, best_dist = None, None
+        for other, sch in table.items():
+            if sch_types is not None and type(sch) not in sch_types:
+                continue
+            if any(getattr(other, f) != getattr(wkl, f) for f in _STRUCTURE_FIELDS):
+                continue
+            if not is_valid(wkl, sch):
+                continue
+            dist = _distance(other, wkl)
+            if best_dist is None or dist < best_dist:
+                best, best_dist = sch, dist
+        return best
+
+
+_DATABASE = None
+
+def load_database(path):
+    """Set the database consulted by the conv2d schedules.
+
+    Parameters
+    ----------
+    path : str or None
+        The json or sqlite file, loaded when it is first queried.
+
+    Returns
+    -------
+    db : ScheduleDatabase
+        The database.
+    """
+    global _DATABASE
+    _DATABASE = ScheduleDatabase(path)
+    return _DATABASE
+
+
+def get_database():
+    """Get the database consulted by the conv2d schedules.
+
+    Returns
+    -------
+    db : ScheduleDatabase
+        The database, given by TOPI_SCHEDULE_DB unless load_database is called.
+    """
+    if _DATABASE is None:
+        load_database(os.environ.get("TOPI_SCHEDULE_DB", None))
+    return _DATABASE
@@ -18,8 +18,8 @@ def conv2d_nchw_python(a_np, w_np, stride, padding):
     stride : int or a list/tuple of two ints
         Stride size, or [stride_height, stride_width]
 
-    padding : int or str
-        Padding size, or ['VALID', 'SAME']
+    padding : int or a list/tuple of two ints or str
+        Padding size, or [pad_height, pad_width], or ['VALID', 'SAME']
 
     Returns
     -------
@@ -34,6 +34,8 @@ def conv2d_nchw_python(a_np, w_np, stride, padding):
         stride_h, stride_w = stride
     if isinstance(padding, int):
         pad_h = pad_w = padding * 2
+    elif isinstance(padding, (tuple, list)):
+        pad_h, pad_w = padding[0] * 2, padding[1] * 2
     elif padding == 'VALID':
         pad_h = 0
         pad_w = 0
@@ -53,9 +55,10 @@ def conv2d_nchw_python(a_np, w_np, stride, padding):
     for n in range(batch):
         for f in range(out_channel):
             for c in range(in_channel):
-                if pad_h > 0:
+                if pad_h > 0 or pad_w > 0:
                     apad = np.zeros((in_height + pad_h, in_width + pad_w))
-                    apad[pad_top:-pad_bottom, pad_left:-pad_right] = a_np[n, c]
+                    apad[pad_top:pad_top + in_height,
+                         pad_left:pad_left + in_width] = a_np[n, c]
                 else:
                     apad = a_np[n, c]
                 out = scipy.signal.convolve2d(
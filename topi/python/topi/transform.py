@@ -268,3 +268,89 @@ def split(ary, indices_or_sections, axis=0):
                         lambda *indices: _compute(begin_id, *indices), name="s%d" %i)
             for i, (out_shape, begin_id) in enumerate(zip(out_shapes, begin_ids))]
     # pylint: enable=cell-var-from-loop
+
+
+def _parse_layout(layout):
+    """Parse a layout such as NCHW8c into a list of (axis, factor).
+
+    The factor of a primal axis (upper case) is None, a sub axis (lower
+    case) is a block of the primal axis of the same letter.
+    """
+    axes = []
+    factor = ""
+    for char in layout:
+        if char.isdigit():
+            factor += char
+        elif char.isupper() and not factor:
+            axes.append((char, None))
+        elif char.islower() and factor:
+            axes.append((char.upper(), int(factor)))
+            factor = ""
+        else:
+            raise ValueError("Invalid layout %s" % layout)
+    primal = [axis for axis, factor in axes if factor is None]
+    blocked = [axis for axis, factor in axes if factor is not None]
+    if factor or len(set(primal)) != len(primal) or len(set(blocked)) != len(blocked) or \
+            not set(blocked) <= set(primal):
+        raise ValueError("Invalid layout %s" % layout)
+    return axes
+
+
+@tvm.tag_scope(tag=tag.INJECTIVE)
+def layout_transform(data, src_layout, dst_layout):
+    """Transform the layout of data, e.g. from NCHW to NCHW8c.
+
+    Each upper case letter of a layout is an axis, and a lower case letter
+    after a factor is a block of the axis of the same letter. e.g. the
+    conv2d_NCHWc kernel of OIHW is OIHW8i16o.
+
+    Parameters
+    ----------
+    data : tvm.Tensor
+        The input tensor in src_layout.
+
+    src_layout : str
+        The layout of data.
+
+    dst_layout : str
+        The layout of the output, with the same axes as src_layout.
+
+    Returns
+    -------
+    ret : tvm.Tensor
+    """
+    src = _parse_layout(src_layout)
+    dst = _parse_layout(dst_layout)
+    if set(axis for axis, _ in src) != set(axis for axis, _ in dst):
+        raise ValueError("Cannot transform layout %s to %s" % (src_layout, dst_layout))
+    shape = get_const_tuple(data.shape)
+    assert len(shape) == len(src), "The layout %s does not match the shape" % src_layout
+
+    # the full extent of each primal axis
+    extent = {}
+    for (axis, _), dim in zip(src, shape):
+        extent[axis] = extent.get(axis, 1) * dim
+    src_factor = dict((axis, factor) for axis, factor in src if factor is not None)
+    dst_factor = dict((axis, factor) for axis, factor in dst if factor is not None)
+    for axis, factor in dst_factor.items():
+        assert extent[axis] % factor == 0, \
+            "The block %d does not divide the axis %s of %d" % (factor, axis, extent[axis])
+    out_shape = [factor if factor is not None else extent[axis] // dst_factor.get(axis, 1)
+                 for axis, factor in dst]
+
+    def _compute(*indices):
+        index = {}
+        for (axis, factor), idx in zip(dst, indices):
+            if factor is None:
+                idx = idx * dst_factor.get(axis, 1)
+            index[axis] = index[axis] + idx if axis in index else idx
+        src_indices = []
+        for axis, factor in src:
+            if factor is not None:
+                src_indices.append(index[axis] % factor)
+            elif axis in src_factor:
+                src_indices.append(index[axis] // src_factor[axis])
+            else:
+                src_indices.append(index[axis])
+        return data(*src_indices)
+    return tvm.compute(out_shape, _compute)
@@ -0,0 +1,321 @@
+# pylint: disable=invalid-name
+"""Search the conv2d schedule parameters of a workload.
+
+The tuner enumerates the valid SpatialPack, Im2ColPack, WinogradPack,
+AVXConvCommonFwd or AVXConv1x1Fwd parameters of a Workload, builds each candidate and
+measures it locally, on a RPC session or on the devices of a tracker.
+The best schedule is added to a ScheduleDatabase, which the conv2d
+schedules consult before their builtin tables.
+
+e.g.
+
+.. code-block:: python
+
+    wkl = Workload('float32', 'float32', 40, 40, 32, 64, 3, 3, 1, 1, 1, 1)
+    best, records = topi.tuner.tune_conv2d(
+        wkl, "llvm -mcpu=core-avx2", db="schedules.json")
+"""
+from __future__ import absolute_import as _abs
+import itertools
+import logging
+import random
+from collections import namedtuple
+
+import tvm
+from tvm.contrib import util as _util
+from . import generic
+from . import schedule_db
+from .nn.conv2d import conv2d, SpatialPack, Im2ColPack, WinogradPack, _get_out_size
+from .x86.conv2d_avx_common import AVXConvCommonFwd
+from .x86.conv2d_avx_1x1 import AVXConv1x1Fwd
+
+# measured schedule, mean is the time cost in seconds, None if failed
+TuneRecord = namedtuple("TuneRecord", ["sch", "mean", "error"])
+
+
+def _divisors(n, max_value=None):
+    return [i for i in range(1, n + 1)
+            if n % i == 0 and (max_value is None or i <= max_value)]
+
+
+def _vector_factors(n, vec_len, max_value):
+    """Multiples of the vector length that divide n, all the divisors if there is none."""
+    factors = [i for i in _divisors(n, max_value) if i % vec_len == 0]
+    return factors or _divisors(n, max_value)
+
+
+def _vector_length(target, dtype):
+    """The number of lanes of a vector register of the target."""
+    bits = 128
+    for opt in target.options:
+        if opt == '-mcpu=skylake-avx512':
+            bits = 512
+        elif opt.startswith('-mcpu=') and 'avx' in opt:
+            bits = 256
+    return max(bits // tvm.ndarray.TVMType(dtype).bits, 1)
+
+
+def _spatial_pack_space(wkl, vec_len):
+    out_height, out_width = _get_out_size(wkl)
+    for vh, vw, vc in itertools.product(_divisors(out_height, 4),
+                                        _divisors(out_width, 8),
+                                        _vector_factors(wkl.out_filter, vec_len, 32)):
+        for ba, bc, unroll in itertools.product(_divisors(out_height // vh, 16),
+                                                _divisors(wkl.out_filter // vc, 16),
+                                                (True, False)):
+            yield SpatialPack(vh, vw, vc, ba, bc, unroll)
+
+
+def _im2col_pack_space(wkl, vec_len):
+    out_height, out_width = _get_out_size(wkl)
+    for vp, vq in itertools.product(_divisors(out_height * out_width, 16),
+                                    _vector_factors(wkl.out_filter, vec_len, 16)):
+        for ba, bc, unroll in itertools.product(_divisors(out_height * out_width // vp, 16),
+                                                _divisors(wkl.out_filter // vq, 16),
+                                                (True, False)):
+            yield Im2ColPack(vp, vq, ba, bc, unroll)
+
+
+def _avx_common_space(wkl, vec_len):
+    _, out_width = _get_out_size(wkl)
+    for sch in itertools.product(_divisors(wkl.in_filter, 64),
+                                 _vector_factors(wkl.out_filter, vec_len, 4 * vec_len),
+                                 _divisors(out_width, 32),
+                                 (True, False)):
+        yield AVXConvCommonFwd(*sch)
+
+
+def _avx_1x1_space(wkl, vec_len):
+    out_height, out_width = _get_out_size(wkl)
+    for sch in itertools.product(_divisors(wkl.in_filter, 64),
+                                 _vector_factors(wkl.out_filter, vec_len, 4 * vec_len),
+                                 _divisors(out_height, 4),
+                                 _divisors(out_width, 32)):
+        yield AVXConv1x1Fwd(*sch)
+
+
+def _winograd_space(wkl, vec_len):
+    for sch in itertools.product((2, 4), _divisors(wkl.out_filter, 8), (vec_len, 2 * vec_len)):
+        yield WinogradPack(*sch)
+
+
+_SPACE_FUNC = {
+    SpatialPack: _spatial_pack_space,
+    Im2ColPack: _im2col_pack_space,
+    AVXConvCommonFwd: _avx_common_space,
+    AVXConv1x1Fwd: _avx_1x1_space,
+    WinogradPack: _winograd_space,
+}
+
+
+def _default_sch_types(target):
+    if 'avx' in str(target):
+        return [AVXConvCommonFwd, AVXConv1x1Fwd, WinogradPack]
+    if 'rasp' in target.keys:
+        return [SpatialPack, Im2ColPack, WinogradPack]
+    raise ValueError("no tunable conv2d schedule for target %s" % str(target))
+
+
+def schedule_space(wkl, target, sch_types=None):
+    """Enumerate the valid schedules of a workload.
+
+    Parameters
+    ----------
+    wkl : Workload
+        The conv2d workload.
+
+    target : tvm.target.Target or str
+        The target of the schedules.
+
+    sch_types : list of type, optional
+        The schedule types to enumerate, chosen by the target if None.
+
+    Returns
+    -------
+    space : list of namedtuple
+        The schedules whose blocking factors are valid for the workload.
+    """
+    if isinstance(target, str):
+        target = tvm.target.create(target)
+    sch_types = sch_types or _default_sch_types(target)
+    vec_len = _vector_length(target, wkl.out_dtype)
+    return [sch for sch_type in sch_types
+            for sch in _SPACE_FUNC[sch_type](wkl, vec_len)
+            if schedule_db.is_valid(wkl, sch)]
+
+
+def _conv2d_args(wkl):
+    """The (shape, dtype) of the data, kernel and output of a workload."""
+    out_height, out_width = _get_out_size(wkl)
+    return [((1, wkl.in_filter, wkl.height, wkl.width), wkl.in_dtype),
+            ((wkl.out_filter, wkl.in_filter, wkl.hkernel, wkl.wkernel), wkl.in_dtype),
+            ((1, wkl.out_filter, out_height, out_width), wkl.out_dtype)]
+
+
+def _build_candidate(target, target_host, wkl, sch):
+    """Build the conv2d of a workload with the given schedule."""
+    target = tvm.target.create(target)
+    db = schedule_db.ScheduleDatabase()
+    db.add(target, wkl, sch)
+    # the exact entry of the database is used before the builtin tables
+    saved = schedule_db._DATABASE
+    schedule_db._DATABASE = db
+    try:
+        with target:
+            data = tvm.placeholder(_conv2d_args(wkl)[0][0], dtype=wkl.in_dtype, name='data')
+            kernel = tvm.placeholder(_conv2d_args(wkl)[1][0], dtype=wkl.in_dtype, name='kernel')
+            out = conv2d(data, kernel, (wkl.hstride, wkl.wstride), (wkl.hpad, wkl.wpad),
+                         layout='NCHW', out_dtype=wkl.out_dtype)
+            s = generic.schedule_conv2d_nchw([out])
+        return tvm.build(s, [data, kernel, out], target, target_host=target_host)
+    finally:
+        schedule_db._DATABASE = saved
+
+
+def _measure_local(target, target_host, wkl, candidates, number, repeat):
+    ctx = tvm.context(target.target_name, 0)
+    arrays = [tvm.nd.empty(shape, dtype, ctx) for shape, dtype in _conv2d_args(wkl)]
+    for sch in candidates:
+        try:
+            func = _build_candidate(str(target), target_host, wkl, sch)
+            timer = func.time_evaluator(func.entry_name, ctx, number=number, repeat=repeat)
+            yield TuneRecord(sch, timer(*arrays).mean, None)
+        except Exception as err:  # pylint: disable=broad-except
+            yield TuneRecord(sch, None, str(err))
+
+
+def _measure_remote(remote, dev_type, target, target_host, wkl, candidates, number, repeat):
+    temp = _util.tempdir()
+    files, built = [], []
+    for i, sch in enumerate(candidates):
+        try:
+            # a tarball is linked on the device, so cross compiled candidates load too
+            path = temp.relpath("cand%d.tar" % i)
+            _build_candidate(str(target), target_host, wkl, sch).export_library(path)
+            files.append(path)
+            built.append(sch)
+        except Exception as err:  # pylint: disable=broad-except
+            yield TuneRecord(sch, None, "Build error: %s" % str(err))
+    if files:
+        results = remote.measure_batch(files, remote.context(dev_type, 0), _conv2d_args(wkl),
+                                       number=number, repeat=repeat)
+        for sch, ret in zip(built, results):
+            yield TuneRecord(sch, ret.mean, ret.error)
+
+
+def _measure_tracker(tracker_addr, key, num_devices, dev_type,
+                     target, target_host, wkl, candidates, number, repeat):
+    from tvm.contrib import rpc
+    builds = [(_build_candidate, (str(target), target_host, wkl, sch)) for sch in candidates]
+    for ret in rpc.measure_pipelined(builds, tracker_addr, key, _conv2d_args(wkl),
+                                     num_devices=num_devices, dev_type=dev_type,
+                                     number=number, repeat=repeat):
+        yield TuneRecord(candidates[ret.index], ret.mean, ret.error)
+
+
+def tune_conv2d(wkl,
+                target,
+                target_host=None,
+                sch_types=None,
+                db=None,
+                remote=None,
+                tracker_addr=None,
+                key=None,
+                num_devices=1,
+                dev_type="cpu",
+                max_candidates=None,
+                seed=0,
+                number=10,
+                repeat=3):
+    """Search the best conv2d schedule of a workload.
+
+    The candidates are measured on the local machine by default, on
+    remote when it is given, or on the devices of key requested from
+    the tracker at tracker_addr.
+
+    Parameters
+    ----------
+    wkl : Workload
+        The conv2d workload.
+
+    target : tvm.target.Target or str
+        The target of the schedules.
+
+    target_host : str, optional
+        The host target, e.g. the cross compilation target of a remote device.
+
+    sch_types : list of type, optional
+        The schedule types to search, chosen by the target if None.
+
+    db : ScheduleDatabase or str, optional
+        The database or the file to add the best schedule to.
+
+    remote : RPCSession, optional
+        The session to measure the candidates on.
+
+    tracker_addr : tuple, optional
+        The address of the tracker to request devices from.
+
+    key : str, optional
+        The type key of the devices of the tracker.
+
+    num_devices : int, optional
+        The number of devices requested from the tracker.
+
+    dev_type : int or str, optional
+        The device type of the remote context.
+
+    max_candidates : int, optional
+        Measure a random sample of the space when it is larger than this.
+
+    seed : int, optional
+        The seed of the random sample.
+
+    number : int, optional
+        The number of steps used in measuring each time interval.
+
+    repeat : int, optional
+        Number of times to run the timer measurement.
+
+    Returns
+    -------
+    best : namedtuple
+        The fastest schedule.
+
+    records : list of TuneRecord
+        The measured candidates, the fastest first and the failed ones last.
+    """
+    if isinstance(target, str):
+        target = tvm.target.create(target)
+    candidates = schedule_space(wkl, target, sch_types)
+    if not candidates:
+        raise ValueError("no valid schedule for workload: {}".format(wkl))
+    if max_candidates and len(candidates) > max_candidates:
+        candidates = random.Random(seed).sample(candidates, max_candidates)
+    logging.info("Tuning %s with %d candidates", str(wkl), len(candidates))
+
+    if tracker_addr is not None:
+        results = _measure_tracker(tracker_addr, key, num_devices, dev_type,
+                                   target, target_host, wkl, candidates, number, repeat)
+    elif remote is not None:
+        results = _measure_remote(remote, dev_type, target, target_host,
+                                  wkl, candidates, number, repeat)
+    else:
+        results = _measure_local(target, target_host, wkl, candidates, number, repeat)
+    records = []
+    for rec in results:
+        if rec.error is not None:
+            logging.info("Candidate %s failed: %s", str(rec.sch), rec.error)
+        records.append(rec)
+    records.sort(key=lambda rec: float("inf") if rec.mean is None else rec.mean)
+    if records[0].mean is None:
+        raise RuntimeError("all the candidates failed, last error: %s" % records[-1].error)
+    best = records[0].sch
+
+    if db is not None:
+        if isinstance(db, str):
+            db = schedule_db.ScheduleDatabase(db)
+        db.add(target, wkl, best)
+        if db.path:
+            db.save()
+    return best, records
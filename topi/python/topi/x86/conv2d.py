@@ -3,16 +3,20 @@
 import tvm
 from .. import generic, tag
 from .. import nn
+from .. import schedule_db
+from ..util import get_const_tuple
 from ..nn.util import infer_pad, infer_stride
-from ..nn.conv2d import conv2d, _get_workload, _get_schedule, _WORKLOADS
+from ..nn.conv2d import conv2d, _get_workload, _get_schedule, _WORKLOADS, WinogradPack, Workload
+from ..nn.winograd_cpu import _schedule_winograd
 
-from . import conv2d_avx_1x1, conv2d_avx_common
+from . import conv2d_avx_1x1, conv2d_avx_common, conv2d_winograd
 from .conv2d_avx_common import AVXConvCommonFwd
 from .conv2d_avx_1x1 import AVXConv1x1Fwd
 
 _AVX_SCH_TO_DECL_FUNC = {
     AVXConvCommonFwd: conv2d_avx_common._declaration_conv,
-    AVXConv1x1Fwd: conv2d_avx_1x1._declaration_conv
+    AVXConv1x1Fwd: conv2d_avx_1x1._declaration_conv,
+    WinogradPack: conv2d_winograd._declaration_conv
 }
 
 _AVX_SCH_TO_SCH_FUNC = {
@@ -22,12 +26,21 @@ _AVX_SCH_TO_SCH_FUNC = {
 
 @_get_schedule.register("cpu")
 def _get_schedule_conv(wkl):
+    target = tvm.target.current_target(allow_none=False)
+    # tuned schedules first, then the builtin table, then the nearest tuned workload,
+    # then the blocking derived from the workload
+    db = schedule_db.get_database()
+    sch = db.lookup(target, wkl, nearest=False, sch_types=_AVX_SCH_TO_DECL_FUNC)
+    if sch is not None:
+        return sch
     if wkl not in _WORKLOADS:
-        raise ValueError("no schedule for such workload: {}".format(wkl))
+        sch = db.lookup(target, wkl, sch_types=_AVX_SCH_TO_DECL_FUNC)
+        if sch is None:
+            sch = _fallback_schedule(wkl, target)
+        return sch
     idx = _WORKLOADS.index(wkl)
 
     fp32_vec_len = 8
-    target = tvm.target.current_target(allow_none=False)
     for opt in target.options:
         if opt == '-mcpu=skylake-avx512':
             fp32_vec_len = 16
@@ -63,12 +76,24 @@ def _get_schedule_conv(wkl):
     return sch
 
 
+def _fallback_schedule(wkl, target):
+    """Derive the blocking of a workload from the vector width of the target."""
+    if '-mcpu=skylake-avx512' in target.options:
+        vec_bits, num_regs = 512, 32
+    else:
+        vec_bits, num_regs = 256, 16
+    simd_width = vec_bits // tvm.TVMType(wkl.out_dtype).bits
+    if wkl.hkernel == 1 and wkl.wkernel == 1:
+        return conv2d_avx_1x1._fallback_schedule(wkl, simd_width, num_regs)
+    return conv2d_avx_common._fallback_schedule(wkl, simd_width, num_regs)
+
+
 @conv2d.register("cpu")
 def _declaration_conv(data, kernel, stride, padding, layout, out_dtype):
     out_dtype = data.dtype if out_dtype is None else out_dtype
     target = tvm.target.current_target(allow_none=False)
     wkl = _get_workload(data, kernel, stride, padding, out_dtype)
-    if wkl in _WORKLOADS and 'avx' in str(target) and layout == 'NCHW':
+    if 'avx' in str(target) and layout == 'NCHW':
         sch = _get_schedule(wkl)
         return _AVX_SCH_TO_DECL_FUNC[type(sch)](data, kernel, stride, padding, layout, out_dtype)
     elif layout == 'NCHW':
@@ -127,6 +152,9 @@ def schedule_conv2d(outs):
                 if tensor.op.input_tensors:
                     traverse(tensor.op)
 
+        if 'winograd_conv_output' in op.tag:
+            _schedule_winograd(s, op, outs[0])
+
         if 'conv2d_nchw' in op.tag:
             if 'avx' in str(target):
                 try:
@@ -159,6 +187,68 @@ def schedule_conv2d(outs):
     return s
 
 
+def _get_workload_NCHWc(data, data_pad, kernel, output):
+    """Get the workload of conv2d_NCHWc from its stages."""
+    _, ic_chunk, in_height, in_width, ic_bn = get_const_tuple(data.shape)
+    oc_chunk, _, kernel_height, kernel_width, _, oc_bn = get_const_tuple(kernel.shape)
+    _, _, out_height, out_width, _ = get_const_tuple(output.shape)
+    hpad, wpad = 0, 0
+    if data_pad is not None:
+        _, _, pad_height, pad_width, _ = get_const_tuple(data_pad.shape)
+        hpad, wpad = (pad_height - in_height) // 2, (pad_width - in_width) // 2
+    hstride = (in_height + 2 * hpad - kernel_height) // (out_height - 1) if out_height > 1 else 1
+    wstride = (in_width + 2 * wpad - kernel_width) // (out_width - 1) if out_width > 1 else 1
+    return Workload(data.dtype, output.dtype, in_height, in_width, ic_chunk * ic_bn,
+                    oc_chunk * oc_bn, kernel_height, kernel_width, hpad, wpad, hstride, wstride)
+
+
+@generic.schedule_conv2d_NCHWc.register(["cpu"])
+def schedule_conv2d_NCHWc(outs):
+    """Create schedule for tensors"""
+    s = tvm.create_schedule([x.op for x in outs])
+    target = tvm.target.current_target(allow_none=False)
+
+    def traverse(op):
+        """Traverse operators from computation graph"""
+        # inline all one-to-one-mapping operators except the last stage (output)
+        if tag.is_broadcast(op.tag):
+            if op not in s.outputs:
+                s[op].compute_inline()
+            for tensor in op.input_tensors:
+                if tensor.op.input_tensors:
+                    traverse(tensor.op)
+
+        if 'conv2d_NCHWc' in op.tag:
+            conv_out = op.output(0)
+            data_pad, kernel = op.input_tensors
+            data = data_pad
+            if isinstance(data_pad.op, tvm.tensor.ComputeOp) and "pad" in data_pad.op.tag:
+                data = data_pad.op.input_tensors[0]
+            else:
+                data_pad = None
+            if isinstance(kernel.op, tvm.tensor.ComputeOp):
+                # the kernel is transformed in the graph instead of offline
+                s[kernel].parallel(s[kernel].op.axis[0])
+
+            # the blocking of the channels is given by the layout
+            wkl = _get_workload_NCHWc(data, data_pad, kernel, conv_out)
+            sch = _get_schedule(wkl)
+            if type(sch) not in (AVXConvCommonFwd, AVXConv1x1Fwd):
+                sch = _fallback_schedule(wkl, target)
+            ic_bn = get_const_tuple(data.shape)[4]
+            oc_bn = get_const_tuple(conv_out.shape)[4]
+            sch = sch._replace(ic_bn=ic_bn, oc_bn=oc_bn)
+            if isinstance(sch, AVXConv1x1Fwd):
+                conv2d_avx_1x1._schedule_conv_NCHWc(s, sch, op.input_tensors[0],
+                                                    conv_out, outs[0])
+            else:
+                conv2d_avx_common._schedule_conv_NCHWc(s, sch, op.input_tensors[0],
+                                                       conv_out, outs[0])
+
+    traverse(outs[0].op)
+    return s
+
+
 @generic.schedule_conv2d_nhwc.register(["cpu"])
 def schedule_conv2d_nhwc(outs):
     """Create schedule for tensors"""
@@ -5,12 +5,39 @@ from collections import namedtuple
 import tvm
 
 from ..util import get_const_tuple
-from ..nn.conv2d import _get_schedule, _get_workload
+from ..nn.conv2d import _get_schedule, _get_workload, _get_out_size
 from ..nn.util import infer_pad, infer_stride
 from ..nn.pad import pad
+from .. import schedule_db
+from .conv2d_avx_common import _largest_divisor, _L1_CACHE_BYTES
 
 AVXConv1x1Fwd = namedtuple('AVXConv1x1Fwd', ['ic_bn', 'oc_bn', 'oh_factor', 'ow_factor'])
 
+def _valid_schedule(wkl, sch):
+    if wkl.hkernel != 1 or wkl.wkernel != 1:
+        return False
+    out_height, out_width = _get_out_size(wkl)
+    return (wkl.in_filter % sch.ic_bn == 0 and wkl.out_filter % sch.oc_bn == 0 and
+            out_height % sch.oh_factor == 0 and out_width % sch.ow_factor == 0)
+
+schedule_db.register_schedule_type(AVXConv1x1Fwd, _valid_schedule)
+
+def _fallback_schedule(wkl, simd_width, num_regs):
+    """ Derive the schedule of a workload missing from the tables.
+
+    The oh_factor x ow_factor accumulators fit in the registers, and
+    ic_bn keeps the kernel block and the data tile in half of L1.
+    """
+    out_height, out_width = _get_out_size(wkl)
+    nbytes = tvm.TVMType(wkl.in_dtype).bits // 8
+
+    oc_bn = _largest_divisor(wkl.out_filter, simd_width)
+    ow_factor = _largest_divisor(out_width, num_regs - 2)
+    oh_factor = _largest_divisor(out_height, (num_regs - 2) // ow_factor)
+    bytes_per_ic = (oc_bn + oh_factor * ow_factor) * nbytes
+    ic_bn = _largest_divisor(wkl.in_filter, _L1_CACHE_BYTES // 2 // bytes_per_ic)
+    return AVXConv1x1Fwd(ic_bn, oc_bn, oh_factor, ow_factor)
+
 def _declaration_conv(data, kernel, stride, padding, layout, out_dtype):
     assert layout == 'NCHW', "only support NCHW convolution for AVX"
     wkl = _get_workload(data, kernel, stride, padding, out_dtype)
@@ -28,7 +55,7 @@ def _declaration_conv(data, kernel, stride, padding, layout, out_dtype):
     out_height = (in_height + 2 * HPAD - kernel_height) // HSTR + 1
     out_width = (in_width + 2 * WPAD - kernel_width) // WSTR + 1
 
-    DOPAD = (HPAD != 0 and WPAD != 0)
+    DOPAD = (HPAD != 0 or WPAD != 0)
     if DOPAD:
         data_pad = pad(data, (0, 0, HPAD, WPAD), name="data_pad")
     else:
@@ -67,7 +94,7 @@ def _schedule_conv(s, data, data_pad, data_vec, kernel, kernel_vec, conv_out, ou
     sch = _get_schedule(wkl)
 
     HPAD, WPAD = wkl.hpad, wkl.wpad
-    DOPAD = (HPAD != 0 and WPAD != 0)
+    DOPAD = (HPAD != 0 or WPAD != 0)
 
     A, W = data, kernel_vec
     A0, A1 = data_pad, data_vec
@@ -124,3 +151,40 @@ def _schedule_conv(s, data, data_pad, data_vec, kernel, kernel_vec, conv_out, ou
     s[O].parallel(parallel_axis)
 
     return s
+
+
+def _schedule_conv_NCHWc(s, sch, data, conv_out, last):
+    """ Schedule 1x1 conv2d_NCHWc, the data and kernel are already blocked. """
+    # schedule padding
+    if isinstance(data.op, tvm.tensor.ComputeOp) and "pad" in data.op.tag:
+        batch, ic_chunk, ih, iw, ic_block = s[data].op.axis
+        parallel_axis = s[data].fuse(ic_chunk, ih)
+        s[data].parallel(parallel_axis)
+        s[data].vectorize(ic_block)
+
+    C, O = conv_out, last
+    CC = s.cache_write(C, 'global')
+    if C != O:
+        s[C].compute_inline()
+
+    # schedule the output, the conv or the fused elementwise ops
+    batch, oc_chunk, oh, ow, oc_block = s[O].op.axis
+    oh_outer, oh_inner = s[O].split(oh, factor=sch.oh_factor)
+    ow_outer, ow_inner = s[O].split(ow, factor=sch.ow_factor)
+    s[O].reorder(oc_chunk, oh_outer, ow_outer, oh_inner, ow_inner, oc_block)
+    parallel_axis = s[O].fuse(oc_chunk, oh_outer)
+    s[O].vectorize(oc_block)
+    s[O].parallel(parallel_axis)
+
+    # schedule conv
+    s[CC].compute_at(s[O], ow_outer)
+    _, oc_chunk, oh, ow, oc_block = s[CC].op.axis
+    ic, kh, kw = s[CC].op.reduce_axis
+
+    ic_chunk, ic_block = s[CC].split(ic, factor=sch.ic_bn)
+    s[CC].reorder(oc_chunk, ic_chunk, ic_block, kh, kw, oh, ow, oc_block)
+    s[CC].vectorize(oc_block)
+    s[CC].unroll(ow)
+    s[CC].unroll(oh)
+
+    return s
@@ -5,12 +5,50 @@ from collections import namedtuple
 import tvm
 
 from ..util import get_const_tuple
-from ..nn.conv2d import _get_schedule, _get_workload
+from ..nn.conv2d import _get_schedule, _get_workload, _get_out_size
 from ..nn.util import infer_pad, infer_stride
 from ..nn.pad import pad
+from .. import schedule_db
 
 AVXConvCommonFwd = namedtuple('AVXConvCommonFwd', ['ic_bn', 'oc_bn', 'reg_n', 'unroll_kw'])
 
+def _valid_schedule(wkl, sch):
+    _, out_width = _get_out_size(wkl)
+    return (wkl.in_filter % sch.ic_bn == 0 and wkl.out_filter % sch.oc_bn == 0 and
+            out_width % sch.reg_n == 0)
+
+schedule_db.register_schedule_type(AVXConvCommonFwd, _valid_schedule)
+
+# L1 data cache assumed by the fallback schedules
+_L1_CACHE_BYTES = 32 * 1024
+
+def _largest_divisor(n, bound):
+    """ The largest divisor of n not greater than bound. """
+    for i in range(min(n, max(bound, 1)), 0, -1):
+        if n % i == 0:
+            return i
+    return 1
+
+
+def _fallback_schedule(wkl, simd_width, num_regs):
+    """ Derive the schedule of a workload missing from the tables.
+
+    oc_bn fills a vector register, reg_n output columns of accumulators
+    fit in the registers beside the kernel and data operands, and ic_bn
+    keeps the kernel block and the data rows it reads in half of L1.
+    """
+    _, out_width = _get_out_size(wkl)
+    nbytes = tvm.TVMType(wkl.in_dtype).bits // 8
+
+    oc_bn = _largest_divisor(wkl.out_filter, simd_width)
+    reg_n = _largest_divisor(out_width, num_regs - 2)
+    in_width = (reg_n - 1) * wkl.wstride + wkl.wkernel
+    bytes_per_ic = wkl.hkernel * (wkl.wkernel * oc_bn + in_width) * nbytes
+    ic_bn = _largest_divisor(wkl.in_filter, _L1_CACHE_BYTES // 2 // bytes_per_ic)
+    # unrolling kw multiplies the fully unrolled ow_block
+    unroll_kw = reg_n * wkl.wkernel <= 2 * num_regs
+    return AVXConvCommonFwd(ic_bn, oc_bn, reg_n, unroll_kw)
+
 def _declaration_conv(data, kernel, stride, padding, layout, out_dtype):
     out_dtype = data.dtype if out_dtype is None else out_dtype
     assert layout == 'NCHW', "only support NCHW convolution for AVX"
@@ -30,7 +68,7 @@ def _declaration_conv(data, kernel, stride, padding, layout, out_dtype):
     out_width = (in_width + 2 * WPAD - kernel_width) // WSTR + 1
 
     # pack data
-    DOPAD = (HPAD != 0 and WPAD != 0)
+    DOPAD = (HPAD != 0 or WPAD != 0)
     if DOPAD:
         data_pad = pad(data, (0, 0, HPAD, WPAD), name="data_pad")
     else:
@@ -80,7 +118,7 @@ def _schedule_conv(s, data, data_pad, data_vec, kernel, kernel_vec, conv_out, ou
     sch = _get_schedule(wkl)
 
     HPAD, WPAD = wkl.hpad, wkl.wpad
-    DOPAD = (HPAD != 0 and WPAD != 0)
+    DOPAD = (HPAD != 0 or WPAD != 0)
 
     A, W = data, kernel_vec
     A0, A1 = data_pad, data_vec
@@ -141,3 +179,45 @@ def _schedule_conv(s, data, data_pad, data_vec, kernel, kernel_vec, conv_out, ou
     s[O].parallel(parallel_axis)
 
     return s
+
+
+def _schedule_conv_NCHWc(s, sch, data, conv_out, last):
+    """ Schedule conv2d_NCHWc, the data and kernel are already blocked. """
+    # schedule padding
+    if isinstance(data.op, tvm.tensor.ComputeOp) and "pad" in data.op.tag:
+        batch, ic_chunk, ih, iw, ic_block = s[data].op.axis
+        parallel_axis = s[data].fuse(ic_chunk, ih)
+        s[data].parallel(parallel_axis)
+        s[data].vectorize(ic_block)
+
+    C, O = conv_out, last
+    CC = s.cache_write(C, 'global')
+    if C != O:
+        s[C].compute_inline()
+
+    # schedule the output, the conv or the fused elementwise ops
+    batch, oc_chunk, oh, ow, oc_block = s[O].op.axis
+    ow_chunk, ow_block = s[O].split(ow, factor=sch.reg_n)
+    s[O].reorder(oc_chunk, oh, ow_chunk, ow_block, oc_block)
+    parallel_axis = s[O].fuse(oc_chunk, oh)
+    s[O].vectorize(oc_block)
+    s[O].parallel(parallel_axis)
+
+    # schedule conv
+    s[CC].compute_at(s[O], ow_chunk)
+    _, oc_chunk, oh, ow, oc_block = s[CC].op.axis
+    ic, kh, kw = s[CC].op.reduce_axis
+
+    ow_chunk, ow_block = s[CC].split(ow, factor=sch.reg_n)
+    ic_chunk, ic_block = s[CC].split(ic, factor=sch.ic_bn)
+
+    if sch.unroll_kw:
+        s[CC].reorder(oc_chunk, oh, ow_chunk, ic_chunk, kh, ic_block, kw, ow_block, oc_block)
+        s[CC].unroll(kw)
+    else:
+        s[CC].reorder(oc_chunk, oh, ow_chunk, ic_chunk, kh, kw, ic_block, ow_block, oc_block)
+
+    s[CC].vectorize(oc_block)
+    s[CC].unroll(ow_block)
+
+    return s
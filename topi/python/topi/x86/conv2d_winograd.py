@@ -0,0 +1,10 @@
+# pylint: disable=invalid-name,unused-variable,invalid-name
+"""Winograd Conv2D declaration on x86"""
+from __future__ import absolute_import as _abs
+
+from ..nn.conv2d import _winograd_pack
+
+
+def _declaration_conv(data, kernel, stride, padding, layout, out_dtype):
+    assert layout == 'NCHW', "only support NCHW convolution for winograd"
+    return _winograd_pack(data, kernel, stride, padding, out_dtype)
@@ -4,6 +4,16 @@ from __future__ import absolute_import as _abs
 import tvm
 from .. import generic
 
+# the widest channel block vectorized by the NCHWc schedules
+_MAX_VECTOR_LANES = 32
+
+def _vectorize_channel_block(stage, c_block):
+    """Vectorize the channel block when it is a small constant,
+    other 5-D tensors may have a large or symbolic last axis."""
+    extent = c_block.dom.extent
+    if isinstance(extent, tvm.expr.IntImm) and extent.value <= _MAX_VECTOR_LANES:
+        stage.vectorize(c_block)
+
 @generic.schedule_injective.register(["cpu"])
 def schedule_injective(outs):
     """X86 schedule for injective op.
@@ -27,6 +37,12 @@ def schedule_injective(outs):
         n, c, _, _ = s[x].op.axis
         fused = s[x].fuse(n, c) # for nhwc layout, fuse n and h
         s[x].parallel(fused)
+    elif len(s[x].op.axis) == 5:
+        # NCHWc layout, vectorize the channel block
+        n, c, h, _, c_block = s[x].op.axis
+        fused = s[x].fuse(n, c, h)
+        s[x].parallel(fused)
+        _vectorize_channel_block(s[x], c_block)
     else:
         s[x].parallel(s[x].op.axis[0])
     return s
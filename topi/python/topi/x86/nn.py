@@ -4,6 +4,7 @@ from __future__ import absolute_import as _abs
 import tvm
 from .. import generic
 from .. import tag
+from .injective import _vectorize_channel_block
 
 def _default_schedule(outs, auto_inline):
     """Default schedule for x86."""
@@ -17,6 +18,12 @@ def _default_schedule(outs, auto_inline):
         n, c, _, _ = s[x].op.axis
         fused = s[x].fuse(n, c) # for nhwc layout, fuse n and h
         s[x].parallel(fused)
+    elif len(s[x].op.axis) == 5:
+        # NCHWc layout, vectorize the channel block
+        n, c, h, _, c_block = s[x].op.axis
+        fused = s[x].fuse(n, c, h)
+        s[x].parallel(fused)
+        _vectorize_channel_block(s[x], c_block)
     else:
         s[x].parallel(s[x].op.axis[0])
     return s
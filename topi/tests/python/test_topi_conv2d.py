@@ -8,10 +8,11 @@ from tvm.contrib.pickle_memoize import memoize
 from topi.util import get_const_tuple
 
 
-def verify_conv2d(batch, in_size, in_channel, num_filter, kernel, stride, padding):
+def verify_conv2d(batch, in_size, in_channel, num_filter, kernel, stride, padding,
+                  target=None):
     in_height = in_width = in_size
 
-    with tvm.target.rasp():
+    with target or tvm.target.rasp():
         A = tvm.placeholder((batch, in_channel, in_height, in_width), name='A')
         W = tvm.placeholder((num_filter, in_channel, kernel, kernel), name='W')
         B = topi.nn.conv2d(A, W, stride, padding)
@@ -34,12 +35,26 @@ def verify_conv2d(batch, in_size, in_channel, num_filter, kernel, stride, paddin
     a = tvm.nd.array(a_np, ctx)
     w = tvm.nd.array(w_np, ctx)
     b = tvm.nd.array(np.zeros(get_const_tuple(B.shape), dtype=B.dtype), ctx)
-    func = tvm.build(s, [A, W, B], "llvm")
+    func = tvm.build(s, [A, W, B], str(target) if target else "llvm")
     func(a, w, b)
     np.testing.assert_allclose(b.asnumpy(), b_np, rtol=1e-5)
 
 def test_conv2d():
     verify_conv2d(1, 56,  64, 64,  3, 1, 1)
 
+def test_conv2d_x86_fallback():
+    if not tvm.module.enabled("llvm") or not tvm.codegen.llvm_host_has_feature("avx2"):
+        print("skip because the host does not support avx2")
+        return
+    # workloads missing from the x86 tables
+    target = tvm.target.create("llvm -mcpu=core-avx2")
+    verify_conv2d(1, 40,  32, 48,  3, 1, 1, target)
+    verify_conv2d(1, 33,  30, 50,  1, 1, 0, target)
+    verify_conv2d(1, 17,  19, 45,  5, 2, 2, target)
+    # padding only on the height or the width
+    verify_conv2d(1, 20,  16, 32,  3, 1, (1, 0), target)
+    verify_conv2d(1, 20,  16, 32,  1, 1, (0, 1), target)
+
 if __name__ == "__main__":
     test_conv2d()
+    test_conv2d_x86_fallback()
@@ -0,0 +1,67 @@
+"""Example code to do conv2d and pooling in NCHWc layout."""
+import numpy as np
+import tvm
+import topi
+import topi.testing
+from tvm.contrib.pickle_memoize import memoize
+from topi.util import get_const_tuple
+
+
+def verify_conv2d_NCHWc(batch, in_size, in_channel, num_filter, kernel, stride, padding,
+                        ic_bn=8, oc_bn=8):
+    in_height = in_width = in_size
+    target = tvm.target.create("llvm")
+
+    with target:
+        A = tvm.placeholder((batch, in_channel, in_height, in_width), name='A')
+        W = tvm.placeholder((num_filter // oc_bn, in_channel // ic_bn, kernel, kernel,
+                             ic_bn, oc_bn), name='W')
+        data = topi.layout_transform(A, "NCHW", "NCHW%dc" % ic_bn)
+        conv = topi.nn.conv2d_NCHWc(data, W, stride, padding)
+        relu = topi.nn.relu(conv)
+        s = topi.generic.schedule_conv2d_NCHWc([relu])
+        P = topi.nn.pool(relu, (2, 2), (2, 2), (0, 0), 'max', layout="NCHWc")
+        B = topi.layout_transform(P, "NCHW%dc" % oc_bn, "NCHW")
+        s_out = topi.generic.schedule_injective(B)
+
+    a_shape = get_const_tuple(A.shape)
+    dtype = A.dtype
+
+    @memoize("topi.tests.test_topi_conv2d_NCHWc.verify_conv2d_NCHWc")
+    def get_ref_data():
+        a_np = np.random.uniform(size=a_shape).astype(dtype)
+        w_np = np.random.uniform(size=(num_filter, in_channel, kernel, kernel)).astype(dtype)
+        c_np = np.maximum(topi.testing.conv2d_nchw_python(a_np, w_np, stride, padding), 0)
+        return a_np, w_np, c_np
+
+    a_np, w_np, c_np = get_ref_data()
+    # OIHW to OIHW[ic_bn]i[oc_bn]o
+    w_nchwc = w_np.reshape(num_filter // oc_bn, oc_bn, in_channel // ic_bn, ic_bn,
+                           kernel, kernel).transpose(0, 2, 4, 5, 3, 1)
+    c_nchwc = c_np.reshape(batch, num_filter // oc_bn, oc_bn,
+                           c_np.shape[2], c_np.shape[3]).transpose(0, 1, 3, 4, 2)
+    out_height, out_width = c_np.shape[2] // 2, c_np.shape[3] // 2
+    b_np = c_np[:, :, :out_height * 2, :out_width * 2].reshape(
+        batch, num_filter, out_height, 2, out_width, 2).max(axis=(3, 5))
+
+    ctx = tvm.cpu(0)
+    a = tvm.nd.array(a_np, ctx)
+    w = tvm.nd.array(w_nchwc.copy(), ctx)
+    c = tvm.nd.array(np.zeros(get_const_tuple(relu.shape), dtype=relu.dtype), ctx)
+    b = tvm.nd.array(np.zeros(get_const_tuple(B.shape), dtype=B.dtype), ctx)
+    func = tvm.build(s, [A, W, relu], target)
+    func(a, w, c)
+    np.testing.assert_allclose(c.asnumpy(), c_nchwc, rtol=1e-5)
+    func_out = tvm.build(s_out, [relu, B], target)
+    func_out(c, b)
+    np.testing.assert_allclose(b.asnumpy(), b_np, rtol=1e-5)
+
+
+def test_conv2d_NCHWc():
+    verify_conv2d_NCHWc(1, 56,  64, 64,  3, 1, 1)
+    verify_conv2d_NCHWc(1, 28,  32, 64,  1, 1, 0, ic_bn=16, oc_bn=8)
+    verify_conv2d_NCHWc(1, 17,  16, 32,  3, 2, 1)
+
+
+if __name__ == "__main__":
+    test_conv2d_NCHWc()
@@ -0,0 +1,107 @@
+"""Example code to do winograd conv2d on CPU."""
+import numpy as np
+import tvm
+import topi
+import topi.testing
+from tvm.contrib import util
+from tvm.contrib.pickle_memoize import memoize
+from topi import schedule_db
+from topi.nn.conv2d import Workload, WinogradPack
+from topi.util import get_const_tuple
+
+
+def get_ref_data(batch, in_channel, in_size, num_filter, padding):
+    a_shape = (batch, in_channel, in_size, in_size)
+    w_shape = (num_filter, in_channel, 3, 3)
+
+    @memoize("topi.tests.test_topi_conv2d_winograd.get_ref_data")
+    def _get_ref_data():
+        a_np = np.random.uniform(size=a_shape).astype('float32')
+        w_np = np.random.uniform(size=w_shape).astype('float32')
+        b_np = topi.testing.conv2d_nchw_python(a_np, w_np, 1, padding)
+        return a_np, w_np, b_np
+    return _get_ref_data()
+
+
+def verify_conv2d_winograd(batch, in_channel, in_size, num_filter, padding, sch):
+    if not tvm.module.enabled("llvm"):
+        print("skip because llvm is not enabled..")
+        return
+    target = tvm.target.create("llvm -mcpu=core-avx2")
+    wkl = Workload('float32', 'float32', in_size, in_size, in_channel, num_filter,
+                   3, 3, padding, padding, 1, 1)
+    temp = util.tempdir()
+    db = schedule_db.load_database(temp.relpath("schedules.json"))
+    db.add(target, wkl, sch)
+    try:
+        with target:
+            A = tvm.placeholder((batch, in_channel, in_size, in_size), name='A')
+            W = tvm.placeholder((num_filter, in_channel, 3, 3), name='W')
+            B = topi.nn.conv2d(A, W, 1, padding)
+            assert B.op.tag == 'winograd_conv_output'
+            s = topi.generic.schedule_conv2d_nchw([B])
+        func = tvm.build(s, [A, W, B], target)
+    finally:
+        schedule_db.load_database(None)
+
+    a_np, w_np, b_np = get_ref_data(batch, in_channel, in_size, num_filter, padding)
+    ctx = tvm.cpu(0)
+    a = tvm.nd.array(a_np, ctx)
+    w = tvm.nd.array(w_np, ctx)
+    b = tvm.nd.array(np.zeros(get_const_tuple(B.shape), dtype=B.dtype), ctx)
+    func(a, w, b)
+    np.testing.assert_allclose(b.asnumpy(), b_np, rtol=1e-4)
+
+
+def verify_conv2d_winograd_offline(batch, in_channel, in_size, num_filter, padding, tile_size):
+    if not tvm.module.enabled("llvm"):
+        print("skip because llvm is not enabled..")
+        return
+    W = tvm.placeholder((num_filter, in_channel, 3, 3), name='W')
+    U = topi.nn.winograd_weight_transform(W, tile_size, bk=4)
+    s = tvm.create_schedule(U.op)
+    ftransform = tvm.build(s, [W, U], "llvm")
+
+    with tvm.target.create("llvm"):
+        A = tvm.placeholder((batch, in_channel, in_size, in_size), name='A')
+        UT = tvm.placeholder(get_const_tuple(U.shape), name='UT')
+        B = topi.nn.conv2d_winograd_without_weight_transform(A, UT, 1, padding)
+        s = topi.generic.schedule_conv2d_nchw([B])
+    func = tvm.build(s, [A, UT, B], "llvm")
+
+    a_np, w_np, b_np = get_ref_data(batch, in_channel, in_size, num_filter, padding)
+    ctx = tvm.cpu(0)
+    u = tvm.nd.array(np.zeros(get_const_tuple(U.shape), dtype=U.dtype), ctx)
+    ftransform(tvm.nd.array(w_np, ctx), u)
+    a = tvm.nd.array(a_np, ctx)
+    b = tvm.nd.array(np.zeros(get_const_tuple(B.shape), dtype=B.dtype), ctx)
+    func(a, u, b)
+    np.testing.assert_allclose(b.asnumpy(), b_np, rtol=1e-4)
+
+
+def test_conv2d_winograd():
+    verify_conv2d_winograd(1, 32, 14, 64, 1, WinogradPack(2, 4, 8))
+    verify_conv2d_winograd(1, 16, 15, 32, 1, WinogradPack(4, 8, 8))
+    verify_conv2d_winograd(2, 8, 10, 16, 0, WinogradPack(4, 4, 16))
+    verify_conv2d_winograd_offline(1, 16, 13, 32, 1, 4)
+
+
+def test_conv2d_winograd_rasp():
+    wkl = Workload('float32', 'float32', 56, 56, 64, 64, 3, 3, 1, 1, 1, 1)
+    temp = util.tempdir()
+    db = schedule_db.load_database(temp.relpath("schedules.json"))
+    db.add(tvm.target.rasp(), wkl, WinogradPack(4, 4, 4))
+    try:
+        with tvm.target.rasp():
+            A = tvm.placeholder((1, 64, 56, 56), name='A')
+            W = tvm.placeholder((64, 64, 3, 3), name='W')
+            B = topi.nn.relu(topi.nn.conv2d(A, W, 1, 1))
+            s = topi.generic.schedule_conv2d_nchw([B])
+        tvm.lower(s, [A, W, B])
+    finally:
+        schedule_db.load_database(None)
+
+
+if __name__ == "__main__":
+    test_conv2d_winograd()
+    test_conv2d_winograd_rasp()
@@ -0,0 +1,60 @@
+"""Test the database of tuned conv2d schedules."""
+import tvm
+import topi
+from tvm.contrib import util
+from topi import schedule_db
+from topi.nn.conv2d import Workload, SpatialPack, _WORKLOADS, _get_schedule
+from topi.x86.conv2d_avx_common import AVXConvCommonFwd
+
+
+def verify_save_load(path):
+    db = schedule_db.ScheduleDatabase(path)
+    wkl = Workload('float32', 'float32', 96, 96, 32, 48, 3, 3, 1, 1, 1, 1)
+    sch = SpatialPack(2, 4, 8, 1, 1, True)
+    db.add(tvm.target.rasp(), wkl, sch)
+    db.save()
+
+    target = tvm.target.rasp()
+    db = schedule_db.ScheduleDatabase(path)
+    assert db.lookup(target, wkl) == sch
+    # the nearest workload with the same kernel and stride
+    assert db.lookup(target, wkl._replace(height=48, width=48)) == sch
+    assert db.lookup(target, wkl._replace(height=48, width=48), nearest=False) is None
+    # vc does not divide the number of filters
+    assert db.lookup(target, wkl._replace(out_filter=44)) is None
+    assert db.lookup(target, wkl._replace(hstride=2, wstride=2)) is None
+    assert db.lookup("llvm", wkl) is None
+
+
+def test_save_load():
+    temp = util.tempdir()
+    verify_save_load(temp.relpath("schedules.json"))
+    verify_save_load(temp.relpath("schedules.db"))
+
+
+def test_get_schedule():
+    temp = util.tempdir()
+    db = schedule_db.load_database(temp.relpath("schedules.json"))
+    target = tvm.target.create("llvm -mcpu=core-avx2")
+    wkl = Workload('float32', 'float32', 40, 40, 32, 64, 3, 3, 1, 1, 1, 1)
+    sch = AVXConvCommonFwd(16, 8, 8, False)
+    db.add(target, wkl, sch)
+    try:
+        with target:
+            assert _get_schedule(wkl) == sch
+            assert _get_schedule(wkl._replace(height=80, width=80)) == sch
+            # the builtin table is still used
+            assert isinstance(_get_schedule(_WORKLOADS[1]), AVXConvCommonFwd)
+            A = tvm.placeholder((1, 32, 40, 40), name='A')
+            W = tvm.placeholder((64, 32, 3, 3), name='W')
+            B = topi.nn.conv2d(A, W, 1, 1)
+            s = topi.generic.schedule_conv2d_nchw([B])
+        # only lowered, not built nor run, so any host can run the test
+        tvm.lower(s, [A, W, B])
+    finally:
+        schedule_db.load_database(None)
+
+
+if __name__ == "__main__":
+    test_save_load()
+    test_get_schedule()
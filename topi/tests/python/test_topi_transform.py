@@ -185,6 +185,29 @@ def verify_expand_like(in_shape, out_shape, axis):
         check_device(device)
 
 
+def verify_layout_transform(in_shape, src_layout, dst_layout, fref):
+    A = tvm.placeholder(shape=in_shape, name="A")
+    B = topi.layout_transform(A, src_layout, dst_layout)
+    def check_device(device):
+        ctx = tvm.context(device, 0)
+        if not ctx.exist:
+            print("Skip because %s is not enabled" % device)
+            return
+        print("Running on target: %s" % device)
+        with tvm.target.create(device):
+            s = topi.generic.schedule_injective(B)
+        foo = tvm.build(s, [A, B], device, name="layout_transform")
+        data_npy = np.random.uniform(size=in_shape).astype(A.dtype)
+        out_npy = fref(data_npy)
+        data_nd = tvm.nd.array(data_npy, ctx)
+        out_nd = tvm.nd.empty(out_npy.shape, ctx=ctx, dtype=B.dtype)
+        foo(data_nd, out_nd)
+        np.testing.assert_allclose(out_nd.asnumpy(), out_npy)
+
+    for device in ["llvm", "nvptx", "cuda", "opencl", "metal", "rocm", "vulkan"]:
+        check_device(device)
+
+
 def test_expand_dims():
     verify_expand_dims((3, 10), (3, 10, 1, 1), 2, 2)
     verify_expand_dims((3, 10), (1, 3, 10), -3, 1)
@@ -194,6 +217,8 @@ def test_tranpose():
     verify_tranpose((3, 10, 2), (1, 0, 2))
     verify_tranpose((3, 10, 5), (2, 0, 1))
     verify_tranpose((3, 10), None)
+    # 5-D output whose last axis is not a channel block
+    verify_tranpose((2, 3, 4, 200, 5), (0, 1, 2, 4, 3))
 
 
 def test_reshape():
@@ -234,6 +259,22 @@ def test_expand_like():
     verify_expand_like((5, 7), (5, 6, 7, 8), [1, 3])
 
 
+def test_layout_transform():
+    def nchw_to_nchwc(c):
+        return lambda x: x.reshape(x.shape[0], x.shape[1] // c, c,
+                                   x.shape[2], x.shape[3]).transpose(0, 1, 3, 4, 2)
+    def nchwc_to_nchw(x):
+        return x.transpose(0, 1, 4, 2, 3).reshape(
+            x.shape[0], x.shape[1] * x.shape[4], x.shape[2], x.shape[3])
+    verify_layout_transform((1, 16, 5, 7), "NCHW", "NCHW8c", nchw_to_nchwc(8))
+    verify_layout_transform((2, 2, 5, 7, 8), "NCHW8c", "NCHW", nchwc_to_nchw)
+    verify_layout_transform((2, 2, 5, 7, 8), "NCHW8c", "NCHW4c",
+                            lambda x: nchw_to_nchwc(4)(nchwc_to_nchw(x)))
+    # OIHW kernel to OIHW2i4o
+    verify_layout_transform((8, 6, 3, 3), "OIHW", "OIHW2i4o",
+                            lambda x: x.reshape(2, 4, 3, 2, 3, 3).transpose(0, 2, 4, 5, 3, 1))
+
+
 if __name__ == "__main__":
     test_concatenate()
     test_tranpose()
@@ -242,3 +283,4 @@ if __name__ == "__main__":
     test_squeeze()
     test_split()
     test_expand_like()
+    test_layout_transform()
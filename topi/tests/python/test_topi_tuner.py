@@ -0,0 +1,50 @@
+"""Test the conv2d schedule tuner."""
+import tvm
+import topi
+from tvm.contrib import util
+from topi import schedule_db, tuner
+from topi.nn.conv2d import Workload, SpatialPack, Im2ColPack, WinogradPack
+from topi.x86.conv2d_avx_common import AVXConvCommonFwd
+from topi.x86.conv2d_avx_1x1 import AVXConv1x1Fwd
+
+
+def test_schedule_space():
+    wkl = Workload('float32', 'float32', 40, 40, 32, 64, 3, 3, 1, 1, 1, 1)
+    space = tuner.schedule_space(wkl, tvm.target.rasp())
+    assert space
+    assert set(type(sch) for sch in space) == set([SpatialPack, Im2ColPack, WinogradPack])
+    assert all(schedule_db.is_valid(wkl, sch) for sch in space)
+
+    space = tuner.schedule_space(wkl, "llvm -mcpu=core-avx2", [AVXConvCommonFwd, AVXConv1x1Fwd])
+    assert all(isinstance(sch, AVXConvCommonFwd) for sch in space)
+    assert all(sch.oc_bn % 8 == 0 for sch in space)
+    wkl_1x1 = wkl._replace(hkernel=1, wkernel=1, hpad=0, wpad=0)
+    space = tuner.schedule_space(wkl_1x1, "llvm -mcpu=skylake-avx512")
+    assert any(isinstance(sch, AVXConv1x1Fwd) for sch in space)
+    assert not any(isinstance(sch, WinogradPack) for sch in space)
+    assert all(sch.oc_bn % 16 == 0 for sch in space)
+
+
+def test_tune_conv2d():
+    if not tvm.module.enabled("llvm"):
+        print("skip because llvm is not enabled..")
+        return
+    # the candidates are measured on the host
+    if not tvm.codegen.llvm_host_has_feature("avx2"):
+        print("skip because the host does not support avx2")
+        return
+    temp = util.tempdir()
+    path = temp.relpath("schedules.json")
+    target = "llvm -mcpu=core-avx2"
+    wkl = Workload('float32', 'float32', 20, 20, 16, 32, 3, 3, 1, 1, 1, 1)
+    best, records = tuner.tune_conv2d(wkl, target, db=path,
+                                      max_candidates=4, number=2, repeat=1)
+    assert len(records) == 4
+    assert records[0].sch == best and records[0].mean is not None
+    db = schedule_db.ScheduleDatabase(path)
+    assert db.lookup(target, wkl, nearest=False) == best
+
+
+if __name__ == "__main__":
+    test_schedule_space()
+    test_tune_conv2d()